@@ -0,0 +1,177 @@
+"""Allocation tracking per game subsystem with tracemalloc.
+
+Every `window` frames a tracemalloc snapshot is taken and compared with the
+previous one by allocation traceback. Each traceback is assigned to the
+subsystem of its innermost frame that falls inside a known function (a
+Particle allocated from Game.hit_brick counts as particles, a text surface
+rendered from Game.draw_game counts as HUD), using a line-number index built
+from the game's modules since tracemalloc frames only carry file and line.
+
+Per subsystem we report live blocks and bytes, new blocks per frame (summed
+over allocation sites whose block count went up) and retained growth. A
+subsystem whose live bytes grow in every one of `leak_windows` consecutive
+windows after warm-up, by more than a minimum amount, is flagged as a
+possible leak, which is what a soak run is for. Separately, the traced-memory peak within each frame gives the
+transient bytes allocated and freed inside a frame.
+
+tracemalloc only sees memory allocated through Python's allocators; pixel
+buffers pygame gets from SDL are not counted, only their wrapper objects.
+"""
+import dis
+import tracemalloc
+
+# Qualified-name prefixes for each subsystem; first match wins per frame
+SUBSYSTEMS = {
+    "particles": ("Particle.", "ParticleSystem.", "_ParticleView."),
+    "balls": ("Ball.", "BallSystem.", "Game.serve_balls", "Game.apply_mega_powerup"),
+    "bricks": ("Brick.", "Game.create_bricks", "Game.create_boss_level", "Game.hit_brick",
+               "Game.prepare_level", "Game.brick_sprites", "Game.build_brick_atlas"),
+    "boss": ("BossBrick.", "Projectile.", "ProjectileStore.", "BossAttacks.", "Game.hit_boss"),
+    "powerups": ("PowerUp.", "Game.spawn_powerup", "Game.apply_powerup"),
+    "hud": ("Game.draw_game", "Game.draw_start_screen", "Game.draw_pause_screen",
+            "Game.draw_pacing_overlay"),
+}
+OTHER = "other"
+
+
+def _code_lines(code):
+    if hasattr(code, "co_lines"):
+        return {line for _, _, line in code.co_lines() if line is not None}
+    return {line for _, line in dis.findlinestarts(code)}
+
+
+def build_line_index(modules):
+    """Map (filename, line) to the qualified name of the function on that line"""
+    index = {}
+
+    def add(function):
+        code = getattr(function, "__code__", None)
+        if code is None:
+            return
+        for line in _code_lines(code):
+            index[(code.co_filename, line)] = function.__qualname__
+
+    for module in modules:
+        for value in vars(module).values():
+            if getattr(value, "__module__", None) != module.__name__:
+                continue
+            if isinstance(value, type):
+                for member in vars(value).values():
+                    add(getattr(member, "__func__", member))
+            else:
+                add(value)
+    return index
+
+
+class AllocationTracker:
+    """Windowed tracemalloc snapshots attributed to subsystems"""
+    def __init__(self, modules, window=60, depth=12, leak_windows=10, warmup_windows=3,
+                 min_leak_bytes=16 * 1024, subsystems=SUBSYSTEMS):
+        self.modules = modules
+        self.window = window
+        self.depth = depth
+        self.leak_windows = leak_windows
+        self.warmup_windows = warmup_windows
+        self.min_leak_bytes = min_leak_bytes  # Ignore steady growth smaller than this
+        self.subsystems = subsystems
+        self.names = list(subsystems) + [OTHER]
+
+        self.index = {}
+        self.owners = {}  # traceback -> subsystem, cached
+        self.snapshot = None
+        self.frames = 0
+        self.windows = 0
+        self.frame_base = 0
+        self.transient_bytes = 0
+        self.history = []  # Per window: {subsystem: (live blocks, live bytes)}
+        self.new_blocks = dict.fromkeys(self.names, 0)
+        self.leaks = set()
+
+    def start(self):
+        self.index = build_line_index(self.modules)
+        tracemalloc.start(self.depth)
+        self.snapshot = self._take()
+        print(f"Allocation tracking on: {self.window}-frame windows, {self.depth}-frame tracebacks")
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            print(self.report())
+            tracemalloc.stop()
+
+    def _take(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    def owner(self, traceback):
+        """Subsystem of the innermost frame that is in a known function"""
+        subsystem = self.owners.get(traceback)
+        if subsystem is not None:
+            return subsystem
+        subsystem = OTHER
+        for frame in reversed(traceback):
+            qualname = self.index.get((frame.filename, frame.lineno))
+            if qualname is None:
+                continue
+            match = next((name for name, prefixes in self.subsystems.items()
+                          if qualname.startswith(prefixes)), None)
+            if match:
+                subsystem = match
+                break
+        self.owners[traceback] = subsystem
+        return subsystem
+
+    def frame_start(self):
+        tracemalloc.reset_peak()
+        self.frame_base = tracemalloc.get_traced_memory()[0]
+
+    def frame_end(self):
+        self.transient_bytes += tracemalloc.get_traced_memory()[1] - self.frame_base
+        self.frames += 1
+        if self.frames % self.window == 0:
+            self._close_window()
+
+    def _close_window(self):
+        snapshot = self._take()
+        live = {name: [0, 0] for name in self.names}
+        for stat in snapshot.statistics("traceback"):
+            totals = live[self.owner(stat.traceback)]
+            totals[0] += stat.count
+            totals[1] += stat.size
+        for diff in snapshot.compare_to(self.snapshot, "traceback"):
+            if diff.count_diff > 0:
+                self.new_blocks[self.owner(diff.traceback)] += diff.count_diff
+        self.snapshot = snapshot
+        self.history.append({name: tuple(totals) for name, totals in live.items()})
+        self.windows += 1
+        self._check_leaks()
+
+    def _check_leaks(self):
+        recent = self.history[self.warmup_windows:][-(self.leak_windows + 1):]
+        if len(recent) <= self.leak_windows:
+            return
+        for name in self.names:
+            sizes = [window[name][1] for window in recent]
+            if (name not in self.leaks and sizes[-1] - sizes[0] >= self.min_leak_bytes
+                    and all(b > a for a, b in zip(sizes, sizes[1:]))):
+                self.leaks.add(name)
+                print(f"Possible leak in {name}: live memory grew for {self.leak_windows} windows "
+                      f"({sizes[0]} -> {sizes[-1]} bytes)")
+
+    def report(self):
+        if not self.history:
+            return "Allocation tracking: no complete windows"
+        frames = self.windows * self.window
+        first = self.history[min(self.warmup_windows, len(self.history) - 1)]
+        last = self.history[-1]
+        lines = [f"Allocations over {frames} frames "
+                 f"(transient {self.transient_bytes / max(1, self.frames) / 1024:.1f} KiB/frame):",
+                 f"  {'subsystem':<10} {'live blocks':>11} {'live KiB':>9} {'new/frame':>10} {'growth KiB':>11}"]
+        for name in self.names:
+            blocks, size = last[name]
+            growth = (size - first[name][1]) / 1024
+            flag = "  LEAK?" if name in self.leaks else ""
+            lines.append(f"  {name:<10} {blocks:>11} {size / 1024:>9.1f} "
+                         f"{self.new_blocks[name] / frames:>10.1f} {growth:>11.1f}{flag}")
+        return "\n".join(lines)
@@ -0,0 +1,288 @@
+"""Balancing analytics over a corpus of replay files.
+
+    python analytics.py replays/*.bbr --out corpus --jobs 8
+
+Every replay is re-simulated headlessly (SDL dummy video and audio drivers)
+in a pool of worker processes. Game hooks record one row per event into
+compact arrays:
+
+    brick_hits   replay, frame, level, brick centre x, y
+    paddle_hits  replay, frame, level, x, offset from the paddle centre (-1..1)
+    ball_losses  replay, frame, level, x
+    powerups     replay, frame, level, type, frames since the level started
+    boss_fights  replay, level, frames, won
+
+Each worker writes its replay's columns as small .npy chunks and returns only
+their paths. The chunks are then appended into one .npy file per column,
+created with open_memmap at the final length and copied one chunk at a time.
+The reductions (brick heatmap by grid cell, paddle and loss histograms,
+power-up counts and timing, boss fight durations) read those files memory
+mapped and in fixed-size slices. Memory therefore depends on the slice size
+and the largest single replay, not on how big the corpus is.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TABLES = {
+    "brick_hits": (("replay", "u4"), ("frame", "u4"), ("level", "u2"), ("x", "i2"), ("y", "i2")),
+    "paddle_hits": (("replay", "u4"), ("frame", "u4"), ("level", "u2"), ("x", "i2"), ("offset", "f4")),
+    "ball_losses": (("replay", "u4"), ("frame", "u4"), ("level", "u2"), ("x", "i2")),
+    "powerups": (("replay", "u4"), ("frame", "u4"), ("level", "u2"), ("type", "u1"), ("level_frame", "u4")),
+    "boss_fights": (("replay", "u4"), ("level", "u2"), ("frames", "u4"), ("won", "u1")),
+}
+SLICE_ROWS = 1 << 20  # Rows per reduction step
+
+# Worker process state: one headless Game reused for every replay
+_game = None
+_events = None
+
+
+class _EventLog:
+    """Rows per table for the replay being extracted"""
+    def __init__(self, replay):
+        self.replay = replay
+        self.frame = 0
+        self.level_start = 0
+        self.rows = {table: [] for table in TABLES}
+
+    def add(self, table, *values):
+        self.rows[table].append(values)
+
+
+def _headless():
+    """No window or sound device needed; set before pygame is imported"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+
+def _init_worker():
+    global _game
+    _headless()
+    import brick_breaker
+
+    _game = brick_breaker.Game(seed=0, pacing="none")
+    game = _game
+    game.scheduler.active = False  # No frame loop here to drain it
+    hit_brick, paddle_hit, apply_powerup = game.hit_brick, game.paddle_hit, game.apply_powerup
+    powerup_types = brick_breaker.POWERUP_TYPES
+
+    # Instance attributes shadow the methods, so BallSystem's calls are seen too
+    def on_brick(brick, damage, x, y, effects=True):
+        _events.add("brick_hits", _events.replay, _events.frame, game.level,
+                    brick.rect.centerx, brick.rect.centery)
+        hit_brick(brick, damage, x, y, effects)
+
+    def on_paddle(x, y):
+        paddle = game.paddle.rect
+        _events.add("paddle_hits", _events.replay, _events.frame, game.level, int(x),
+                    (x - paddle.centerx) / (paddle.width / 2))
+        paddle_hit(x, y)
+
+    def on_lost(x):
+        _events.add("ball_losses", _events.replay, _events.frame, game.level, int(x))
+
+    def on_powerup(powerup_type):
+        _events.add("powerups", _events.replay, _events.frame, game.level,
+                    powerup_types.index(powerup_type), _events.frame - _events.level_start)
+        apply_powerup(powerup_type)
+
+    game.hit_brick = on_brick
+    game.paddle_hit = on_paddle
+    game.ball_lost = on_lost
+    game.apply_powerup = on_powerup
+
+
+def _extract(job):
+    """Re-simulate one replay; returns {table: (rows, {column: chunk path})}"""
+    global _events
+    from replay import ReplayReader
+
+    replay_id, path, out_dir = job
+    game = _game
+    reader = ReplayReader(path)
+    game.seed = reader.seed
+    game.set_level_set(reader.level_set)
+    reader.seek(game, 0)
+    _events = events = _EventLog(replay_id)
+
+    level = game.level
+    for frame, frame_input, key_events in reader.play(game):
+        events.frame = frame
+        game.step(frame_input, key_events)
+        if game.level != level:
+            if game.is_boss_level(level):
+                events.add("boss_fights", replay_id, level, frame - events.level_start, game.level > level)
+            level = game.level
+            events.level_start = frame
+    if game.is_boss_level(level) and game.boss_brick and not game.boss_brick.destroyed:
+        events.add("boss_fights", replay_id, level, events.frame - events.level_start, 0)
+
+    chunks = {}
+    for table, columns in TABLES.items():
+        rows = events.rows[table]
+        data = np.array(rows, dtype=[(name, dtype) for name, dtype in columns]) if rows else None
+        paths = {}
+        for name, dtype in columns:
+            chunk = os.path.join(out_dir, "chunks", f"{replay_id:06d}.{table}.{name}.npy")
+            np.save(chunk, data[name] if data is not None else np.zeros(0, dtype))
+            paths[name] = chunk
+        chunks[table] = (len(rows), paths)
+    return chunks
+
+
+def extract_corpus(paths, out_dir, jobs=None):
+    """Extract every replay in parallel, then append the chunks into one
+    memory-mapped .npy file per column"""
+    os.makedirs(os.path.join(out_dir, "chunks"), exist_ok=True)
+    jobs_list = [(replay_id, path, out_dir) for replay_id, path in enumerate(paths)]
+    with ProcessPoolExecutor(jobs, initializer=_init_worker) as pool:
+        results = list(pool.map(_extract, jobs_list))
+
+    for table, columns in TABLES.items():
+        for name, dtype in columns:
+            parts = [result[table][1][name] for result in results]
+            total = sum(result[table][0] for result in results)
+            column = np.lib.format.open_memmap(os.path.join(out_dir, f"{table}.{name}.npy"), "w+",
+                                               np.dtype(dtype), (total,))
+            offset = 0
+            for part in parts:
+                values = np.load(part)  # One replay's worth
+                column[offset:offset + len(values)] = values
+                offset += len(values)
+                os.remove(part)
+            column.flush()
+            del column
+    os.rmdir(os.path.join(out_dir, "chunks"))
+    print(f"Extracted {len(paths)} replays into {out_dir}")
+
+
+def _column(out_dir, table, name):
+    return np.load(os.path.join(out_dir, f"{table}.{name}.npy"), mmap_mode="r")
+
+
+def _slices(length):
+    for start in range(0, length, SLICE_ROWS):
+        yield slice(start, min(length, start + SLICE_ROWS))
+
+
+def analyze(out_dir, screen_size=(875, 600), cell=(80, 35), x_bins=35, offset_bins=20,
+            powerup_types=(), boss_bin_frames=300):
+    """Heatmaps and histograms over the extracted corpus"""
+    width, height = screen_size
+    grid = (height // cell[1] + 1, width // cell[0] + 1)
+
+    # Brick hits by grid cell
+    heatmap = np.zeros(grid[0] * grid[1], np.int64)
+    x, y = _column(out_dir, "brick_hits", "x"), _column(out_dir, "brick_hits", "y")
+    for part in _slices(len(x)):
+        cells = (np.clip(y[part], 0, height) // cell[1]) * grid[1] + np.clip(x[part], 0, width) // cell[0]
+        heatmap += np.bincount(cells, minlength=heatmap.size)
+    heatmap = heatmap.reshape(grid)
+
+    # Paddle hit positions and ball losses
+    offsets = np.zeros(offset_bins, np.int64)
+    column = _column(out_dir, "paddle_hits", "offset")
+    for part in _slices(len(column)):
+        offsets += np.histogram(column[part], offset_bins, (-1.0, 1.0))[0]
+    losses = np.zeros(x_bins, np.int64)
+    column = _column(out_dir, "ball_losses", "x")
+    for part in _slices(len(column)):
+        losses += np.histogram(column[part], x_bins, (0, width))[0]
+
+    # Power-up pickups per type and how far into the level they happen
+    kinds = max(1, len(powerup_types))
+    pickups = np.zeros(kinds, np.int64)
+    timing = np.zeros(kinds)
+    types, level_frames = _column(out_dir, "powerups", "type"), _column(out_dir, "powerups", "level_frame")
+    for part in _slices(len(types)):
+        pickups += np.bincount(types[part], minlength=kinds)[:kinds]
+        timing += np.bincount(types[part], level_frames[part], minlength=kinds)[:kinds]
+
+    # Boss fight length per level, as a histogram so percentiles need no
+    # sort; one row per fight is small enough to reduce in one go
+    levels, frames = _column(out_dir, "boss_fights", "level"), _column(out_dir, "boss_fights", "frames")
+    won = _column(out_dir, "boss_fights", "won")
+    bosses = {}
+    for level in np.unique(levels):
+        mask = (levels == level) & (won == 1)
+        histogram = np.bincount(frames[mask] // boss_bin_frames)
+        bosses[int(level)] = {
+            "fights": int(np.count_nonzero(levels == level)),
+            "won": int(np.count_nonzero(mask)),
+            "mean_frames": float(frames[mask].mean()) if mask.any() else 0.0,
+            "histogram": histogram,
+        }
+
+    return {
+        "brick_heatmap": heatmap,
+        "paddle_offsets": offsets,
+        "ball_losses": losses,
+        "powerup_pickups": pickups,
+        "powerup_mean_frame": np.divide(timing, pickups, out=np.zeros(kinds), where=pickups > 0),
+        "boss_fights": bosses,
+    }
+
+
+def _percentile_bin(histogram, fraction):
+    if not histogram.sum():
+        return 0
+    return int(np.searchsorted(np.cumsum(histogram), fraction * histogram.sum()))
+
+
+def report(results, powerup_types=(), fps=60, boss_bin_frames=300):
+    lines = ["Brick hits by grid cell (rows top to bottom):"]
+    for row in results["brick_heatmap"]:
+        if row.any():
+            lines.append("  " + " ".join(f"{count:>6}" for count in row.tolist()))
+    losses = results["ball_losses"]
+    lines.append(f"Ball losses by x ({len(losses)} bins): " + " ".join(str(count) for count in losses.tolist()))
+    offsets = results["paddle_offsets"]
+    lines.append(f"Paddle hit offsets -1..1 ({len(offsets)} bins): "
+                 + " ".join(str(count) for count in offsets.tolist()))
+    lines.append("Power-ups picked up (mean seconds into level):")
+    for i, count in enumerate(results["powerup_pickups"].tolist()):
+        name = powerup_types[i] if i < len(powerup_types) else str(i)
+        lines.append(f"  {name:<16} {count:>8} {results['powerup_mean_frame'][i] / fps:>8.1f}")
+    lines.append("Boss fights:")
+    for level, stats in sorted(results["boss_fights"].items()):
+        p50 = (_percentile_bin(stats["histogram"], 0.5) + 0.5) * boss_bin_frames / fps
+        lines.append(f"  level {level}: {stats['won']}/{stats['fights']} won, "
+                     f"mean {stats['mean_frames'] / fps:.1f}s, median ~{p50:.0f}s")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Brick Breaker replay analytics")
+    parser.add_argument("replays", nargs="*", help="replay files to extract")
+    parser.add_argument("--out", default="corpus", help="directory for the column files")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--save", metavar="FILE", default=None, help="also save the results as .npz")
+    args = parser.parse_args()
+
+    if np is None:
+        print("Replay analytics needs NumPy (install with: pip install numpy)")
+        sys.exit(1)
+    if args.replays:
+        extract_corpus(args.replays, args.out, args.jobs)
+
+    _headless()
+    from brick_breaker import POWERUP_TYPES, SCREEN_WIDTH, SCREEN_HEIGHT, BRICK_WIDTH, BRICK_HEIGHT
+    cell = (BRICK_WIDTH + 5, BRICK_HEIGHT + 5)
+    results = analyze(args.out, (SCREEN_WIDTH, SCREEN_HEIGHT), cell, powerup_types=POWERUP_TYPES)
+    print(report(results, POWERUP_TYPES))
+    if args.save:
+        arrays = {key: value for key, value in results.items() if key != "boss_fights"}
+        for level, stats in results["boss_fights"].items():
+            arrays[f"boss_level_{level}_histogram"] = stats["histogram"]
+        np.savez(args.save, **arrays)
+
+
+if __name__ == "__main__":
+    main()
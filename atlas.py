@@ -0,0 +1,75 @@
+"""Sprite atlas for entity drawing.
+
+Sprites are rendered once with the entities' own primitive draw code, packed
+into a single surface and converted to the display pixel format (or uploaded
+as one texture on the SDL2 backend). Entities then draw with one blit from an
+atlas subrect instead of several rect/circle/text calls per frame.
+"""
+import pygame
+
+from render import SurfaceCanvas
+
+
+class SpriteAtlas:
+    """Shelf-packed sheet of pre-rendered sprites looked up by key"""
+    def __init__(self, width=1024, padding=1):
+        self.width = width
+        self.padding = padding
+        self.entries = {}  # key -> (area Rect, (offset x, offset y))
+        self.image = None  # Backend handle from canvas.upload_atlas
+        self.version = None
+
+    def build(self, canvas, sprites, version=None):
+        """Render, pack and upload sprites.
+
+        `sprites` is a list of (key, (width, height), (offset x, offset y), draw)
+        where draw(canvas) paints the sprite with its top-left at (0, 0). The
+        offset is added to the entity position when the sprite is blitted.
+        """
+        sheet, entries = self.render(sprites)
+        self.install(canvas, sheet, entries, version)
+
+    def render(self, sprites):
+        """Pack and draw sprites into a plain Surface; returns (sheet, entries).
+
+        Touches nothing but the new Surface, so it can run on a worker thread.
+        """
+        placed = []
+        x = y = shelf_height = 0
+        for key, size, offset, draw in sorted(sprites, key=lambda sprite: -sprite[1][1]):
+            width, height = size
+            if x + width > self.width:
+                x = 0
+                y += shelf_height + self.padding
+                shelf_height = 0
+            placed.append((key, pygame.Rect(x, y, width, height), offset, draw))
+            x += width + self.padding
+            shelf_height = max(shelf_height, height)
+
+        sheet = pygame.Surface((self.width, max(1, y + shelf_height)))
+        entries = {}
+        for key, area, offset, draw in placed:
+            draw(SurfaceCanvas(sheet.subsurface(area)))
+            entries[key] = (area, offset)
+        return sheet, entries
+
+    def install(self, canvas, sheet, entries, version=None):
+        """Hand a rendered sheet to the backend; must run on the drawing thread"""
+        self.entries = entries
+        self.image = canvas.upload_atlas(sheet)
+        self.version = version
+
+    def share(self, image, entries, version=None):
+        """Use a sheet another atlas already uploaded to the same canvas"""
+        self.entries = entries
+        self.image = image
+        self.version = version
+
+    def draw(self, canvas, key, pos):
+        """Blit a sprite; returns False if the atlas doesn't have it"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+        area, offset = entry
+        canvas.blit_area(self.image, (pos[0] + offset[0], pos[1] + offset[1]), area)
+        return True
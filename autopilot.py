@@ -0,0 +1,236 @@
+"""Closed-form ball trajectory prediction and an autopilot paddle.
+
+Soak and benchmark runs need a paddle that never misses, and copying the
+game to step update() ahead every frame costs more than the run itself.
+TrajectoryPredictor works out where a ball will reach the paddle line
+directly from its fixed-point position and velocity, following the rules
+Game.update applies:
+
+  * a ball moves by exactly its velocity each frame (see fixed.py) and is
+    tested against walls and bricks at the whole pixel containing it, so the
+    frame of the next event on each axis is an integer division, not a loop
+  * side walls flip vx, the top wall flips vy
+  * the first live brick (in list order) a ball overlaps flips vy,
+    unless a fire ball still has pierce left; the brick's remaining hits go
+    down by the ball's damage so a path can break through
+  * the paddle only counts while the ball is moving down
+
+The path is walked one straight segment at a time: the next wall, brick or
+paddle event in each segment is solved for directly (a brick overlap is the
+intersection of two integer intervals of frames). The moving boss is left
+out, so predictions on boss levels are corrected at the next bounce.
+
+Predictions are cached per ball and reused until its velocity changes, i.e.
+until something bounces it, or the brick layout is replaced. The Autopilot
+turns the soonest prediction into a frame input for Game.handle_input,
+offsetting the paddle so the return shot heads for the remaining bricks.
+"""
+import math
+
+from fixed import FIXED_BITS, FIXED_ONE, to_fixed
+
+
+def _ceil_div(a, b):
+    return -(-a // b)
+
+
+def _frames_until_outside(p, v, low, high):
+    """Smallest k >= 1 whose pixel (p + k*v) >> FIXED_BITS is <= low or
+    >= high, or None if never; low or high may be None for no bound"""
+    pixel = (p + v) >> FIXED_BITS
+    if (low is not None and pixel <= low) or (high is not None and pixel >= high):
+        return 1
+    if v > 0 and high is not None:
+        return max(1, _ceil_div((high << FIXED_BITS) - p, v))
+    if v < 0 and low is not None:
+        # Pixel <= low means p + k*v < (low + 1) * FIXED_ONE
+        return max(1, (p - ((low + 1) << FIXED_BITS)) // -v + 1)
+    return None
+
+
+def _overlap_frames(p, v, low, high):
+    """Frames k >= 1 (as an inclusive range) where low < pixel(p + k*v) < high"""
+    # Whole pixels strictly inside (low, high) are fixed values in [a, b)
+    a, b = (low + 1) << FIXED_BITS, high << FIXED_BITS
+    if v == 0:
+        return (1, math.inf) if a <= p < b else None
+    if v > 0:
+        first, last = _ceil_div(a - p, v), (b - 1 - p) // v
+    else:
+        first, last = _ceil_div(p - b + 1, -v), (p - a) // -v
+    first = max(1, first)
+    return (first, last) if first <= last else None
+
+
+class TrajectoryPredictor:
+    """Where and when each ball reaches the paddle line"""
+    def __init__(self, screen_width, ball_size, max_frames=3600, max_segments=200):
+        self.screen_width = screen_width
+        self.ball_size = ball_size
+        self.max_frames = max_frames
+        self.max_segments = max_segments
+        self.cache = {}  # id(ball) -> (ball, speed, frame, layout version, prediction)
+        self.computed = 0
+        self.reused = 0
+
+    def predict(self, x, y, vx, vy, paddle_top, bricks=(), pierce=0, damage=1):
+        """(frames, centre x in pixels) when a ball at fixed-point (x, y)
+        moving at (vx, vy) first touches the paddle line moving down, or None
+        if it doesn't within max_frames"""
+        size = self.ball_size
+        right_limit = self.screen_width - size
+        paddle_limit = paddle_top - size + 1
+        live = [[brick.rect, brick.hits_required - brick.hits_taken] for brick in bricks
+                if not brick.destroyed]
+        frames = 0
+        for _ in range(self.max_segments):
+            # Next event on each axis
+            k_wall = _frames_until_outside(x, vx, 0, right_limit)
+            if vy > 0:
+                k_y = _frames_until_outside(y, vy, None, paddle_limit)
+            else:
+                k_y = _frames_until_outside(y, vy, 0, None)
+            k = min(value for value in (k_wall, k_y, self.max_frames) if value is not None)
+
+            # First brick overlapped in this segment, ties going to list order
+            hit = None
+            for entry in live:
+                rect, remaining = entry
+                if remaining <= 0:
+                    continue
+                span_x = _overlap_frames(x, vx, rect.left - size, rect.right)
+                span_y = span_x and _overlap_frames(y, vy, rect.top - size, rect.bottom)
+                if span_y:
+                    first = max(span_x[0], span_y[0])
+                    if first <= min(span_x[1], span_y[1], k) and (hit is None or first < hit[0]):
+                        hit = (first, entry)
+            if hit:
+                k = hit[0]
+
+            frames += k
+            if frames > self.max_frames:
+                return None
+            x, y = x + k * vx, y + k * vy
+            px, py = x >> FIXED_BITS, y >> FIXED_BITS
+            # Same order as Game.update: walls, paddle, bricks
+            if px <= 0 or px >= right_limit:
+                vx = -vx
+            if py <= 0:
+                vy = -vy
+            if vy > 0 and py >= paddle_limit:
+                return frames, px + size / 2
+            if hit:
+                hit[1][1] -= damage
+                if pierce > 0:
+                    pierce -= 1
+                else:
+                    vy = -vy
+        return None
+
+    def predict_ball(self, ball, paddle_top, bricks, frame, layout_version):
+        """Cached predict() for a Ball object"""
+        speed = (ball.vx, ball.vy)
+        cached = self.cache.get(id(ball))
+        if (cached and cached[0] is ball and cached[1] == speed and cached[3] == layout_version):
+            self.reused += 1
+            prediction, elapsed = cached[4], frame - cached[2]
+            if prediction is None or prediction[0] - elapsed <= 0:
+                return prediction
+            return prediction[0] - elapsed, prediction[1]
+        self.computed += 1
+        pierce = ball.pierce_count if ball.ball_type == "fire" else 0
+        prediction = self.predict(ball.x, ball.y, ball.vx, ball.vy, paddle_top,
+                                  bricks, pierce, getattr(ball, "damage_multiplier", 1))
+        self.cache[id(ball)] = (ball, speed, frame, layout_version, prediction)
+        return prediction
+
+    def forget(self, balls):
+        """Drop cache entries for balls no longer in play"""
+        live = {id(ball) for ball in balls}
+        for key in [key for key in self.cache if key not in live]:
+            del self.cache[key]
+
+
+class Autopilot:
+    """Steers the paddle to meet the next ball, aiming at the remaining bricks"""
+    def __init__(self, screen_width, ball_size, paddle_speed, input_left, input_right,
+                 start_key, restart_key, aim=0.5):
+        self.predictor = TrajectoryPredictor(screen_width, ball_size)
+        self.screen_width = screen_width
+        self.paddle_speed = paddle_speed
+        self.input_left = input_left
+        self.input_right = input_right
+        self.start_key = start_key
+        self.restart_key = restart_key
+        self.aim = aim  # Paddle hit position to play for, as a fraction of the half-width
+
+    def control(self, game):
+        """Frame input (fixed-point mouse x, input bits) for game.handle_input"""
+        paddle = game.paddle.rect
+        target = self._target(game, paddle)
+        if target is None:
+            target = paddle.centerx
+        if game.use_mouse:
+            return to_fixed(target), 0
+        # Keyboard control moves a fixed step; stop when within one step
+        centre = to_fixed(paddle.centerx)
+        if target < paddle.centerx - self.paddle_speed / 2:
+            return centre, self.input_left
+        if target > paddle.centerx + self.paddle_speed / 2:
+            return centre, self.input_right
+        return centre, 0
+
+    def keys(self, game):
+        """Key presses that keep an unattended run going"""
+        if game.game_state == "start_screen":
+            return [self.start_key]
+        if game.game_state == "playing" and (game.lives <= 0 or game.level > game.max_level):
+            return [self.restart_key]
+        return []
+
+    def _target(self, game, paddle):
+        soonest = None
+        if game.ball_system is not None:
+            soonest = self._mega_prediction(game.ball_system, paddle.top)
+        else:
+            self.predictor.forget(game.balls)
+            for ball in game.balls:
+                prediction = self.predictor.predict_ball(ball, paddle.top, game.bricks, game.frame_count,
+                                                         game.layout_version)
+                if prediction and (soonest is None or prediction[0] < soonest[0]):
+                    soonest = prediction
+        if soonest is None:
+            return None
+
+        # Meet the ball off-centre so it comes back towards the bricks
+        ball_x = soonest[1]
+        remaining = [brick.rect.centerx for brick in game.bricks if not brick.destroyed]
+        goal = sum(remaining) / len(remaining) if remaining else self.screen_width / 2
+        side = 1 if goal > ball_x else -1
+        return ball_x - side * self.aim * paddle.width / 2
+
+    def _mega_prediction(self, balls, paddle_top):
+        """Hundreds of balls can't all be saved: play the lowest falling one.
+
+        Its path is a straight line folded at the side walls; the ball is
+        usually below the bricks already.
+        """
+        n = balls.count
+        falling = [i for i in range(n) if balls.vy[i] > 0]
+        if not falling:
+            return None
+        i = max(falling, key=lambda i: balls.y[i])
+        size = self.predictor.ball_size
+        x, y, vx, vy = int(balls.x[i]), int(balls.y[i]), int(balls.vx[i]), int(balls.vy[i])
+        frames = max(1, _ceil_div(((paddle_top - size) << FIXED_BITS) - y, vy))
+        span = (self.screen_width - size) << FIXED_BITS
+        x = (x + vx * frames) % (2 * span)
+        if x > span:
+            x = 2 * span - x
+        return frames, x / FIXED_ONE + size / 2
+
+    def report(self):
+        predictor = self.predictor
+        total = predictor.computed + predictor.reused
+        return (f"Autopilot: {predictor.computed} trajectories solved, "
+                f"{predictor.reused / max(1, total):.0%} of lookups cached")
@@ -0,0 +1,264 @@
+"""Array-backed ball physics for mega multi-ball mode.
+
+Every ball is one slot in a set of preallocated NumPy arrays: position,
+velocity, type, pierce count, life timer and damage. Position and velocity
+are int64 fixed point, the same units and rounding as the classic Ball (see
+fixed.py), and collisions are tested on the whole-pixel part. Integration, expiry,
+wall bounces and the paddle reflection run as whole-array operations. Brick
+and boss collisions are found with one overlap test against every brick and
+then resolved in order for just the balls that actually touch something, so a
+brick destroyed by one ball is never hit again by the next. Dead balls are
+removed by swapping the last live slots into their places.
+
+Only the ball state lives here. Scoring, power-up drops, particles and sounds
+still go through the Game (hit_brick, hit_boss, paddle_hit), so both ball
+modes share one set of rules.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from fixed import FIXED_BITS, to_fixed, scale, scale_array
+
+# One Game MEGA_BALL_STATE record, for packing every ball in one copy
+STATE_RECORD = np.dtype([("x", "<i4"), ("y", "<i4"), ("vx", "<i4"), ("vy", "<i4"), ("kind", "u1"),
+                         ("pierce", "u1"), ("life", "<i2"), ("damage", "u1")]) if np is not None else None
+
+
+class BallSystem:
+    """Fixed-capacity structure-of-arrays store for many balls"""
+    def __init__(self, capacity, screen_size, ball_size, base_speed_x, types, colors,
+                 effect_budget=16):
+        self.capacity = capacity
+        self.screen_width, self.screen_height = screen_size
+        self.size = ball_size
+        self.base_vx = to_fixed(base_speed_x)
+        self.types = types    # kind index -> ball type name
+        self.colors = colors  # kind index -> colour
+        # Sparkles and sounds per frame; hundreds of hits would otherwise
+        # bury the frame in particles
+        self.effect_budget = effect_budget
+        self.count = 0
+
+        self.x = np.zeros(capacity, np.int64)
+        self.y = np.zeros(capacity, np.int64)
+        self.vx = np.zeros(capacity, np.int64)
+        self.vy = np.zeros(capacity, np.int64)
+        self.kind = np.zeros(capacity, np.uint8)
+        self.pierce = np.zeros(capacity, np.uint8)
+        self.life = np.zeros(capacity, np.int16)
+        self.damage = np.ones(capacity, np.uint8)
+        self.columns = (self.x, self.y, self.vx, self.vy, self.kind, self.pierce, self.life, self.damage)
+
+        # Brick rects as arrays, rebuilt when the layout changes
+        self.bricks_ref = None
+        self.bricks_version = None
+        self.brick_left = self.brick_top = self.brick_right = self.brick_bottom = None
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def add(self, x, y, vx, vy, kind=0, pierce=0, life=1800, damage=1):
+        """Append one ball (fixed-point position and velocity); returns its
+        slot or None when full"""
+        if self.count >= self.capacity:
+            return None
+        i = self.count
+        self.x[i], self.y[i], self.vx[i], self.vy[i] = x, y, vx, vy
+        self.kind[i], self.pierce[i], self.life[i], self.damage[i] = kind, pierce, life, damage
+        self.count += 1
+        return i
+
+    def convert(self, i, kind, pierce=0, life=1800, damage=1, speed=(1, 1)):
+        """Turn ball `i` into a special ball; `speed` scales its velocity as a
+        (numerator, denominator) ratio"""
+        self.kind[i] = kind
+        self.pierce[i] = pierce
+        self.life[i] = life
+        self.damage[i] = damage
+        self.vx[i] = scale(int(self.vx[i]), *speed)
+        self.vy[i] = scale(int(self.vy[i]), *speed)
+
+    def duplicate(self, limit=None):
+        """Give every ball a mirrored twin, up to `limit` balls in total"""
+        n = self.count
+        extra = min(n, (limit or self.capacity) - n, self.capacity - n)
+        if extra <= 0:
+            return 0
+        for column in self.columns:
+            column[n:n + extra] = column[:extra]
+        self.vx[n:n + extra] *= -1
+        self.count += extra
+        return extra
+
+    def speed_up(self, ratio):
+        n = self.count
+        self.vx[:n] = scale_array(self.vx[:n], *ratio)
+        self.vy[:n] = scale_array(self.vy[:n], *ratio)
+
+    def remove(self, dead):
+        """Swap-compact: fill each dead slot below the new count with a live
+        ball from the tail. `dead` is a boolean mask over the live slots."""
+        dead_slots = np.flatnonzero(dead)
+        if not len(dead_slots):
+            return
+        count = self.count - len(dead_slots)
+        holes = dead_slots[dead_slots < count]
+        movers = np.flatnonzero(~dead[count:]) + count
+        for column in self.columns:
+            column[holes] = column[movers]
+        self.count = count
+
+    def _brick_arrays(self, game):
+        bricks = game.bricks
+        if self.bricks_ref is not bricks or self.bricks_version != game.layout_version:
+            rects = np.array([tuple(brick.rect) for brick in bricks], dtype=np.int64).reshape(-1, 4)
+            self.brick_left = rects[:, 0]
+            self.brick_top = rects[:, 1]
+            self.brick_right = rects[:, 0] + rects[:, 2]
+            self.brick_bottom = rects[:, 1] + rects[:, 3]
+            self.bricks_ref = bricks
+            self.bricks_version = game.layout_version
+        return bricks
+
+    def _pierce_or_bounce(self, i):
+        """Same rule as Ball.can_pierce: fire balls pass through a few hits"""
+        if self.types[self.kind[i]] == "fire" and self.pierce[i] > 0:
+            self.pierce[i] -= 1
+        else:
+            self.vy[i] = -self.vy[i]
+
+    def update(self, game):
+        n = self.count
+        if not n:
+            return
+        size = self.size
+        x, y, vx, vy = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n]
+        kind, life, damage = self.kind[:n], self.life[:n], self.damage[:n]
+        budget = self.effect_budget
+
+        # Special balls run out; expired ones don't move this frame
+        special = kind != 0
+        life[special] -= 1
+        dead = special & (life <= 0)
+        alive = ~dead
+
+        x[alive] += vx[alive]
+        y[alive] += vy[alive]
+        # Whole-pixel positions, as a Ball's rect would have them
+        px, py = x >> FIXED_BITS, y >> FIXED_BITS
+        half = size // 2
+
+        # Walls
+        vx[alive & ((px <= 0) | (px + size >= self.screen_width))] *= -1
+        vy[alive & (py <= 0)] *= -1
+
+        # Paddle, with the classic hit-position angle
+        paddle = game.paddle.rect
+        on_paddle = (alive & (vy > 0) & (px < paddle.right) & (px + size > paddle.left)
+                     & (py < paddle.bottom) & (py + size > paddle.top))
+        if on_paddle.any():
+            vy[on_paddle] *= -1
+            offset = x[on_paddle] + (size << FIXED_BITS) // 2 - game.paddle.centre_x()
+            vx[on_paddle] = scale_array(offset, self.base_vx, paddle.width << FIXED_BITS)
+            for i in np.flatnonzero(on_paddle)[:budget]:
+                game.paddle_hit(int(px[i]) + half, int(py[i]) + half)
+                budget -= 1
+
+        # Boss
+        boss = game.boss_brick
+        if boss and not boss.destroyed:
+            rect = boss.rect
+            on_boss = (alive & (px < rect.right) & (px + size > rect.left)
+                       & (py < rect.bottom) & (py + size > rect.top))
+            for i in np.flatnonzero(on_boss):
+                if boss.destroyed:
+                    break
+                game.hit_boss(int(damage[i]), int(px[i]) + half, int(py[i]) + half, budget > 0)
+                budget -= 1
+                self._pierce_or_bounce(i)
+
+        # Bricks: vectorized overlap test, then resolve hits in ball order
+        bricks = self._brick_arrays(game)
+        if bricks:
+            overlap = ((px[:, None] < self.brick_right) & (px[:, None] + size > self.brick_left)
+                       & (py[:, None] < self.brick_bottom) & (py[:, None] + size > self.brick_top))
+            overlap &= alive[:, None]
+            overlap &= np.fromiter((not brick.destroyed for brick in bricks), bool, len(bricks))
+            for i in np.flatnonzero(overlap.any(axis=1)):
+                for j in np.flatnonzero(overlap[i]):
+                    brick = bricks[j]
+                    if brick.destroyed:
+                        continue  # Taken out earlier this frame
+                    game.hit_brick(brick, int(damage[i]), int(px[i]) + half, int(py[i]) + half, budget > 0)
+                    budget -= 1
+                    self._pierce_or_bounce(i)
+                    break
+
+        # Off the bottom
+        fallen = alive & (py + size >= self.screen_height)
+        for i in np.flatnonzero(fallen):
+            game.ball_lost(int(px[i]) + half)
+        dead |= fallen
+        self.remove(dead)
+
+    def states(self):
+        """Per-ball tuples in MEGA_BALL_STATE field order"""
+        n = self.count
+        return zip(self.x[:n].tolist(), self.y[:n].tolist(), self.vx[:n].tolist(), self.vy[:n].tolist(),
+                   self.kind[:n].tolist(), self.pierce[:n].tolist(), self.life[:n].tolist(),
+                   self.damage[:n].tolist())
+
+    def pack_into(self, buffer, offset):
+        """Write a MEGA_BALL_STATE record for every ball in one copy; returns
+        the end offset"""
+        n = self.count
+        records = np.empty(n, STATE_RECORD)
+        for name, column in zip(STATE_RECORD.names, self.columns):
+            records[name] = column[:n]
+        end = offset + records.nbytes
+        buffer[offset:end] = records.tobytes()
+        return end
+
+    def load_states(self, states):
+        self.count = 0
+        for state in states:
+            self.add(*state)
+
+    def entries(self):
+        """(x, y, vx, vy, kind) per ball for spectators: pixel position,
+        fixed-point velocity"""
+        n = self.count
+        return list(zip((self.x[:n] >> FIXED_BITS).tolist(), (self.y[:n] >> FIXED_BITS).tolist(),
+                        self.vx[:n].tolist(), self.vy[:n].tolist(), self.kind[:n].tolist()))
+
+    def type_counts(self):
+        """Number of live balls of each kind"""
+        return np.bincount(self.kind[:self.count], minlength=len(self.types))
+
+    def copy(self):
+        """Detached copy of the live balls for drawing on another thread"""
+        clone = BallSystem.__new__(BallSystem)
+        clone.__dict__.update(self.__dict__)
+        n = self.count
+        clone.capacity = n
+        clone.x, clone.y = self.x[:n].copy(), self.y[:n].copy()
+        clone.vx, clone.vy = self.vx[:n].copy(), self.vy[:n].copy()
+        clone.kind, clone.pierce = self.kind[:n].copy(), self.pierce[:n].copy()
+        clone.life, clone.damage = self.life[:n].copy(), self.damage[:n].copy()
+        clone.columns = (clone.x, clone.y, clone.vx, clone.vy, clone.kind, clone.pierce,
+                         clone.life, clone.damage)
+        return clone
+
+    def draw(self, canvas, atlas=None):
+        n = self.count
+        size = self.size
+        for x, y, kind in zip((self.x[:n] >> FIXED_BITS).tolist(), (self.y[:n] >> FIXED_BITS).tolist(),
+                              self.kind[:n].tolist()):
+            color = self.colors[kind]
+            if not (atlas and atlas.draw(canvas, ("ball", self.types[kind], color), (x, y))):
+                canvas.rect(color, (x, y, size, size))
@@ -2,6 +2,32 @@ import pygame
 import sys
 import random
 import math
+import time
+import struct
+import zlib
+import argparse
+
+from spectator import SpectatorServer
+from replay import ReplayWriter, ReplayReader
+from simulation import SimulationThread
+from render import create_canvas, DynamicResolution, ViewportCanvas, TextCache
+from atlas import SpriteAtlas
+from balls import BallSystem, np
+from projectiles import ProjectileStore, BossAttacks
+from controls import InputTracker, INPUT_MODES
+from pacing import FramePacer, PACING_STRATEGIES
+from telemetry import TelemetryRecorder
+from profiling import FrameProfiler, PROFILE_MODES
+from allocations import AllocationTracker
+from autopilot import Autopilot
+from scores import ScoreStore, default_path as default_scores_path
+from capture import FrameCapture, CAPTURE_FORMATS
+from fixed import Body, FIXED_BITS, to_fixed, scale
+from scheduler import FrameScheduler, LOW
+from levels import LevelGenerator, LevelPrefetcher
+from particles import ParticleField, draw_particle
+from digest import StateDigest
+from versus import UdpTransport, Handshake, RollbackSession, INPUT_KEYBOARD, DRAW
 
 # Initialize Pygame
 pygame.init()
@@ -22,6 +48,7 @@ PINK = (255, 192, 203)
 CYAN = (0, 255, 255)
 GOLD = (255, 215, 0)
 SILVER = (192, 192, 192)
+GRAY = (110, 110, 110)
 
 # Paddle settings
 PADDLE_WIDTH = 100
@@ -42,6 +69,103 @@ BRICK_COLS = 10
 # Power-up settings
 POWERUP_SIZE = 20
 POWERUP_SPEED = 3
+POWERUP_TYPES = ["wide_paddle", "narrow_paddle", "multi_ball", "extra_life",
+                 "fire_ball", "steel_ball", "lightning_ball", "shield"]
+
+# Sound effects: attribute prefix -> (frequency, seconds)
+SOUNDS = {"paddle_hit": (440, 0.1), "brick_hit": (880, 0.1), "powerup": (660, 0.2),
+          "game_over": (220, 0.5), "level_complete": (1320, 0.3), "boss_hit": (330, 0.2),
+          "boss_defeat": (1760, 0.5), "fireball": (800, 0.15)}
+
+# Explosions bigger than this are spread over the following frames
+EXPLOSION_SLICE = 10
+
+FONT_SIZES = (24, 36, 48, 72)  # Small, normal, large and title text
+PARTICLE_MODES = ["rects", "alpha", "additive"]  # Particle objects, or a NumPy field blended either way
+
+# Lookup tables used when saving game state
+GAME_STATES = ["start_screen", "playing", "paused", "game_over"]
+BALL_TYPES = ["normal", "fire", "steel", "lightning"]
+BALL_COLORS = [WHITE, RED, SILVER, YELLOW]
+PADDLE_POWERUPS = [None, "wide_paddle", "narrow_paddle"]
+
+# Velocity changes as integer ratios (see fixed.py)
+LEVEL_SPEEDUP = (11, 10)
+LIGHTNING_SPEEDUP = (3, 2)
+
+# Input bits sampled once per frame (see Game.sample_input)
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+
+MASK64 = (1 << 64) - 1
+
+# Endless mode has no last level; this only keeps the level inside its save field
+ENDLESS_MAX_LEVEL = 65535
+
+# Versus mode: garbage rows pushed onto a field, and how far down its bricks
+# may reach before the player is buried
+GARBAGE_GAP_CHANCE = 0.2
+GARBAGE_LIMIT = SCREEN_HEIGHT - 150
+LEVEL_SETS = ["classic", "endless"]
+
+# Mega multi-ball mode (see balls.py)
+MEGA_BALL_LIMIT = 1024
+PROJECTILE_LIMIT = 4096
+
+# Binary layouts for Game.save_state / Game.load_state
+STATE_VERSION = 3
+STATE_HEADER = struct.Struct("<BBHiiBBQI")    # version, state, level, score, lives, use_mouse, flags, rng, frame
+STATE_MEGA_BALLS = 1                           # flags bit: balls are stored as MEGA_BALL_STATE
+STATE_BULLET_HELL = 2                          # flags bit: boss attack state and projectile store follow
+STATE_COUNT = struct.Struct("<H")
+# Positions and velocities of moving objects are fixed point (see fixed.py)
+PADDLE_STATE = struct.Struct("<iiHHhhB")       # position, size, powerup timer, shield timer, powerup
+BALL_STATE = struct.Struct("<iiiiBBhBBBBB")    # position, velocity, type, pierce, life, damage, trail, color
+MEGA_BALL_STATE = struct.Struct("<iiiiBBhB")   # position, velocity, type, pierce, life, damage
+BOSS_ATTACK_STATE = struct.Struct("<BBHd")     # intensity, attack, timer, phase
+BRICK_STATE = struct.Struct("<hhHHBBBBBBBBB")  # rect, color, original color, destroyed, hits required/taken
+BOSS_STATE = struct.Struct("<hhHHhhbbhBBBB")   # rect, health, max health, speed, direction, shoot timer, destroyed, color
+PROJECTILE_STATE = struct.Struct("<iiii")      # position, velocity
+POWERUP_STATE = struct.Struct("<iiiBB")        # position, velocity, type, active
+DIGEST_CRC = struct.Struct("<I")               # state_digest: crc32 of the bricks section
+
+class GameRandom(random.Random):
+    """Gameplay RNG whose whole state is one 64-bit integer (splitmix64).
+
+    Cosmetic effects keep using the module-level random functions, so drawing
+    particles never shifts the sequence that decides power-ups. That keeps
+    replays deterministic and makes the RNG cheap to save.
+    """
+    def seed(self, a=None, version=2):
+        if a is None:
+            a = random.SystemRandom().getrandbits(64)
+        self.state = int(a) & MASK64
+        self.gauss_next = None
+    
+    def next64(self):
+        self.state = (self.state + 0x9E3779B97F4A7C15) & MASK64
+        z = self.state
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        return z ^ (z >> 31)
+    
+    def random(self):
+        return (self.next64() >> 11) * (1.0 / 9007199254740992.0)
+    
+    def getrandbits(self, k):
+        bits = 0
+        filled = 0
+        while filled < k:
+            bits |= self.next64() << filled
+            filled += 64
+        return bits & ((1 << k) - 1)
+    
+    def getstate(self):
+        return self.state
+    
+    def setstate(self, state):
+        self.state = state
+        self.gauss_next = None
 
 class Particle:
     """Individual particle for special effects"""
@@ -62,25 +186,53 @@ class Particle:
         self.life -= 1
         return self.life > 0
     
-    def draw(self, screen):
-        if self.life > 0:
-            # Fade out as particle dies
-            alpha = int(255 * (self.life / self.max_life))
-            current_size = max(1, int(self.size * (self.life / self.max_life)))
-            
-            # Create fading particle
-            particle_surface = pygame.Surface((current_size * 2, current_size * 2))
-            particle_surface.set_alpha(alpha)
-            particle_surface.fill(self.color)
-            screen.blit(particle_surface, (int(self.x - current_size), int(self.y - current_size)))
+    def draw(self, canvas):
+        # Fade out as particle dies
+        draw_particle(canvas, self.x, self.y, self.size, self.life, self.max_life, self.color)
 
 class ParticleSystem:
     """Manages all particle effects"""
-    def __init__(self):
+    def __init__(self, scheduler=None, mode="rects"):
         self.particles = []
+        self.scheduler = scheduler
+        self.field = None  # NumPy store in the alpha and additive modes (see particles.py)
+        self.set_mode(mode)
+    
+    def __len__(self):
+        return len(self.particles) + (len(self.field) if self.field is not None else 0)
+    
+    def set_mode(self, mode):
+        """Move the live particles to the store `mode` draws from"""
+        self.mode = mode
+        if mode == "rects":
+            if self.field is not None:
+                self.particles = self.field.to_particles(Particle)
+                self.field = None
+            return
+        if self.field is None:
+            self.field = ParticleField()
+            self.field.extend(self.particles)
+            self.particles = []
+        self.field.additive = mode == "additive"
     
     def add_explosion(self, x, y, color, count=20):
-        """Create explosion effect"""
+        """Create explosion effect; the rest of a big one follows over the
+        next few frames as a scheduler job"""
+        first = count if self.scheduler is None else min(count, EXPLOSION_SLICE)
+        self.explode(x, y, color, first)
+        if count > first:
+            self.scheduler.submit(self.explosion_job(x, y, color, count - first), LOW, 3, "explosion")
+    
+    def explosion_job(self, x, y, color, count):
+        while count > 0:
+            self.explode(x, y, color, min(count, EXPLOSION_SLICE))
+            count -= EXPLOSION_SLICE
+            yield
+    
+    def explode(self, x, y, color, count):
+        if self.field is not None:
+            self.field.burst(x, y, color, count, 8, 30, 90)
+            return
         for _ in range(count):
             velocity_x = random.uniform(-8, 8)
             velocity_y = random.uniform(-8, 8)
@@ -89,6 +241,9 @@ class ParticleSystem:
     
     def add_sparkle(self, x, y, color, count=5):
         """Create sparkle effect"""
+        if self.field is not None:
+            self.field.burst(x, y, color, count, 2, 20, 40)
+            return
         for _ in range(count):
             velocity_x = random.uniform(-2, 2)
             velocity_y = random.uniform(-2, 2)
@@ -97,46 +252,76 @@ class ParticleSystem:
     
     def add_trail(self, x, y, color):
         """Create trailing particle"""
+        if self.field is not None:
+            self.field.burst(x, y, color, 1, 1, 30, 30)
+            return
         velocity_x = random.uniform(-1, 1)
         velocity_y = random.uniform(-1, 1)
         self.particles.append(Particle(x, y, color, velocity_x, velocity_y, 30))
     
     def update(self):
         # Update all particles and remove dead ones
+        if self.field is not None:
+            self.field.update()
         self.particles = [p for p in self.particles if p.update()]
     
-    def draw(self, screen):
+    def draw(self, canvas):
+        if self.field is not None:
+            self.field.draw(canvas)
         for particle in self.particles:
-            particle.draw(screen)
+            particle.draw(canvas)
+
+class GameAssets:
+    """Fonts, synthesized sounds, sprite sheets and rendered text. Games
+    drawing to the same window can share one (tournament and versus modes);
+    a Game made without one gets its own."""
+    def __init__(self, brick_sheets=8):
+        self.fonts = {size: pygame.font.Font(None, size) for size in FONT_SIZES}
+        self.sounds = {}  # SOUNDS name -> Sound, filled in by whichever game synthesizes it first
+        self.atlas = SpriteAtlas()  # Sprites every level uses; built on the first draw
+        self.brick_sheets = {}  # frozenset of brick_kinds -> (uploaded image, entries)
+        self.brick_sheet_limit = brick_sheets
+        self.text_cache = TextCache()
+    
+    def find_brick_sheet(self, kinds):
+        """A sheet already uploaded that has every kind of brick in `kinds`"""
+        for sheet_kinds, sheet in self.brick_sheets.items():
+            if kinds <= sheet_kinds:
+                return sheet_kinds, sheet
+        return None
+    
+    def add_brick_sheet(self, kinds, atlas):
+        self.brick_sheets[frozenset(kinds)] = (atlas.image, atlas.entries)
+        if len(self.brick_sheets) > self.brick_sheet_limit:
+            del self.brick_sheets[next(iter(self.brick_sheets))]
 
 class SoundManager:
     """Handles all game sounds"""
-    def __init__(self):
+    def __init__(self, scheduler, sounds=None):
         self.sound_enabled = True
+        # Each sound is synthesized by a background task in the first frames
+        # and stays silent until then, unless another game sharing `sounds`
+        # has made it already
+        self.sounds = sounds if sounds is not None else {}
+        for name in SOUNDS:
+            setattr(self, name + "_sound", self.sounds.get(name))
+        for name in SOUNDS:
+            if name not in self.sounds:
+                scheduler.submit(lambda name=name: self.load_sound(name), LOW, 120, "sound")
+    
+    def load_sound(self, name):
+        if not self.sound_enabled:
+            return
         try:
-            # Try to create sounds - if it fails, disable sound
-            self.paddle_hit_sound = self.create_beep(440, 0.1)
-            self.brick_hit_sound = self.create_beep(880, 0.1)
-            self.powerup_sound = self.create_beep(660, 0.2)
-            self.game_over_sound = self.create_beep(220, 0.5)
-            self.level_complete_sound = self.create_beep(1320, 0.3)
-            self.boss_hit_sound = self.create_beep(330, 0.2)
-            self.boss_defeat_sound = self.create_beep(1760, 0.5)
-            self.fireball_sound = self.create_beep(800, 0.15)
-            print("Sound system initialized successfully!")
+            sound = self.sounds.get(name)
+            if sound is None:
+                frequency, duration = SOUNDS[name]
+                sound = self.sounds[name] = self.create_beep(frequency, duration)
+            setattr(self, name + "_sound", sound)
         except:
             # If sound creation fails, disable sound system
             self.sound_enabled = False
             print("Sound system disabled (NumPy not available - install with: pip install numpy)")
-            # Create dummy sound objects
-            self.paddle_hit_sound = None
-            self.brick_hit_sound = None
-            self.powerup_sound = None
-            self.game_over_sound = None
-            self.level_complete_sound = None
-            self.boss_hit_sound = None
-            self.boss_defeat_sound = None
-            self.fireball_sound = None
     
     def create_beep(self, frequency, duration):
         try:
@@ -193,21 +378,26 @@ class SoundManager:
         if self.sound_enabled and self.fireball_sound:
             self.fireball_sound.play()
 
-class Paddle:
+class Paddle(Body):
     def __init__(self, x, y):
-        self.rect = pygame.Rect(x, y, PADDLE_WIDTH, PADDLE_HEIGHT)
+        super().__init__(x, y, PADDLE_WIDTH, PADDLE_HEIGHT)
         self.normal_width = PADDLE_WIDTH
-        self.wide_width = PADDLE_WIDTH * 1.5
-        self.narrow_width = PADDLE_WIDTH * 0.7
+        self.wide_width = PADDLE_WIDTH * 3 // 2
+        self.narrow_width = PADDLE_WIDTH * 7 // 10
         self.powerup_timer = 0
         self.current_powerup = None
         self.shield_timer = 0  # Shield power-up
     
     def move(self, direction):
         if direction == "left" and self.rect.left > 0:
-            self.rect.x -= PADDLE_SPEED
+            self.place(self.x - to_fixed(PADDLE_SPEED), self.y)
         elif direction == "right" and self.rect.right < SCREEN_WIDTH:
-            self.rect.x += PADDLE_SPEED
+            self.place(self.x + to_fixed(PADDLE_SPEED), self.y)
+    
+    def move_to(self, centre_x):
+        """Centre on fixed-point x, kept on screen"""
+        x = centre_x - (self.rect.width << FIXED_BITS) // 2
+        self.place(max(0, min(x, to_fixed(SCREEN_WIDTH - self.rect.width))), self.y)
     
     def apply_powerup(self, powerup_type):
         if powerup_type == "shield":
@@ -216,56 +406,57 @@ class Paddle:
             self.current_powerup = powerup_type
             self.powerup_timer = 300
             
-            old_center = self.rect.centerx
             if powerup_type == "wide_paddle":
-                self.rect.width = self.wide_width
+                self.set_width(self.wide_width)
             elif powerup_type == "narrow_paddle":
-                self.rect.width = self.narrow_width
-            self.rect.centerx = old_center
+                self.set_width(self.narrow_width)
     
     def update(self):
         if self.powerup_timer > 0:
             self.powerup_timer -= 1
             if self.powerup_timer == 0:
-                old_center = self.rect.centerx
-                self.rect.width = self.normal_width
-                self.rect.centerx = old_center
+                self.set_width(self.normal_width)
                 self.current_powerup = None
         
         if self.shield_timer > 0:
             self.shield_timer -= 1
     
-    def draw(self, screen):
+    def sprite_key(self):
+        return ("paddle", self.current_powerup, self.rect.width)
+    
+    def draw_body(self, canvas):
         color = BLUE
         if self.current_powerup == "wide_paddle":
             color = GREEN
         elif self.current_powerup == "narrow_paddle":
             color = RED
         
-        pygame.draw.rect(screen, color, self.rect)
+        canvas.rect(color, self.rect)
+    
+    def draw(self, canvas, atlas=None):
+        if not (atlas and atlas.draw(canvas, self.sprite_key(), self.rect.topleft)):
+            self.draw_body(canvas)
         
         # Draw shield effect
         if self.shield_timer > 0:
             shield_rect = pygame.Rect(self.rect.x - 5, self.rect.y - 5, 
                                     self.rect.width + 10, self.rect.height + 10)
-            pygame.draw.rect(screen, CYAN, shield_rect, 3)
+            canvas.rect(CYAN, shield_rect, 3)
             
             # Shield timer indicator
             timer_width = (self.shield_timer / 600) * self.rect.width
             timer_rect = pygame.Rect(self.rect.x, self.rect.y - 8, timer_width, 2)
-            pygame.draw.rect(screen, CYAN, timer_rect)
+            canvas.rect(CYAN, timer_rect)
         
         # Power-up timer indicator
         if self.powerup_timer > 0:
             timer_width = (self.powerup_timer / 300) * self.rect.width
             timer_rect = pygame.Rect(self.rect.x, self.rect.y - 5, timer_width, 3)
-            pygame.draw.rect(screen, YELLOW, timer_rect)
+            canvas.rect(YELLOW, timer_rect)
 
-class Ball:
+class Ball(Body):
     def __init__(self, x, y, ball_type="normal"):
-        self.rect = pygame.Rect(x, y, BALL_SIZE, BALL_SIZE)
-        self.speed_x = BALL_SPEED_X
-        self.speed_y = BALL_SPEED_Y
+        super().__init__(x, y, BALL_SIZE, BALL_SIZE, BALL_SPEED_X, BALL_SPEED_Y)
         self.trail = []
         self.max_trail_length = 5
         self.ball_type = ball_type
@@ -282,9 +473,7 @@ class Ball:
             self.damage_multiplier = 2  # Deals double damage
         elif ball_type == "lightning":
             self.color = YELLOW
-            self.speed_multiplier = 1.5
-            self.speed_x *= self.speed_multiplier
-            self.speed_y *= self.speed_multiplier
+            self.speed_up(LIGHTNING_SPEEDUP)
         else:
             self.color = WHITE
             self.damage_multiplier = 1
@@ -301,19 +490,18 @@ class Ball:
         if len(self.trail) > self.max_trail_length:
             self.trail.pop(0)
         
-        self.rect.x += self.speed_x
-        self.rect.y += self.speed_y
+        self.step()
         return True
     
     def bounce_x(self):
-        self.speed_x = -self.speed_x
+        self.vx = -self.vx
     
     def bounce_y(self):
-        self.speed_y = -self.speed_y
+        self.vy = -self.vy
     
-    def speed_up(self):
-        self.speed_x *= 1.1
-        self.speed_y *= 1.1
+    def speed_up(self, ratio=LEVEL_SPEEDUP):
+        self.vx = scale(self.vx, *ratio)
+        self.vy = scale(self.vy, *ratio)
     
     def can_pierce(self):
         """Check if fire ball can pierce through bricks"""
@@ -322,25 +510,31 @@ class Ball:
             return True
         return False
     
-    def draw(self, screen):
-        # Draw trail with ball-specific color
-        for i, pos in enumerate(self.trail):
-            alpha = int(255 * (i + 1) / len(self.trail) * 0.5)
-            trail_surface = pygame.Surface((BALL_SIZE, BALL_SIZE))
-            trail_surface.set_alpha(alpha)
-            trail_surface.fill(self.color)
-            screen.blit(trail_surface, (pos[0] - BALL_SIZE//2, pos[1] - BALL_SIZE//2))
-        
+    def sprite_key(self):
+        return ("ball", self.ball_type, self.color)
+    
+    def draw_body(self, canvas):
         # Draw main ball
-        pygame.draw.rect(screen, self.color, self.rect)
+        canvas.rect(self.color, self.rect)
         
-        # Special effects for different ball types
         if self.ball_type == "fire":
             # Draw fire glow
             glow_rect = pygame.Rect(self.rect.x - 2, self.rect.y - 2, 
                                   BALL_SIZE + 4, BALL_SIZE + 4)
-            pygame.draw.rect(screen, ORANGE, glow_rect, 2)
-        elif self.ball_type == "lightning":
+            canvas.rect(ORANGE, glow_rect, 2)
+    
+    def draw(self, canvas, atlas=None):
+        # Draw trail with ball-specific color
+        for i, pos in enumerate(self.trail):
+            alpha = int(255 * (i + 1) / len(self.trail) * 0.5)
+            canvas.alpha_rect(self.color, (pos[0] - BALL_SIZE//2, pos[1] - BALL_SIZE//2,
+                                           BALL_SIZE, BALL_SIZE), alpha)
+        
+        if not (atlas and atlas.draw(canvas, self.sprite_key(), self.rect.topleft)):
+            self.draw_body(canvas)
+        
+        # Special effects for different ball types
+        if self.ball_type == "lightning":
             # Draw lightning effect
             if random.random() < 0.3:  # 30% chance per frame
                 for _ in range(3):
@@ -348,7 +542,7 @@ class Ball:
                     y1 = self.rect.centery + random.randint(-15, 15)
                     x2 = self.rect.centerx + random.randint(-15, 15)
                     y2 = self.rect.centery + random.randint(-15, 15)
-                    pygame.draw.line(screen, YELLOW, (x1, y1), (x2, y2), 2)
+                    canvas.line(YELLOW, (x1, y1), (x2, y2), 2)
 
 class Brick:
     def __init__(self, x, y, color, hits_required=1):
@@ -373,18 +567,25 @@ class Brick:
                          max(0, int(b * (1 - damage_factor * 0.7))))
             return False
     
-    def draw(self, screen):
+    def sprite_key(self):
+        return ("brick", self.original_color, self.hits_required, self.hits_taken)
+    
+    def draw_body(self, canvas):
+        canvas.rect(self.color, self.rect)
+        canvas.rect(BLACK, self.rect, 2)
+        
+        # Draw hit indicators
+        if self.hits_required > 1:
+            remaining_hits = self.hits_required - self.hits_taken
+            for i in range(remaining_hits):
+                dot_x = self.rect.x + 10 + i * 12
+                dot_y = self.rect.y + 5
+                canvas.circle(WHITE, (dot_x, dot_y), 2)
+    
+    def draw(self, canvas, atlas=None):
         if not self.destroyed:
-            pygame.draw.rect(screen, self.color, self.rect)
-            pygame.draw.rect(screen, BLACK, self.rect, 2)
-            
-            # Draw hit indicators
-            if self.hits_required > 1:
-                remaining_hits = self.hits_required - self.hits_taken
-                for i in range(remaining_hits):
-                    dot_x = self.rect.x + 10 + i * 12
-                    dot_y = self.rect.y + 5
-                    pygame.draw.circle(screen, WHITE, (dot_x, dot_y), 2)
+            if not (atlas and atlas.draw(canvas, self.sprite_key(), self.rect.topleft)):
+                self.draw_body(canvas)
 
 class BossBrick:
     """Special boss brick that moves and has lots of health"""
@@ -422,10 +623,25 @@ class BossBrick:
         self.color = (min(255, 128 + flash_intensity), 0, max(0, 128 - flash_intensity))
         return False
     
-    def draw(self, screen):
+    def sprite_key(self):
+        return ("boss", self.color)
+    
+    def draw_body(self, canvas):
+        canvas.rect(self.color, self.rect)
+        canvas.rect(BLACK, self.rect, 3)
+        
+        # Draw boss eyes
+        eye1 = (self.rect.x + 30, self.rect.y + 20)
+        eye2 = (self.rect.x + self.rect.width - 30, self.rect.y + 20)
+        canvas.circle(RED, eye1, 8)
+        canvas.circle(RED, eye2, 8)
+        canvas.circle(WHITE, eye1, 4)
+        canvas.circle(WHITE, eye2, 4)
+    
+    def draw(self, canvas, atlas=None):
         if not self.destroyed:
-            pygame.draw.rect(screen, self.color, self.rect)
-            pygame.draw.rect(screen, BLACK, self.rect, 3)
+            if not (atlas and atlas.draw(canvas, self.sprite_key(), self.rect.topleft)):
+                self.draw_body(canvas)
             
             # Draw health bar
             health_ratio = self.health / self.max_health
@@ -433,47 +649,45 @@ class BossBrick:
             health_rect = pygame.Rect(self.rect.x, self.rect.y - 10, health_width, 5)
             health_bg_rect = pygame.Rect(self.rect.x, self.rect.y - 10, self.rect.width, 5)
             
-            pygame.draw.rect(screen, RED, health_bg_rect)
-            pygame.draw.rect(screen, GREEN, health_rect)
-            
-            # Draw boss eyes
-            eye1 = (self.rect.x + 30, self.rect.y + 20)
-            eye2 = (self.rect.x + self.rect.width - 30, self.rect.y + 20)
-            pygame.draw.circle(screen, RED, eye1, 8)
-            pygame.draw.circle(screen, RED, eye2, 8)
-            pygame.draw.circle(screen, WHITE, eye1, 4)
-            pygame.draw.circle(screen, WHITE, eye2, 4)
+            canvas.rect(RED, health_bg_rect)
+            canvas.rect(GREEN, health_rect)
 
-class Projectile:
+class Projectile(Body):
     """Boss projectiles"""
     def __init__(self, x, y, target_x, target_y):
-        self.rect = pygame.Rect(x, y, 8, 8)
-        # Calculate direction towards target
+        super().__init__(x, y, 8, 8)
+        # Speed 4 towards the target, in integers: the distance is taken
+        # in fixed point so the unit vector keeps its sub-pixel part
         dx = target_x - x
         dy = target_y - y
-        distance = math.sqrt(dx*dx + dy*dy)
+        distance = math.isqrt((dx*dx + dy*dy) << (2 * FIXED_BITS))
         
         if distance > 0:
-            self.speed_x = (dx / distance) * 4
-            self.speed_y = (dy / distance) * 4
+            self.vx = scale(to_fixed(dx), to_fixed(4), distance)
+            self.vy = scale(to_fixed(dy), to_fixed(4), distance)
         else:
-            self.speed_x = 0
-            self.speed_y = 4
+            self.vx = 0
+            self.vy = to_fixed(4)
     
     def update(self):
-        self.rect.x += self.speed_x
-        self.rect.y += self.speed_y
+        self.step()
         return (0 <= self.rect.x <= SCREEN_WIDTH and 0 <= self.rect.y <= SCREEN_HEIGHT)
     
-    def draw(self, screen):
-        pygame.draw.rect(screen, ORANGE, self.rect)
-        pygame.draw.rect(screen, RED, self.rect, 2)
+    def sprite_key(self):
+        return ("projectile",)
+    
+    def draw_body(self, canvas):
+        canvas.rect(ORANGE, self.rect)
+        canvas.rect(RED, self.rect, 2)
+    
+    def draw(self, canvas, atlas=None):
+        if not (atlas and atlas.draw(canvas, self.sprite_key(), self.rect.topleft)):
+            self.draw_body(canvas)
 
-class PowerUp:
+class PowerUp(Body):
     def __init__(self, x, y, powerup_type):
-        self.rect = pygame.Rect(x, y, POWERUP_SIZE, POWERUP_SIZE)
+        super().__init__(x, y, POWERUP_SIZE, POWERUP_SIZE, 0, POWERUP_SPEED)
         self.type = powerup_type
-        self.speed = POWERUP_SPEED
         self.active = True
         
         self.colors = {
@@ -499,29 +713,117 @@ class PowerUp:
         }
     
     def move(self):
-        self.rect.y += self.speed
+        self.step()
         if self.rect.top > SCREEN_HEIGHT:
             self.active = False
     
-    def draw(self, screen, font):
+    def sprite_key(self):
+        return ("powerup", self.type)
+    
+    def draw_body(self, canvas, font):
+        color = self.colors.get(self.type, WHITE)
+        canvas.rect(color, self.rect)
+        canvas.rect(BLACK, self.rect, 2)
+        
+        symbol = self.symbols.get(self.type, "?")
+        canvas.text(font, symbol, BLACK, center=self.rect.center)
+    
+    def draw(self, canvas, font, atlas=None):
         if self.active:
-            color = self.colors.get(self.type, WHITE)
-            pygame.draw.rect(screen, color, self.rect)
-            pygame.draw.rect(screen, BLACK, self.rect, 2)
-            
-            symbol = self.symbols.get(self.type, "?")
-            text = font.render(symbol, True, BLACK)
-            text_rect = text.get_rect(center=self.rect.center)
-            screen.blit(text, text_rect)
+            if not (atlas and atlas.draw(canvas, self.sprite_key(), self.rect.topleft)):
+                self.draw_body(canvas, font)
+
+class RewindBuffer:
+    """Ring buffer of recent game snapshots for rewinding.
+    
+    Every slot is a bytearray that Game.snapshot_into overwrites in place,
+    so memory stays bounded at roughly slots * snapshot size. Slots start
+    empty and grow to the snapshot size the first time they are written, so
+    a game that never gets far (or one of several in a tournament) only pays
+    for the history it has.
+    """
+    def __init__(self, seconds=10, fps=60, interval=2):
+        self.fps = fps
+        self.interval = interval  # Capture every N frames
+        self.count = max(1, int(seconds * fps / interval))
+        self.slots = [bytearray() for _ in range(self.count)]
+        self.head = 0  # Next slot to overwrite
+        self.size = 0
+        self.ticks = 0
+    
+    def clear(self):
+        self.head = 0
+        self.size = 0
+    
+    def capture(self, game):
+        self.ticks += 1
+        if self.ticks % self.interval:
+            return
+        game.snapshot_into(self.slots[self.head])
+        self.head = (self.head + 1) % self.count
+        self.size = min(self.size + 1, self.count)
+    
+    def restore(self, game, seconds):
+        """Load the snapshot from `seconds` ago (or the oldest one we have)"""
+        if not self.size:
+            return False
+        steps = min(self.size, max(1, int(seconds * self.fps / self.interval)))
+        index = (self.head - steps) % self.count
+        game.load_state(self.slots[index])
+        # Forget the future we just rewound out of
+        self.head = index
+        self.size -= steps
+        return True
+
+def brick_kinds(bricks):
+    """(colour, hits required, size) of each kind of brick in a layout"""
+    return {(brick.original_color, brick.hits_required, brick.rect.size) for brick in bricks}
+
+def sprite_entry(entity, offset=(0, 0), *draw_args):
+    """Atlas entry that draws `entity` with its own draw_body"""
+    x, y, w, h = entity.rect
+    size = (w - 2 * offset[0], h - 2 * offset[1])
+    return (entity.sprite_key(), size, offset, lambda canvas: entity.draw_body(canvas, *draw_args))
 
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Ultimate Brick Breaker")
+    def __init__(self, seed=None, backend="surface", input_mode="direct", smoothing=0.3,
+                 pacing="sleep", fps=60, level_set="classic", window_size=None, fullscreen=False,
+                 scaling="scaled", render_scale=1.0, canvas=None, assets=None):
+        # Everything draws through self.canvas (see render.py). render_scale
+        # is a fraction of the logical resolution, or "dynamic" to start at
+        # full resolution and drop it whenever frames run over budget.
+        # Passing a canvas shares a window that's already open (versus and
+        # tournament modes), and passing assets shares fonts, sounds and
+        # sprites with the other games drawing to it
+        dynamic = render_scale == "dynamic" and canvas is None
+        self.canvas = canvas or create_canvas(backend, "Ultimate Brick Breaker", (SCREEN_WIDTH, SCREEN_HEIGHT),
+                                    vsync=pacing == "vsync", window_size=window_size,
+                                    fullscreen=fullscreen, scaling="transform" if dynamic else scaling,
+                                    render_scale=1.0 if dynamic else render_scale)
+        self.dynamic_resolution = None
+        if dynamic:
+            if hasattr(self.canvas, "set_scale"):
+                self.dynamic_resolution = DynamicResolution(self.canvas, 900.0 / fps)
+            else:
+                print("Dynamic resolution needs the surface backend; rendering at full resolution")
+        self.assets = assets or GameAssets()
+        if hasattr(self.canvas, "text_cache"):
+            self.canvas.text_cache = self.assets.text_cache
         self.clock = pygame.time.Clock()
         
-        self.sound_manager = SoundManager()
-        self.particle_system = ParticleSystem()
+        # Display frame pacing (see pacing.py); F3 shows its stats
+        if pacing == "vsync" and not getattr(self.canvas, "vsync", True):
+            print("VSync needs pygame.SCALED, which transform scaling doesn't use; pacing with sleep instead")
+            pacing = "sleep"
+        self.pacer = FramePacer(fps, pacing)
+        self.show_pacing = False
+        
+        # Deferred cosmetic work, drained in the frame's spare time (see scheduler.py)
+        self.scheduler = FrameScheduler()
+        
+        self.sound_manager = SoundManager(self.scheduler, self.assets.sounds)
+        self.particle_mode = "rects"  # F4 cycles through PARTICLE_MODES
+        self.particle_system = ParticleSystem(self.scheduler, self.particle_mode)
         
         # Game states
         self.game_state = "start_screen"  # start_screen, playing, paused, game_over
@@ -532,17 +834,55 @@ class Game:
         self.balls = []
         self.powerups = []
         self.boss_brick = None
+        
+        # Array-backed balls replace self.balls in mega multi-ball mode
+        self.ball_system = None
+        self.mega_start_balls = 0
         self.boss_projectiles = []
         
+        # Array-backed projectiles and attack patterns in bullet-hell mode
+        self.projectile_store = None
+        self.boss_attacks = None
+        
+        # Gameplay randomness comes from one seeded generator
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
+        self.rng = GameRandom(self.seed)
+        self.frame_count = 0
+        self.set_level_set(level_set)
+        
+        # The next level is built (and its brick sprites drawn) on a worker
+        # thread while the current one is played
+        self.level_prefetcher = LevelPrefetcher(self.prepare_level)
+        
+        # Sprites shared by every level, plus brick sprites for the current
+        # layout; layout_version is bumped whenever the bricks are replaced
+        self.layout_version = 0
+        self.atlas = self.assets.atlas
+        self.brick_atlas = SpriteAtlas()
+        self.prepared_sheet = None  # (layout version, sheet, entries) from the prefetcher
+        self.brick_atlas_kinds = set()
+        
+        # Snapshots: scratch buffer, rewind history and a checkpoint taken
+        # at the start of each boss level
+        self.snapshot_buffer = bytearray(4096)
+        self.digest_buffer = bytearray(4096)
+        self.digest_bricks = (None, 0)  # (layout version, brick count, total hits), crc
+        self.rewind_buffer = RewindBuffer()
+        self.checkpoint = bytearray(4096)
+        self.checkpoint_level = None
+        
         # Mouse control
         self.use_mouse = True
         self.mouse_sensitivity = 1.0
+        self.controls = InputTracker(input_mode, smoothing)
+        self.controls.to_logical = getattr(self.canvas, "to_logical", None)
         
         # Fonts
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
-        self.large_font = pygame.font.Font(None, 48)
-        self.title_font = pygame.font.Font(None, 72)
+        fonts = self.assets.fonts
+        self.font = fonts[36]
+        self.small_font = fonts[24]
+        self.large_font = fonts[48]
+        self.title_font = fonts[72]
         
         # Initialize game objects as None (will be created when game starts)
         #self.paddle = None#
@@ -550,39 +890,235 @@ class Game:
 
         self.bricks = []
         
+        # Optional remote viewers (see spectator.py)
+        self.spectator_server = None
+        
+        # Replay recording / playback (see replay.py)
+        self.recorder = None
+        self.replay_frames = None
+        self.replay_loaded = False  # Nothing a replay plays (or seeks through) reaches the scores
+        
+        # Per-frame metrics export (see telemetry.py)
+        self.telemetry = None
+        
+        # CPU profiling of update/draw (see profiling.py); F9 arms it
+        self.profiler = FrameProfiler()
+        
+        # tracemalloc instrumentation (see allocations.py)
+        self.allocations = None
+        
+        # Predictive paddle for unattended runs (see autopilot.py)
+        self.autopilot = None
+        
+        # Persistent high scores (see scores.py); H on the start screen
+        # shows the leaderboard
+        self.scores = None
+        self.show_leaderboard = False
+        
+        # Gameplay video capture (see capture.py); F10 pauses it
+        self.capture = None
+        self.leaderboard_lines = (None, [])  # (store version, formatted lines)
+        
         print(f"Game initialized with state: {self.game_state}")
 
+    def enable_mega_balls(self, start_balls=500):
+        """Switch to array-backed balls so hundreds can be in play at once"""
+        if np is None:
+            print("Mega multi-ball disabled (NumPy not available - install with: pip install numpy)")
+            return False
+        self.ball_system = BallSystem(MEGA_BALL_LIMIT, (SCREEN_WIDTH, SCREEN_HEIGHT), BALL_SIZE,
+                                      BALL_SPEED_X, BALL_TYPES, BALL_COLORS)
+        self.mega_start_balls = max(1, min(start_balls, MEGA_BALL_LIMIT))
+        self.balls = []
+        print(f"Mega multi-ball mode: {self.mega_start_balls} balls per serve")
+        return True
+    
+    def enable_bullet_hell(self):
+        """Give bosses dense spread, spiral and aimed-burst attacks"""
+        if np is None:
+            print("Bullet-hell bosses disabled (NumPy not available - install with: pip install numpy)")
+            return False
+        self.projectile_store = ProjectileStore(PROJECTILE_LIMIT, (SCREEN_WIDTH, SCREEN_HEIGHT), 8,
+                                                (ORANGE, RED))
+        self.boss_attacks = BossAttacks(self.projectile_store)
+        print("Bullet-hell boss mode")
+        return True
+    
+    def set_particle_mode(self, mode):
+        """Draw particles one rect at a time, or splat them all with NumPy"""
+        if mode not in PARTICLE_MODES:
+            raise ValueError(f"Unknown particle mode {mode!r}")
+        if mode != "rects" and np is None:
+            print("NumPy particles disabled (NumPy not available - install with: pip install numpy)")
+            return False
+        self.particle_mode = mode  # step() moves the particles over
+        return True
+    
+    def start_capture(self, prefix, fmt="png", slots=120):
+        """Copy every presented frame into a ring file for background encoding"""
+        surface = getattr(self.canvas, "display", None) or getattr(self.canvas, "surface", None)
+        if surface is None:
+            print("Frame capture needs the surface backend")
+            return False
+        self.capture = FrameCapture(surface, prefix, fmt, slots)
+        return True
+    
+    def start_score_store(self, path):
+        """Keep scores and level clears in a local SQLite database"""
+        self.scores = ScoreStore(path, self.level_set)
+    
+    def enable_autopilot(self):
+        """Let the paddle play itself, restarting after game over"""
+        self.autopilot = Autopilot(SCREEN_WIDTH, BALL_SIZE, PADDLE_SPEED, INPUT_LEFT, INPUT_RIGHT,
+                                   pygame.K_SPACE, pygame.K_r)
+        print("Autopilot on")
+    
+    def start_spectator_server(self, host="127.0.0.1", port=8765):
+        """Stream live game state to spectator clients"""
+        self.spectator_server = SpectatorServer(host, port)
+        self.spectator_server.start()
+    
+    def start_telemetry(self, prefix, fmt="jsonl", prom_path=None):
+        """Write per-frame metrics to rotating files from a background thread"""
+        self.telemetry = TelemetryRecorder(prefix, fmt, GAME_STATES, prom_path=prom_path)
+        self.telemetry.start()
+    
+    def record_telemetry(self, view, frame, frame_ms, update_ms, draw_ms):
+        """Sample one frame's metrics from the live game or a RenderFrame"""
+        balls = len(view.balls)
+        if view.ball_system is not None:
+            balls += len(view.ball_system)
+        self.telemetry.record(frame, frame_ms, update_ms, draw_ms,
+                              len(view.particle_system),
+                              sum(1 for brick in view.bricks if not brick.destroyed),
+                              balls, self.projectile_count(view), len(view.powerups),
+                              view.level, GAME_STATES.index(view.game_state))
+    
+    def start_allocation_tracking(self, window=60):
+        """Attribute Python allocations to subsystems every `window` frames"""
+        modules = [sys.modules[name] for name in (type(self).__module__, "balls", "projectiles", "simulation")]
+        self.allocations = AllocationTracker(modules, window)
+        self.allocations.start()
+    
+    def start_recording(self, path):
+        """Record every frame from now on into a replay file"""
+        self.recorder = ReplayWriter(path, self.seed, self.level_set)
+        print(f"Recording replay to {path}")
+    
+    def start_playback(self, path, frame=0):
+        """Play back a replay file, optionally starting part way through"""
+        reader = ReplayReader(path)
+        # Level layouts come from the recording's seed and level set
+        self.seed = reader.seed
+        self.set_level_set(reader.level_set)
+        self.replay_loaded = True
+        reader.seek(self, frame)
+        self.replay_frames = reader.play(self, start=frame)
+        print(f"Playing replay {path} from frame {frame}")
+
     def start_game(self):
         """Initialize game for playing"""
         self.game_state = "playing"
         self.level = 1
         self.score = 0
         self.lives = 3
-        self.particle_system = ParticleSystem()
+        self.particle_system = ParticleSystem(self.scheduler, self.particle_mode)
         self.paddle = Paddle(SCREEN_WIDTH // 2 - PADDLE_WIDTH // 2, SCREEN_HEIGHT - 50)
+        self.rewind_buffer.clear()
+        self.checkpoint_level = None
         self.reset_level()
     
-    def is_boss_level(self):
-        return self.level % 3 == 0 and self.level <= 6  # Boss on levels 3, 6
+    def set_level_set(self, level_set):
+        """Choose between the seven classic levels and endless generated ones"""
+        if level_set not in LEVEL_SETS:
+            raise ValueError(f"Unknown level set {level_set!r}")
+        self.level_set = level_set
+        self.max_level = ENDLESS_MAX_LEVEL if level_set == "endless" else 7
+        if getattr(self, "scores", None) is not None:
+            self.scores.set_level_set(level_set)
+    
+    def is_boss_level(self, level=None, level_set=None):
+        level = self.level if level is None else level
+        if (level_set or self.level_set) == "endless":
+            return level % 3 == 0
+        return level % 3 == 0 and level <= 6  # Boss on levels 3, 6
+    
+    def serve_balls(self):
+        """Put a fresh ball (or a fan of them in mega mode) into play"""
+        if self.ball_system is None:
+            self.balls = [Ball(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)]
+            return
+        # Fan out from the classic serve direction, no randomness needed
+        self.ball_system.clear()
+        count = self.mega_start_balls
+        for i in range(count):
+            spread = scale(to_fixed(BALL_SPEED_X), count - 2 * i, count)
+            self.ball_system.add(to_fixed(SCREEN_WIDTH // 2), to_fixed(SCREEN_HEIGHT // 2), spread,
+                                 to_fixed(BALL_SPEED_Y))
+    
+    def projectile_count(self, view=None):
+        view = view or self
+        if view.projectile_store is not None:
+            return len(view.boss_projectiles) + len(view.projectile_store)
+        return len(view.boss_projectiles)
+    
+    def ball_count(self):
+        if self.ball_system is not None:
+            return len(self.ball_system)
+        return len(self.balls)
     
     def reset_level(self):
         self.paddle = Paddle(SCREEN_WIDTH // 2 - PADDLE_WIDTH // 2, SCREEN_HEIGHT - 50)
-        self.balls = [Ball(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)]
+        self.serve_balls()
         self.powerups = []
-        self.bricks = []
         self.boss_brick = None
         self.boss_projectiles = []
+        if self.projectile_store is not None:
+            self.projectile_store.clear()
+        self.layout_version += 1
+        
+        # Use the prefetched level if it's ready; building it here gives the
+        # same layout, just not for free
+        key = (self.level_set, self.seed, self.level)
+        prepared = self.level_prefetcher.take(key)
+        if prepared is None:
+            prepared = self.prepare_level(key, render=False)
+        self.bricks, boss_health, sheet = prepared
+        if sheet is not None:
+            self.prepared_sheet = (self.layout_version,) + sheet
         
         if self.is_boss_level():
-            self.create_boss_level()
+            self.boss_brick = BossBrick(SCREEN_WIDTH // 2 - (BRICK_WIDTH * 3) // 2, 100)
+            self.boss_brick.max_health = self.boss_brick.health = boss_health
+            if self.boss_attacks is not None:
+                self.boss_attacks.reset(min(4, self.level // 3))
+        
+        if self.level < self.max_level:
+            self.level_prefetcher.request((self.level_set, self.seed, self.level + 1))
+    
+    def prepare_level(self, key, render=True):
+        """Build the bricks for (level set, seed, level) and optionally draw
+        their sprites; safe to run on the prefetch thread.
+        
+        Returns (bricks, boss health, (sheet, entries) or None).
+        """
+        level_set, seed, level = key
+        bricks = []
+        boss_health = BossBrick(0, 0).max_health
+        if level_set == "endless":
+            generator = LevelGenerator(seed, (BRICK_WIDTH, BRICK_HEIGHT), [RED, ORANGE, YELLOW, GREEN, PURPLE])
+            bricks = [Brick(x, y, color, hits) for x, y, color, hits in generator.layout(level)]
+            if generator.is_boss_level(level):
+                boss_health = generator.boss_health(level)
+        elif self.is_boss_level(level, level_set):
+            self.create_boss_level(bricks)
         else:
-            self.create_bricks()
+            self.create_bricks(bricks, level)
+        sheet = self.brick_atlas.render(self.brick_sprites(bricks)) if render else None
+        return bricks, boss_health, sheet
     
-    def create_boss_level(self):
-        """Create boss level with boss brick and support bricks"""
-        # Create boss
-        self.boss_brick = BossBrick(SCREEN_WIDTH // 2 - (BRICK_WIDTH * 3) // 2, 100)
-        
+    def create_boss_level(self, bricks):
+        """Create the support bricks around the boss"""
         # Create some support bricks
         colors = [RED, ORANGE, YELLOW, GREEN]
         for row in range(2):
@@ -592,29 +1128,29 @@ class Game:
                     y = row * (BRICK_HEIGHT + 10) + 250
                     color = colors[row % len(colors)]
                     hits = 3 if row == 0 else 2
-                    self.bricks.append(Brick(x, y, color, hits))
+                    bricks.append(Brick(x, y, color, hits))
     
-    def create_bricks(self):
+    def create_bricks(self, bricks, level):
         colors = [RED, ORANGE, YELLOW, GREEN, PURPLE]
         
-        if self.level == 1:
+        if level == 1:
             for row in range(5):
                 for col in range(10):
                     x = col * (BRICK_WIDTH + 5) + 35
                     y = row * (BRICK_HEIGHT + 5) + 50
                     color = colors[row % len(colors)]
-                    self.bricks.append(Brick(x, y, color, 1))
+                    bricks.append(Brick(x, y, color, 1))
         
-        elif self.level == 2:
+        elif level == 2:
             for row in range(5):
                 for col in range(10):
                     x = col * (BRICK_WIDTH + 5) + 35
                     y = row * (BRICK_HEIGHT + 5) + 50
                     color = colors[row % len(colors)]
                     hits = 2 if row < 2 else 1
-                    self.bricks.append(Brick(x, y, color, hits))
+                    bricks.append(Brick(x, y, color, hits))
         
-        elif self.level == 4:
+        elif level == 4:
             # After first boss - harder level
             for row in range(6):
                 for col in range(10):
@@ -623,9 +1159,9 @@ class Game:
                         y = row * (BRICK_HEIGHT + 5) + 50
                         color = colors[row % len(colors)]
                         hits = min(4, row + 1)
-                        self.bricks.append(Brick(x, y, color, hits))
+                        bricks.append(Brick(x, y, color, hits))
         
-        elif self.level == 5:
+        elif level == 5:
             # Diamond pattern
             for row in range(7):
                 for col in range(10):
@@ -635,7 +1171,7 @@ class Game:
                         y = row * (BRICK_HEIGHT + 5) + 50
                         color = colors[row % len(colors)]
                         hits = 5 if abs(row - center_row) + abs(col - center_col) <= 1 else 3
-                        self.bricks.append(Brick(x, y, color, hits))
+                        bricks.append(Brick(x, y, color, hits))
         
         else:  # Level 7+
             for row in range(8):
@@ -644,50 +1180,98 @@ class Game:
                     y = row * (BRICK_HEIGHT + 5) + 50
                     color = colors[row % len(colors)]
                     hits = min(6, row + 2)
-                    self.bricks.append(Brick(x, y, color, hits))
+                    bricks.append(Brick(x, y, color, hits))
     
     def spawn_powerup(self, x, y):
-        if random.random() < 0.2:  # 20% chance
-            powerup_types = ["wide_paddle", "narrow_paddle", "multi_ball", "extra_life", 
-                           "fire_ball", "steel_ball", "lightning_ball", "shield"]
+        if self.rng.random() < 0.2:  # 20% chance
+            powerup_types = POWERUP_TYPES
             # Boss levels have better power-ups
             if self.is_boss_level():
                 powerup_types = ["fire_ball", "steel_ball", "lightning_ball", "shield", "extra_life"]
             
-            powerup_type = random.choice(powerup_types)
+            powerup_type = self.rng.choice(powerup_types)
             self.powerups.append(PowerUp(x, y, powerup_type))
     
-    def handle_input(self):
+    def sample_input(self):
+        """Read the live mouse/keyboard state as a (mouse_x, input bits) pair"""
+        keys = pygame.key.get_pressed()
+        bits = 0
+        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+            bits |= INPUT_LEFT
+        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+            bits |= INPUT_RIGHT
+        return self.controls.sample_x(), bits
+    
+    def handle_input(self, frame_input):
         # Only handle input if paddle exists
         if not self.paddle:
             return
             
-        keys = pygame.key.get_pressed()
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_x, bits = frame_input
         
         if self.use_mouse:
-            # Mouse control - paddle follows mouse X position
-            target_x = mouse_pos[0] - self.paddle.rect.width // 2
-            # Smooth movement towards mouse position
-            diff = target_x - self.paddle.rect.x
-            if abs(diff) > 2:  # Dead zone to prevent jittering
-                self.paddle.rect.x += diff * 0.3  # Smooth interpolation
-            
-            # Keep paddle on screen
-            if self.paddle.rect.left < 0:
-                self.paddle.rect.left = 0
-            elif self.paddle.rect.right > SCREEN_WIDTH:
-                self.paddle.rect.right = SCREEN_WIDTH
+            # Mouse control - paddle centres on the sampled X position (fixed
+            # point), which the input tracker has already smoothed if that
+            # mode is on
+            self.paddle.move_to(mouse_x)
         else:
             # Keyboard control
-            if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+            if bits & INPUT_LEFT:
                 self.paddle.move("left")
-            if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+            if bits & INPUT_RIGHT:
                 self.paddle.move("right")
+    
+    def handle_keydown(self, key):
+        if self.game_state == "start_screen":
+            if key == pygame.K_SPACE:
+                self.start_game()
         
-        # Toggle control method
-        if keys[pygame.K_TAB]:
-            self.use_mouse = not self.use_mouse
+        elif self.game_state == "playing":
+            if key == pygame.K_ESCAPE:
+                self.game_state = "paused"
+            elif key == pygame.K_TAB:
+                # Toggle control method once per press, not every frame it's held
+                self.use_mouse = not self.use_mouse
+            elif key == pygame.K_r:
+                if (self.lives <= 0 or self.level > self.max_level or 
+                    (all(brick.destroyed for brick in self.bricks) and 
+                     (not self.boss_brick or self.boss_brick.destroyed))):
+                    self.reset_game()
+        
+        elif self.game_state == "paused":
+            if key == pygame.K_ESCAPE:
+                self.game_state = "playing"
+            elif key == pygame.K_r:
+                self.reset_game()
+    
+    def step(self, frame_input, key_events=()):
+        """Advance one frame from recorded or live input; no drawing"""
+        self.profiler.frame(self.frame_count)
+        if self.particle_system.mode != self.particle_mode:
+            # Switched from the display side; converted on the thread that
+            # owns the particles
+            self.particle_system.set_mode(self.particle_mode)
+        for key in key_events:
+            self.handle_keydown(key)
+        
+        # Update game logic only when playing
+        if self.game_state == "playing" and self.lives > 0 and self.level <= self.max_level:
+            level = self.level
+            self.handle_input(frame_input)
+            self.profiler.enter()
+            self.update()
+            self.profiler.exit()
+            if self.scores is not None and not self.replay_loaded:
+                self.record_progress(level)
+        self.frame_count += 1
+    
+    def record_progress(self, level_before):
+        """Queue level clears and final scores; the writes happen off-thread"""
+        if self.level > level_before:
+            self.scores.add_level(level_before, self.level_set, self.score, self.frame_count)
+        if self.lives <= 0 or self.level > self.max_level:
+            self.scores.add_score(self.score, min(self.level, self.max_level), self.level_set,
+                                  self.seed, self.frame_count)
     
     def update(self):
         # Update particle system
@@ -698,7 +1282,13 @@ class Game:
         
         # Update boss
         if self.boss_brick and not self.boss_brick.destroyed:
-            if self.boss_brick.update():
+            if self.boss_attacks is not None:
+                # Attack patterns replace the single aimed shot
+                if self.boss_brick.update():
+                    self.boss_brick.reset_shoot_timer()
+                if self.boss_attacks.update(self.boss_brick.rect, self.paddle.rect, self.rng):
+                    self.sound_manager.play_fireball()
+            elif self.boss_brick.update():
                 # Boss shoots at paddle
                 self.boss_projectiles.append(Projectile(
                     self.boss_brick.rect.centerx, 
@@ -721,7 +1311,21 @@ class Game:
                     self.particle_system.add_sparkle(projectile.rect.centerx, projectile.rect.centery, CYAN, 10)
                 self.boss_projectiles.remove(projectile)
         
+        if self.projectile_store is not None:
+            hits = self.projectile_store.update(self.paddle.rect)
+            if hits:
+                # However many land in one frame, they cost one life
+                if self.paddle.shield_timer <= 0:
+                    self.lives -= 1
+                    self.particle_system.add_explosion(hits[0][0], hits[0][1], RED, 15)
+                else:
+                    for x, y in hits[:4]:
+                        self.particle_system.add_sparkle(x, y, CYAN, 10)
+        
         # Update balls
+        if self.ball_system is not None:
+            self.ball_system.update(self)
+        
         for ball in self.balls[:]:
             if not ball.move():
                 self.balls.remove(ball)  # Remove expired special balls
@@ -738,52 +1342,37 @@ class Game:
                 ball.bounce_y()
             
             # Ball collision with paddle
-            if ball.rect.colliderect(self.paddle.rect) and ball.speed_y > 0:
+            if ball.rect.colliderect(self.paddle.rect) and ball.vy > 0:
                 ball.bounce_y()
-                hit_pos = (ball.rect.centerx - self.paddle.rect.centerx) / (self.paddle.rect.width / 2)
-                ball.speed_x = BALL_SPEED_X * hit_pos * 0.5
-                self.sound_manager.play_paddle_hit()
-                self.particle_system.add_sparkle(ball.rect.centerx, ball.rect.centery, WHITE, 5)
+                # Half the serve speed at the paddle's edge, less towards its centre
+                ball.vx = scale(ball.centre_x() - self.paddle.centre_x(), to_fixed(BALL_SPEED_X),
+                                to_fixed(self.paddle.rect.width))
+                self.paddle_hit(ball.rect.centerx, ball.rect.centery)
             
             # Ball collision with boss
             if self.boss_brick and not self.boss_brick.destroyed and ball.rect.colliderect(self.boss_brick.rect):
-                damage = getattr(ball, 'damage_multiplier', 1)
-                if self.boss_brick.hit(damage):
-                    self.score += 500
-                    self.particle_system.add_explosion(self.boss_brick.rect.centerx, self.boss_brick.rect.centery, PURPLE, 30)
-                    self.sound_manager.play_boss_defeat()
-                else:
-                    self.sound_manager.play_boss_hit()
-                    self.particle_system.add_sparkle(ball.rect.centerx, ball.rect.centery, PURPLE, 8)
-                
+                self.hit_boss(getattr(ball, 'damage_multiplier', 1), ball.rect.centerx, ball.rect.centery)
                 if not ball.can_pierce():
                     ball.bounce_y()
             
             # Ball collision with bricks
             for brick in self.bricks:
                 if not brick.destroyed and ball.rect.colliderect(brick.rect):
-                    damage = getattr(ball, 'damage_multiplier', 1)
-                    if brick.hit(damage):
-                        self.score += 10 * self.level
-                        self.spawn_powerup(brick.rect.centerx, brick.rect.centery)
-                        self.particle_system.add_explosion(brick.rect.centerx, brick.rect.centery, brick.color, 15)
-                    else:
-                        self.particle_system.add_sparkle(ball.rect.centerx, ball.rect.centery, brick.color, 5)
-                    
+                    self.hit_brick(brick, getattr(ball, 'damage_multiplier', 1), ball.rect.centerx, ball.rect.centery)
                     if not ball.can_pierce():
                         ball.bounce_y()
-                    self.sound_manager.play_brick_hit()
                     break
             
             # Remove ball if it falls off bottom
             if ball.rect.bottom >= SCREEN_HEIGHT:
                 self.balls.remove(ball)
+                self.ball_lost(ball.rect.centerx)
         
         # Check if all balls are gone
-        if not self.balls:
+        if not self.ball_count():
             self.lives -= 1
             if self.lives > 0:
-                self.balls = [Ball(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)]
+                self.serve_balls()
             else:
                 self.sound_manager.play_game_over()
         
@@ -810,16 +1399,66 @@ class Game:
                 # Speed up balls slightly each level
                 for ball in self.balls:
                     ball.speed_up()
+                if self.ball_system is not None:
+                    self.ball_system.speed_up(LEVEL_SPEEDUP)
+    
+    def ball_lost(self, x):
+        """A ball fell off the bottom at `x`; nothing to do in game, but replay
+        analytics listens here"""
     
+    def paddle_hit(self, x, y):
+        self.sound_manager.play_paddle_hit()
+        self.particle_system.add_sparkle(x, y, WHITE, 5)
+    
+    def hit_boss(self, damage, x, y, effects=True):
+        """Apply one ball hit to the boss; `effects` False skips the sparkle and sound"""
+        if self.boss_brick.hit(damage):
+            self.score += 500
+            self.particle_system.add_explosion(self.boss_brick.rect.centerx, self.boss_brick.rect.centery, PURPLE, 30)
+            self.sound_manager.play_boss_defeat()
+        elif effects:
+            self.sound_manager.play_boss_hit()
+            self.particle_system.add_sparkle(x, y, PURPLE, 8)
+    
+    def hit_brick(self, brick, damage, x, y, effects=True):
+        """Apply one ball hit to a brick; `effects` False skips the sparkle and sound"""
+        if brick.hit(damage):
+            self.score += 10 * self.level
+            self.spawn_powerup(brick.rect.centerx, brick.rect.centery)
+            self.particle_system.add_explosion(brick.rect.centerx, brick.rect.centery, brick.color, 15)
+        elif effects:
+            self.particle_system.add_sparkle(x, y, brick.color, 5)
+        if effects:
+            self.sound_manager.play_brick_hit()
+
+    def add_garbage_rows(self, rows):
+        """Versus mode: push the bricks down and fill the top with `rows` rows
+        of one-hit garbage, with random gaps. Bricks pushed down past
+        GARBAGE_LIMIT bury the player."""
+        step = BRICK_HEIGHT + 5
+        for brick in self.bricks:
+            brick.rect.y += rows * step
+        for row in range(rows):
+            for col in range(BRICK_COLS):
+                if self.rng.random() >= GARBAGE_GAP_CHANCE:
+                    self.bricks.append(Brick(col * (BRICK_WIDTH + 5) + 35, row * step + 50, GRAY, 1))
+        self.layout_version += 1
+        if any(brick.rect.bottom > GARBAGE_LIMIT for brick in self.bricks if not brick.destroyed):
+            self.lives = 0
+            self.sound_manager.play_game_over()
+
     def apply_powerup(self, powerup_type):
         if powerup_type in ["wide_paddle", "narrow_paddle", "shield"]:
             self.paddle.apply_powerup(powerup_type)
+        elif self.ball_system is not None and powerup_type != "extra_life":
+            self.apply_mega_powerup(powerup_type)
         elif powerup_type == "multi_ball" and len(self.balls) < 4:
             # Add extra balls
             for ball in self.balls[:]:
-                new_ball = Ball(ball.rect.x, ball.rect.y, ball.ball_type)
-                new_ball.speed_x = -ball.speed_x
-                new_ball.speed_y = ball.speed_y
+                new_ball = Ball(0, 0, ball.ball_type)
+                new_ball.place(ball.x, ball.y)
+                new_ball.vx = -ball.vx
+                new_ball.vy = ball.vy
                 self.balls.append(new_ball)
                 break
         elif powerup_type == "extra_life":
@@ -827,7 +1466,7 @@ class Game:
         elif powerup_type == "fire_ball":
             # Convert random ball to fire ball
             if self.balls:
-                ball = random.choice(self.balls)
+                ball = self.rng.choice(self.balls)
                 ball.ball_type = "fire"
                 ball.pierce_count = 3
                 ball.color = RED
@@ -836,7 +1475,7 @@ class Game:
         elif powerup_type == "steel_ball":
             # Convert random ball to steel ball
             if self.balls:
-                ball = random.choice(self.balls)
+                ball = self.rng.choice(self.balls)
                 ball.ball_type = "steel"
                 ball.color = SILVER
                 ball.damage_multiplier = 2
@@ -844,17 +1483,32 @@ class Game:
         elif powerup_type == "lightning_ball":
             # Convert random ball to lightning ball
             if self.balls:
-                ball = random.choice(self.balls)
+                ball = self.rng.choice(self.balls)
                 ball.ball_type = "lightning"
                 ball.color = YELLOW
-                ball.speed_multiplier = 1.5
-                ball.speed_x *= ball.speed_multiplier
-                ball.speed_y *= ball.speed_multiplier
+                ball.speed_up(LIGHTNING_SPEEDUP)
                 ball.life_timer = 900
     
+    def apply_mega_powerup(self, powerup_type):
+        """Ball power-ups in mega mode: multi-ball doubles, the rest convert one ball"""
+        system = self.ball_system
+        if not len(system):
+            return
+        if powerup_type == "multi_ball":
+            system.duplicate(MEGA_BALL_LIMIT)
+            return
+        i = self.rng.randrange(len(system))
+        if powerup_type == "fire_ball":
+            system.convert(i, BALL_TYPES.index("fire"), pierce=3, life=1800)
+        elif powerup_type == "steel_ball":
+            system.convert(i, BALL_TYPES.index("steel"), damage=2, life=1200)
+        elif powerup_type == "lightning_ball":
+            system.convert(i, BALL_TYPES.index("lightning"), life=900, speed=LIGHTNING_SPEEDUP)
+    
     def draw_start_screen(self):
         """Draw the start screen with instructions"""
-        self.screen.fill(BLACK)
+        canvas = self.canvas
+        canvas.fill(BLACK)
         
         # Animated background particles
         for _ in range(50):
@@ -863,28 +1517,19 @@ class Game:
             color = random.choice([BLUE, GREEN, YELLOW, PURPLE, CYAN])
             alpha = random.randint(30, 100)
             size = random.randint(1, 3)
-            
-            particle_surface = pygame.Surface((size * 2, size * 2))
-            particle_surface.set_alpha(alpha)
-            particle_surface.fill(color)
-            self.screen.blit(particle_surface, (x - size, y - size))
+            canvas.alpha_rect(color, (x - size, y - size, size * 2, size * 2), alpha)
         
         # Title
-        title_text = self.title_font.render("ULTIMATE BRICK BREAKER", True, GOLD)
-        title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 80))
-        self.screen.blit(title_text, title_rect)
+        canvas.text(self.title_font, "ULTIMATE BRICK BREAKER", GOLD, center=(SCREEN_WIDTH // 2, 80))
         
         # Subtitle
-        subtitle_text = self.font.render("The Most Advanced Brick Breaker Ever!", True, WHITE)
-        subtitle_rect = subtitle_text.get_rect(center=(SCREEN_WIDTH // 2, 130))
-        self.screen.blit(subtitle_text, subtitle_rect)
+        canvas.text(self.font, "The Most Advanced Brick Breaker Ever!", WHITE, center=(SCREEN_WIDTH // 2, 130))
         
         # Instructions sections
         y_start = 180
         
         # Controls section
-        controls_title = self.font.render("CONTROLS:", True, CYAN)
-        self.screen.blit(controls_title, (50, y_start))
+        canvas.text(self.font, "CONTROLS:", CYAN, (50, y_start))
         y_start += 35
         
         controls = [
@@ -896,15 +1541,13 @@ class Game:
         ]
         
         for control in controls:
-            text = self.small_font.render(control, True, WHITE)
-            self.screen.blit(text, (70, y_start))
+            canvas.text(self.small_font, control, WHITE, (70, y_start))
             y_start += 20
         
         y_start += 15
         
         # Power-ups section
-        powerups_title = self.font.render("POWER-UPS:", True, GREEN)
-        self.screen.blit(powerups_title, (50, y_start))
+        canvas.text(self.font, "POWER-UPS:", GREEN, (50, y_start))
         y_start += 35
         
         powerups = [
@@ -919,13 +1562,11 @@ class Game:
         ]
         
         for powerup in powerups:
-            text = self.small_font.render(powerup, True, WHITE)
-            self.screen.blit(text, (70, y_start))
+            canvas.text(self.small_font, powerup, WHITE, (70, y_start))
             y_start += 20
         
         # Game features section
-        features_title = self.font.render("SPECIAL FEATURES:", True, PURPLE)
-        self.screen.blit(features_title, (SCREEN_WIDTH // 2 + 50, 180))
+        canvas.text(self.font, "SPECIAL FEATURES:", PURPLE, (SCREEN_WIDTH // 2 + 50, 180))
         
         features = [
             "★ 7 Challenging Levels",
@@ -940,405 +1581,1113 @@ class Game:
         
         y_pos = 215
         for feature in features:
-            text = self.small_font.render(feature, True, WHITE)
-            self.screen.blit(text, (SCREEN_WIDTH // 2 + 70, y_pos))
+            canvas.text(self.small_font, feature, WHITE, (SCREEN_WIDTH // 2 + 70, y_pos))
             y_pos += 20
         
         # Sound note
-        sound_status = "Sound: " + ("Enabled" if self.sound_manager.sound_enabled else "Disabled (install numpy for audio)")
-        sound_note = self.small_font.render(sound_status, True, GREEN if self.sound_manager.sound_enabled else YELLOW)
-        self.screen.blit(sound_note, (SCREEN_WIDTH // 2 + 70, y_pos + 10))
-        
-        # Start instructions
-        start_text = self.large_font.render("Press SPACE to Start!", True, GOLD)
+        enabled = self.sound_manager.sound_enabled
+        sound_status = "Sound: " + ("Enabled" if enabled else "Disabled (install numpy for audio)")
+        canvas.text(self.small_font, sound_status, GREEN if enabled else YELLOW, (SCREEN_WIDTH // 2 + 70, y_pos + 10))
+        canvas.text(self.small_font, "*Install numpy for full audio experience", YELLOW,
+                    (SCREEN_WIDTH // 2 + 70, y_pos + 30))
         
         # Pulsing effect for start text
         pulse = abs(math.sin(pygame.time.get_ticks() * 0.005)) * 0.3 + 0.7
-        pulsed_text = self.large_font.render("Press SPACE to Start!", True, (int(255 * pulse), int(215 * pulse), 0))
-        pulsed_rect = pulsed_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 80))
-        self.screen.blit(pulsed_text, pulsed_rect)
-        
-        # Version info
-        version_text = self.small_font.render("Ultimate Edition v2.0 - By HillTop Digital Media", True, SILVER)
-        version_rect = version_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 20))
-        self.screen.blit(version_text, version_rect)
-        """Draw the main game screen"""
-        """Draw the start screen with instructions"""
-        self.screen.fill(BLACK)
-        
-        # Animated background particles
-        for _ in range(50):
-            x = random.randint(0, SCREEN_WIDTH)
-            y = random.randint(0, SCREEN_HEIGHT)
-            color = random.choice([BLUE, GREEN, YELLOW, PURPLE, CYAN])
-            alpha = random.randint(30, 100)
-            size = random.randint(1, 3)
-            
-            particle_surface = pygame.Surface((size * 2, size * 2))
-            particle_surface.set_alpha(alpha)
-            particle_surface.fill(color)
-            self.screen.blit(particle_surface, (x - size, y - size))
-        
-        # Title
-        title_text = self.title_font.render("ULTIMATE BRICK BREAKER", True, GOLD)
-        title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 80))
-        self.screen.blit(title_text, title_rect)
-        
-        # Subtitle
-        subtitle_text = self.font.render("The Most Advanced Brick Breaker Ever!", True, WHITE)
-        subtitle_rect = subtitle_text.get_rect(center=(SCREEN_WIDTH // 2, 130))
-        self.screen.blit(subtitle_text, subtitle_rect)
-        
-        # Instructions sections
-        y_start = 180
-        section_spacing = 25
-        
-        # Controls section
-        controls_title = self.font.render("CONTROLS:", True, CYAN)
-        self.screen.blit(controls_title, (50, y_start))
-        y_start += 35
-        
-        controls = [
-            "• Mouse: Move paddle (recommended)",
-            "• Arrow Keys / A,D: Move paddle (classic)",
-            "• TAB: Switch between mouse/keyboard control",
-            "• R: Restart game",
-            "• ESC: Pause game"
-        ]
-        
-        for control in controls:
-            text = self.small_font.render(control, True, WHITE)
-            self.screen.blit(text, (70, y_start))
-            y_start += 20
-        
-        y_start += 15
-        
-        # Power-ups section
-        powerups_title = self.font.render("POWER-UPS:", True, GREEN)
-        self.screen.blit(powerups_title, (50, y_start))
-        y_start += 35
-        
-        powerups = [
-            "• W = Wide Paddle (easier to hit)",
-            "• N = Narrow Paddle (more challenge)", 
-            "• M = Multi-Ball (more balls!)",
-            "• ♥ = Extra Life",
-            "• F = Fire Ball (pierces 3 bricks)",
-            "• S = Steel Ball (2x damage)",
-            "• L = Lightning Ball (super fast)",
-            "• ◊ = Shield (blocks boss attacks)"
-        ]
-        
-        for powerup in powerups:
-            text = self.small_font.render(powerup, True, WHITE)
-            self.screen.blit(text, (70, y_start))
-            y_start += 20
-        
-       # Game features section
-        features_title = self.font.render("SPECIAL FEATURES:", True, PURPLE)
-        features_rect = features_title.get_rect(center=(SCREEN_WIDTH - 200, 180))
-        self.screen.blit(features_title, (SCREEN_WIDTH // 2 + 50, 180))
-        
-        features = [
-            "★ 7 Challenging Levels",
-            "★ Epic Boss Battles (Levels 3 & 6)",
-            "★ Particle Effects & Visual Magic",
-            "★ 3 Special Ball Types",
-            "★ Smart Brick Patterns",
-            "★ Progressive Difficulty",
-            "★ Advanced Physics",
-            "★ Professional Sound System*"
-        ]
-        
-        y_pos = 215
-        for feature in features:
-            text = self.small_font.render(feature, True, WHITE)
-            self.screen.blit(text, (SCREEN_WIDTH // 2 + 70, y_pos))
-            y_pos += 20
-        
-        # Sound note
-        sound_note = self.small_font.render("*Install numpy for full audio experience", True, YELLOW)
-        self.screen.blit(sound_note, (SCREEN_WIDTH // 2 + 70, y_pos + 10))
-        
-        # Start instructions
-        start_text = self.large_font.render("Press SPACE to Start!", True, GOLD)
-        start_rect = start_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 80))
-        
-        # Pulsing effect for start text
-        pulse = abs(math.sin(pygame.time.get_ticks() * 0.005)) * 0.3 + 0.7
-        start_surface = pygame.Surface(start_text.get_size())
-        start_surface.set_alpha(int(255 * pulse))
-        start_surface.fill(GOLD)
-        
-        # Create pulsing text
-        pulsed_text = self.large_font.render("Press SPACE to Start!", True, (int(255 * pulse), int(215 * pulse), 0))
-        pulsed_rect = pulsed_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 80))
-        self.screen.blit(pulsed_text, pulsed_rect)
-        
-    def draw_game(self):
-        """Draw the main game screen"""        
-        self.screen.fill(BLACK)
+        canvas.text(self.large_font, "Press SPACE to Start!", (int(255 * pulse), int(215 * pulse), 0),
+                    center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 80))
+        if self.scores is not None:
+            canvas.text(self.small_font, "H: High scores", SILVER, center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 45))
+            if self.show_leaderboard:
+                canvas.alpha_rect(BLACK, (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT), 200)
+                self.draw_leaderboard(150)
+    
+    def draw_leaderboard(self, y, limit=10):
+        """Top scores from the store's cached query, formatted only when it changes"""
+        version, lines = self.leaderboard_lines
+        if version != self.scores.version:
+            lines = []
+            for rank, (score, level, played_at) in enumerate(self.scores.top, 1):
+                day = time.strftime("%Y-%m-%d", time.localtime(played_at))
+                lines.append(f"{rank:>2}.  {score:>8}   level {level:<3} {day}")
+            self.leaderboard_lines = (self.scores.version, lines)
+        canvas = self.canvas
+        canvas.text(self.large_font, "HIGH SCORES", GOLD, center=(SCREEN_WIDTH // 2, y))
+        if not lines:
+            canvas.text(self.small_font, "No scores yet", WHITE, center=(SCREEN_WIDTH // 2, y + 50))
+        for i, line in enumerate(lines[:limit]):
+            canvas.text(self.small_font, line, WHITE, (SCREEN_WIDTH // 2 - 150, y + 40 + i * 22))
+        
+        
+    def draw_game(self, view=None):
+        """Draw the main game screen from the live game or a RenderFrame"""
+        view = view or self
+        canvas = self.canvas
+        canvas.fill(BLACK)
+        
+        # Shared sprites are drawn once; brick sprites whenever a new level
+        # layout appears
+        atlas = self.atlas
+        if atlas.version is None:
+            self.build_atlas()
+        if self.brick_atlas.version != view.layout_version:
+            self.build_brick_atlas(view)
         
         # Draw particle effects first (background)
-        self.particle_system.draw(self.screen)
+        view.particle_system.draw(canvas)
         
         # Draw game objects (check if they exist first)
-        if self.paddle is not None:
-            self.paddle.draw(self.screen)
+        if view.paddle is not None:
+            view.paddle.draw(canvas, atlas)
         
-        for ball in self.balls:
-            ball.draw(self.screen)
+        for ball in view.balls:
+            ball.draw(canvas, atlas)
+        if view.ball_system is not None:
+            view.ball_system.draw(canvas, atlas)
         
-        for brick in self.bricks:
-            brick.draw(self.screen)
+        for brick in view.bricks:
+            brick.draw(canvas, self.brick_atlas)
         
-        if self.boss_brick:
-            self.boss_brick.draw(self.screen)
+        if view.boss_brick:
+            view.boss_brick.draw(canvas, atlas)
         
-        for projectile in self.boss_projectiles:
-            projectile.draw(self.screen)
+        for projectile in view.boss_projectiles:
+            projectile.draw(canvas, atlas)
+        if view.projectile_store is not None:
+            view.projectile_store.draw(canvas, atlas)
         
-        for powerup in self.powerups:
-            powerup.draw(self.screen, self.small_font)
+        for powerup in view.powerups:
+            powerup.draw(canvas, self.small_font, atlas)
         
         # Draw UI
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-        lives_text = self.font.render(f"Lives: {self.lives}", True, WHITE)
-        level_text = self.font.render(f"Level: {self.level}", True, WHITE)
-        
-        self.screen.blit(score_text, (10, 10))
-        self.screen.blit(lives_text, (10, 50))
-        self.screen.blit(level_text, (10, 90))
+        canvas.text(self.font, f"Score: {view.score}", WHITE, (10, 10))
+        canvas.text(self.font, f"Lives: {view.lives}", WHITE, (10, 50))
+        canvas.text(self.font, f"Level: {view.level}", WHITE, (10, 90))
         
         # Draw control method indicator
-        control_text = f"Control: {'Mouse' if self.use_mouse else 'Keyboard'}"
-        control_surface = self.small_font.render(control_text, True, YELLOW)
-        self.screen.blit(control_surface, (SCREEN_WIDTH - 150, 10))
+        control_text = f"Control: {'Mouse' if view.use_mouse else 'Keyboard'}"
+        canvas.text(self.small_font, control_text, YELLOW, (SCREEN_WIDTH - 150, 10))
         
         # Draw ball type indicators
         y_offset = 130
-        for i, ball in enumerate(self.balls):
+        for i, ball in enumerate(view.balls):
             if ball.ball_type != "normal":
                 ball_info = f"Ball {i+1}: {ball.ball_type.title()}"
                 if hasattr(ball, 'life_timer'):
                     time_left = ball.life_timer // 60
                     ball_info += f" ({time_left}s)"
-                ball_text = self.small_font.render(ball_info, True, ball.color)
-                self.screen.blit(ball_text, (10, y_offset))
+                canvas.text(self.small_font, ball_info, ball.color, (10, y_offset))
                 y_offset += 20
         
+        # Mega mode has too many balls to list one by one
+        if view.ball_system is not None:
+            canvas.text(self.small_font, f"Balls: {len(view.ball_system)}", WHITE, (10, y_offset))
+            y_offset += 20
+            for ball_type, color, count in zip(BALL_TYPES, BALL_COLORS, view.ball_system.type_counts().tolist()):
+                if ball_type != "normal" and count:
+                    canvas.text(self.small_font, f"{ball_type.title()}: {count}", color, (10, y_offset))
+                    y_offset += 20
+        
         # Draw active power-up info (check paddle exists)
-        if self.paddle:
-            if self.paddle.current_powerup:
-                powerup_text = self.small_font.render(f"Paddle: {self.paddle.current_powerup}", True, YELLOW)
-                self.screen.blit(powerup_text, (SCREEN_WIDTH - 200, 30))
+        if view.paddle:
+            if view.paddle.current_powerup:
+                canvas.text(self.small_font, f"Paddle: {view.paddle.current_powerup}", YELLOW,
+                            (SCREEN_WIDTH - 200, 30))
             
-            if self.paddle.shield_timer > 0:
-                shield_time = self.paddle.shield_timer // 60
-                shield_text = self.small_font.render(f"Shield: {shield_time}s", True, CYAN)
-                self.screen.blit(shield_text, (SCREEN_WIDTH - 200, 50))
+            if view.paddle.shield_timer > 0:
+                shield_time = view.paddle.shield_timer // 60
+                canvas.text(self.small_font, f"Shield: {shield_time}s", CYAN, (SCREEN_WIDTH - 200, 50))
         
         # Level-specific messages
-        if self.is_boss_level():
-            if self.boss_brick and not self.boss_brick.destroyed:
-                boss_text = self.font.render("BOSS FIGHT!", True, RED)
-                text_rect = boss_text.get_rect(center=(SCREEN_WIDTH//2, 30))
-                self.screen.blit(boss_text, text_rect)
+        if view.is_boss_level():
+            if view.boss_brick and not view.boss_brick.destroyed:
+                canvas.text(self.font, "BOSS FIGHT!", RED, center=(SCREEN_WIDTH//2, 30))
         
         # Check win condition
-        if self.level > self.max_level:
-            win_text = self.font.render("YOU ARE THE ULTIMATE CHAMPION!", True, GOLD)
-            win_text2 = self.font.render("Press R to restart", True, GREEN)
-            text_rect1 = win_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 20))
-            text_rect2 = win_text2.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 20))
-            self.screen.blit(win_text, text_rect1)
-            self.screen.blit(win_text2, text_rect2)
-        elif self.is_boss_level() and self.boss_brick and self.boss_brick.destroyed and all(brick.destroyed for brick in self.bricks):
-            boss_defeat_text = self.font.render("BOSS DEFEATED! Next level starting...", True, GOLD)
-            text_rect = boss_defeat_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-            self.screen.blit(boss_defeat_text, text_rect)
-        elif not self.is_boss_level() and all(brick.destroyed for brick in self.bricks):
-            next_text = self.font.render(f"Level {self.level-1} Complete! Next level starting...", True, GREEN)
-            text_rect = next_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-            self.screen.blit(next_text, text_rect)
+        if view.level > view.max_level:
+            canvas.text(self.font, "YOU ARE THE ULTIMATE CHAMPION!", GOLD,
+                        center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 20))
+            canvas.text(self.font, "Press R to restart", GREEN, center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 20))
+        elif view.is_boss_level() and view.boss_brick and view.boss_brick.destroyed and all(brick.destroyed for brick in view.bricks):
+            canvas.text(self.font, "BOSS DEFEATED! Next level starting...", GOLD,
+                        center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
+        elif not view.is_boss_level() and all(brick.destroyed for brick in view.bricks):
+            canvas.text(self.font, f"Level {view.level-1} Complete! Next level starting...", GREEN,
+                        center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
         
         # Check lose condition
-        if self.lives <= 0:
-            lose_text = self.font.render("GAME OVER! Press R to restart", True, RED)
-            text_rect = lose_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-            self.screen.blit(lose_text, text_rect)
+        if view.lives <= 0:
+            canvas.text(self.font, "GAME OVER! Press R to restart", RED, center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
+            if self.scores is not None:
+                self.draw_leaderboard(SCREEN_HEIGHT // 2 + 50, 5)
         
         # Quick help at bottom
-        help_text = self.small_font.render("TAB: Switch controls | ESC: Pause | R: Restart", True, SILVER)
-        help_rect = help_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT - 15))
-        self.screen.blit(help_text, help_rect)
+        canvas.text(self.small_font, "TAB: Switch controls | ESC: Pause | R: Restart | BKSP: Rewind | C: Retry boss",
+                    SILVER, center=(SCREEN_WIDTH//2, SCREEN_HEIGHT - 15))
+    
+    def build_atlas(self):
+        """Pre-render the sprites every level shares into the atlas"""
+        sprites = []
+        
+        for powerup, width in ((None, PADDLE_WIDTH), ("wide_paddle", PADDLE_WIDTH * 3 // 2),
+                               ("narrow_paddle", PADDLE_WIDTH * 7 // 10)):
+            paddle = Paddle(0, 0)
+            paddle.current_powerup = powerup
+            paddle.rect.width = width
+            sprites.append(sprite_entry(paddle))
+        
+        for ball_type, color in (("normal", WHITE), ("fire", RED), ("steel", SILVER), ("lightning", YELLOW)):
+            # The fire glow reaches 2px outside the ball
+            ball = Ball(2, 2, ball_type) if ball_type == "fire" else Ball(0, 0, ball_type)
+            ball.color = color
+            sprites.append(sprite_entry(ball, (-2, -2) if ball_type == "fire" else (0, 0)))
+        
+        # Boss body in its normal colour and both hit-flash colours
+        for damage in (0, 1, 2):
+            boss = BossBrick(0, 0)
+            if damage:
+                boss.hit(damage)
+            sprites.append(sprite_entry(boss))
+        
+        sprites.append(sprite_entry(Projectile(0, 0, 0, 1)))
+        for powerup_type in POWERUP_TYPES:
+            sprites.append(sprite_entry(PowerUp(0, 0, powerup_type), (0, 0), self.small_font))
+        
+        self.atlas.build(self.canvas, sprites, "shared")
+    
+    def brick_sprites(self, bricks):
+        """Every damage stage of every brick kind in a layout"""
+        sprites = []
+        for color, hits_required, size in brick_kinds(bricks):
+            for hits_taken in range(hits_required):
+                brick = Brick(0, 0, color, hits_required)
+                brick.rect.size = size
+                if hits_taken:
+                    brick.hit(hits_taken)
+                sprites.append(sprite_entry(brick))
+        return sprites
+    
+    def build_brick_atlas(self, view):
+        """Install the prefetched brick sheet for this layout, or draw one now.
+        
+        A restored state (rewind, checkpoint, versus rollback) counts as a new
+        layout, but usually has nothing the current sheet lacks, so that keeps
+        being used. Games sharing assets also reuse each other's sheets, so a
+        tournament of games on the same levels uploads each sheet once.
+        """
+        kinds = brick_kinds(view.bricks)
+        prepared = self.prepared_sheet
+        if self.brick_atlas.version is not None and kinds <= self.brick_atlas_kinds:
+            self.brick_atlas.version = view.layout_version
+            return
+        shared = self.assets.find_brick_sheet(kinds)
+        if shared is not None:
+            self.brick_atlas.share(shared[1][0], shared[1][1], view.layout_version)
+            self.brick_atlas_kinds = shared[0]
+            return
+        if prepared is not None and prepared[0] == view.layout_version:
+            self.brick_atlas.install(self.canvas, prepared[1], prepared[2], view.layout_version)
+        else:
+            self.brick_atlas.build(self.canvas, self.brick_sprites(view.bricks), view.layout_version)
+        self.brick_atlas_kinds = kinds
+        self.assets.add_brick_sheet(kinds, self.brick_atlas)
     
     def draw_pause_screen(self):
         """Draw pause screen overlay"""
+        canvas = self.canvas
         # Draw semi-transparent overlay
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(150)
-        overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
+        canvas.alpha_rect(BLACK, (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT), 150)
         
         # Draw pause text
-        pause_text = self.large_font.render("GAME PAUSED", True, YELLOW)
-        pause_rect = pause_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 50))
-        self.screen.blit(pause_text, pause_rect)
-        
-        resume_text = self.font.render("Press ESC to Resume", True, WHITE)
-        resume_rect = resume_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-        self.screen.blit(resume_text, resume_rect)
-        
-        restart_text = self.font.render("Press R to Restart", True, WHITE)
-        restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 40))
-        self.screen.blit(restart_text, restart_rect)
+        canvas.text(self.large_font, "GAME PAUSED", YELLOW, center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 50))
+        canvas.text(self.font, "Press ESC to Resume", WHITE, center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
+        canvas.text(self.font, "Press R to Restart", WHITE, center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 40))
     
-    def draw(self):
-        """Main draw method that routes to appropriate screen"""        
-        if self.game_state == "start_screen":
+    def draw_pacing_overlay(self):
+        """Frame rate, jitter and missed frames in the top right corner"""
+        y = 70
+        lines = self.pacer.hud_lines()
+        if getattr(self.canvas, "scale", 1.0) != 1.0 or self.dynamic_resolution:
+            lines.append(f"render scale {self.canvas.scale:.0%}")
+        lines += self.scheduler.hud_lines()
+        for line in lines:
+            self.canvas.text(self.small_font, line, GREEN, (SCREEN_WIDTH - 260, y))
+            y += 18
+    
+    def draw(self, view=None):
+        """Main draw method that routes to appropriate screen"""
+        self.profiler.enter()
+        game_state = (view or self).game_state
+        if game_state == "start_screen":
             self.draw_start_screen()
-        elif self.game_state == "playing":
-            self.draw_game()
-        elif self.game_state == "paused":
-            self.draw_game()  # Draw game in background
+        elif game_state == "playing":
+            self.draw_game(view)
+        elif game_state == "paused":
+            self.draw_game(view)  # Draw game in background
             self.draw_pause_screen()
         else:
             # Fallback - should never happen
-            print(f"Unknown game state: {self.game_state}")
+            print(f"Unknown game state: {game_state}")
             self.draw_start_screen()
         
-        pygame.display.flip()
-        self.screen.fill(BLACK)
-        
-        # Draw particle effects first (background)
-        self.particle_system.draw(self.screen)
-        
-        # Draw game objects
-        self.paddle.draw(self.screen)
+        if self.show_pacing:
+            self.draw_pacing_overlay()
         
+        self.canvas.present()
+        self.profiler.exit()
+    
+    def benchmark_draw(self, frames=600):
+        """Time draw() on a busy level-1 scene; returns average ms per frame"""
+        self.start_game()
+        for brick in self.bricks[::3]:
+            self.particle_system.add_explosion(brick.rect.centerx, brick.rect.centery, brick.color, 20)
+        start = time.perf_counter()
+        for _ in range(frames):
+            self.draw()
+        elapsed_ms = (time.perf_counter() - start) * 1000 / frames
+        print(f"{self.canvas.name} backend: {elapsed_ms:.3f} ms per frame over {frames} frames")
+        return elapsed_ms
+    
+    def benchmark_update(self, frames=600):
+        """Time update() from a fresh level-1 serve; returns average ms per frame.
+        
+        The state digest is kept for every frame (its time included), so runs
+        of different engines can be checked against each other.
+        """
+        self.start_game()
+        self.lives = frames  # Keep the run going however many serves are lost
+        digest = StateDigest(self)
+        start = time.perf_counter()
+        for _ in range(frames):
+            if self.autopilot is not None:
+                self.handle_input(self.autopilot.control(self))
+            self.update()
+            digest.update()
+        elapsed_ms = (time.perf_counter() - start) * 1000 / frames
+        print(f"update: {elapsed_ms:.3f} ms per frame over {frames} frames, {self.ball_count()} balls left")
+        print(f"state digest {digest.value:08x} ({digest.cost_ms():.3f} ms per frame of that)")
+        return elapsed_ms
+    
+    def snapshot_size(self):
+        """Bytes needed to snapshot the current state"""
+        if self.ball_system is not None:
+            ball_bytes = STATE_COUNT.size + len(self.ball_system) * MEGA_BALL_STATE.size
+        else:
+            ball_bytes = len(self.balls) * BALL_STATE.size
+        return (STATE_HEADER.size + PADDLE_STATE.size + STATE_COUNT.size * 5 + ball_bytes
+                + len(self.bricks) * BRICK_STATE.size
+                + (BOSS_STATE.size if self.boss_brick else 0)
+                + len(self.boss_projectiles) * PROJECTILE_STATE.size
+                + (BOSS_ATTACK_STATE.size + STATE_COUNT.size
+                   + len(self.projectile_store) * ProjectileStore.RECORD_SIZE
+                   if self.projectile_store is not None else 0)
+                + len(self.powerups) * POWERUP_STATE.size)
+    
+    def snapshot_into(self, buffer, offset=0):
+        """Pack all gameplay state into a preallocated bytearray.
+        
+        The buffer is grown in place if it is too small. Returns the end offset.
+        Particles are cosmetic and not included.
+        """
+        end = offset + self.snapshot_size()
+        if len(buffer) < end:
+            buffer.extend(bytes(end - len(buffer)))
+        for pack_section in self.snapshot_sections():
+            offset = pack_section(buffer, offset)
+        return offset
+    
+    def snapshot_sections(self):
+        """The snapshot's section writers in order; each packs at an offset
+        and returns the end offset"""
+        return (self.pack_header, self.pack_paddle, self.pack_balls, self.pack_bricks,
+                self.pack_boss, self.pack_projectiles, self.pack_powerups)
+    
+    def pack_header(self, buffer, offset):
+        STATE_HEADER.pack_into(buffer, offset, STATE_VERSION, GAME_STATES.index(self.game_state),
+                               self.level, self.score, self.lives, self.use_mouse,
+                               (STATE_MEGA_BALLS if self.ball_system is not None else 0)
+                               | (STATE_BULLET_HELL if self.projectile_store is not None else 0),
+                               self.rng.getstate(), self.frame_count)
+        return offset + STATE_HEADER.size
+    
+    def pack_paddle(self, buffer, offset):
+        paddle = self.paddle
+        PADDLE_STATE.pack_into(buffer, offset, paddle.x, paddle.y, *paddle.rect.size,
+                               paddle.powerup_timer, paddle.shield_timer,
+                               PADDLE_POWERUPS.index(paddle.current_powerup))
+        return offset + PADDLE_STATE.size
+    
+    def pack_balls(self, buffer, offset):
+        if self.ball_system is not None:
+            STATE_COUNT.pack_into(buffer, offset, self.mega_start_balls)
+            offset += STATE_COUNT.size
+            STATE_COUNT.pack_into(buffer, offset, len(self.ball_system))
+            return self.ball_system.pack_into(buffer, offset + STATE_COUNT.size)
+        STATE_COUNT.pack_into(buffer, offset, len(self.balls))
+        offset += STATE_COUNT.size
         for ball in self.balls:
-            ball.draw(self.screen)
-        
+            BALL_STATE.pack_into(buffer, offset, ball.x, ball.y, ball.vx, ball.vy,
+                                 BALL_TYPES.index(ball.ball_type), ball.pierce_count,
+                                 ball.life_timer, getattr(ball, 'damage_multiplier', 1),
+                                 ball.max_trail_length, *ball.color)
+            offset += BALL_STATE.size
+        return offset
+    
+    def pack_bricks(self, buffer, offset):
+        STATE_COUNT.pack_into(buffer, offset, len(self.bricks))
+        offset += STATE_COUNT.size
         for brick in self.bricks:
-            brick.draw(self.screen)
-        
-        if self.boss_brick:
-            self.boss_brick.draw(self.screen)
-        
+            BRICK_STATE.pack_into(buffer, offset, *brick.rect, *brick.color, *brick.original_color,
+                                  brick.destroyed, brick.hits_required, brick.hits_taken)
+            offset += BRICK_STATE.size
+        return offset
+    
+    def pack_boss(self, buffer, offset):
+        boss = self.boss_brick
+        STATE_COUNT.pack_into(buffer, offset, 1 if boss else 0)
+        offset += STATE_COUNT.size
+        if boss:
+            BOSS_STATE.pack_into(buffer, offset, *boss.rect, boss.health, boss.max_health, boss.speed,
+                                 boss.direction, boss.shoot_timer, boss.destroyed, *boss.color)
+            offset += BOSS_STATE.size
+        return offset
+    
+    def pack_projectiles(self, buffer, offset):
+        STATE_COUNT.pack_into(buffer, offset, len(self.boss_projectiles))
+        offset += STATE_COUNT.size
         for projectile in self.boss_projectiles:
-            projectile.draw(self.screen)
-        
+            PROJECTILE_STATE.pack_into(buffer, offset, projectile.x, projectile.y, projectile.vx, projectile.vy)
+            offset += PROJECTILE_STATE.size
+        if self.projectile_store is not None:
+            BOSS_ATTACK_STATE.pack_into(buffer, offset, *self.boss_attacks.getstate())
+            offset += BOSS_ATTACK_STATE.size
+            STATE_COUNT.pack_into(buffer, offset, len(self.projectile_store))
+            offset += STATE_COUNT.size
+            offset = self.projectile_store.pack_into(buffer, offset)
+        return offset
+    
+    def pack_powerups(self, buffer, offset):
+        STATE_COUNT.pack_into(buffer, offset, len(self.powerups))
+        offset += STATE_COUNT.size
         for powerup in self.powerups:
-            powerup.draw(self.screen, self.small_font)
-        
-        # Draw UI
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-        lives_text = self.font.render(f"Lives: {self.lives}", True, WHITE)
-        level_text = self.font.render(f"Level: {self.level}", True, WHITE)
-        
-        self.screen.blit(score_text, (10, 10))
-        self.screen.blit(lives_text, (10, 50))
-        self.screen.blit(level_text, (10, 90))
-        
-        # Draw ball type indicators
-        y_offset = 130
-        for i, ball in enumerate(self.balls):
-            if ball.ball_type != "normal":
-                ball_info = f"Ball {i+1}: {ball.ball_type.title()}"
-                if hasattr(ball, 'life_timer'):
-                    time_left = ball.life_timer // 60  # Convert to seconds
-                    ball_info += f" ({time_left}s)"
-                ball_text = self.small_font.render(ball_info, True, ball.color)
-                self.screen.blit(ball_text, (10, y_offset))
-                y_offset += 20
-        
-        # Draw active power-up info
-        if self.paddle.current_powerup:
-            powerup_text = self.small_font.render(f"Paddle: {self.paddle.current_powerup}", True, YELLOW)
-            self.screen.blit(powerup_text, (SCREEN_WIDTH - 200, 10))
+            POWERUP_STATE.pack_into(buffer, offset, powerup.x, powerup.y, powerup.vy,
+                                    POWERUP_TYPES.index(powerup.type), powerup.active)
+            offset += POWERUP_STATE.size
+        return offset
+    
+    def state_digest(self, previous=0, full=False):
+        """crc32 of the snapshot_into bytes, continuing from `previous`, with
+        the bricks section stood in for by its own crc32.
+        
+        Bricks only change when one is hit (some hits_taken goes up) or the
+        layout is replaced (layout_version goes up), so unless `full` is set
+        that crc is reused until one of those has moved. See digest.py.
+        """
+        size = self.snapshot_size() + DIGEST_CRC.size
+        if len(self.digest_buffer) < size:
+            self.digest_buffer.extend(bytes(size - len(self.digest_buffer)))
+        with memoryview(self.digest_buffer) as view:
+            offset = self.pack_header(view, 0)
+            offset = self.pack_paddle(view, offset)
+            offset = self.pack_balls(view, offset)
+            key = (self.layout_version, len(self.bricks), sum(brick.hits_taken for brick in self.bricks))
+            if key != self.digest_bricks[0] or full:
+                self.digest_bricks = (key, zlib.crc32(view[offset:self.pack_bricks(view, offset)]))
+            DIGEST_CRC.pack_into(view, offset, self.digest_bricks[1])
+            offset += DIGEST_CRC.size
+            offset = self.pack_boss(view, offset)
+            offset = self.pack_projectiles(view, offset)
+            offset = self.pack_powerups(view, offset)
+            return zlib.crc32(view[:offset], previous)
+    
+    def save_state(self):
+        """Serialize all gameplay state to bytes"""
+        end = self.snapshot_into(self.snapshot_buffer)
+        return bytes(self.snapshot_buffer[:end])
+    
+    def load_state(self, data, offset=0):
+        """Restore gameplay state from save_state or snapshot_into output.
+        
+        Accepts bytes, bytearray or memoryview. Brick and ball objects from the
+        current state are reused where possible since rebuilding their Rects
+        dominates restore time.
+        """
+        (version, state, self.level, self.score, self.lives, use_mouse, flags, rng_state,
+         self.frame_count) = STATE_HEADER.unpack_from(data, offset)
+        if version != STATE_VERSION:
+            raise ValueError(f"Unsupported game state version {version}")
+        self.game_state = GAME_STATES[state]
+        self.use_mouse = bool(use_mouse)
+        self.rng.setstate(rng_state)
+        offset += STATE_HEADER.size
+        
+        x, y, w, h, powerup_timer, shield_timer, powerup = PADDLE_STATE.unpack_from(data, offset)
+        offset += PADDLE_STATE.size
+        self.paddle = Paddle(0, 0)
+        self.paddle.rect.size = (w, h)
+        self.paddle.place(x, y)
+        self.paddle.powerup_timer = powerup_timer
+        self.paddle.shield_timer = shield_timer
+        self.paddle.current_powerup = PADDLE_POWERUPS[powerup]
+        
+        def read_count():
+            nonlocal offset
+            count, = STATE_COUNT.unpack_from(data, offset)
+            offset += STATE_COUNT.size
+            return count
+        
+        if flags & STATE_MEGA_BALLS:
+            start_balls = read_count()
+            if self.ball_system is None and not self.enable_mega_balls(start_balls):
+                raise ValueError("Game state uses mega multi-ball mode, which needs NumPy")
+            self.mega_start_balls = start_balls
+            states = []
+            for _ in range(read_count()):
+                states.append(MEGA_BALL_STATE.unpack_from(data, offset))
+                offset += MEGA_BALL_STATE.size
+            self.ball_system.load_states(states)
+            ball_count = 0
+        else:
+            self.ball_system = None
+            ball_count = read_count()
         
-        if self.paddle.shield_timer > 0:
-            shield_time = self.paddle.shield_timer // 60
-            shield_text = self.small_font.render(f"Shield: {shield_time}s", True, CYAN)
-            self.screen.blit(shield_text, (SCREEN_WIDTH - 200, 30))
+        old_balls = self.balls
+        self.balls = []
+        for i in range(ball_count):
+            (x, y, vx, vy, ball_type, pierce_count, life_timer, damage,
+             max_trail_length, r, g, b) = BALL_STATE.unpack_from(data, offset)
+            offset += BALL_STATE.size
+            if i < len(old_balls):
+                ball = old_balls[i]
+                ball.trail = []
+            else:
+                ball = Ball(0, 0)
+            ball.place(x, y)
+            ball.ball_type = BALL_TYPES[ball_type]
+            ball.vx = vx
+            ball.vy = vy
+            ball.pierce_count = pierce_count
+            ball.life_timer = life_timer
+            ball.damage_multiplier = damage
+            ball.max_trail_length = max_trail_length
+            ball.color = (r, g, b)
+            self.balls.append(ball)
+        
+        old_bricks = self.bricks
+        self.bricks = []
+        for i in range(read_count()):
+            (x, y, w, h, r, g, b, orig_r, orig_g, orig_b, destroyed, hits_required,
+             hits_taken) = BRICK_STATE.unpack_from(data, offset)
+            offset += BRICK_STATE.size
+            if i < len(old_bricks):
+                brick = old_bricks[i]
+                brick.rect.update(x, y, w, h)
+            else:
+                brick = Brick(x, y, None)
+                brick.rect.size = (w, h)
+            brick.color = (r, g, b)
+            brick.original_color = (orig_r, orig_g, orig_b)
+            brick.destroyed = bool(destroyed)
+            brick.hits_required = hits_required
+            brick.hits_taken = hits_taken
+            self.bricks.append(brick)
         
-        # Level-specific messages
-        if self.is_boss_level():
-            if self.boss_brick and not self.boss_brick.destroyed:
-                boss_text = self.font.render("BOSS FIGHT!", True, RED)
-                text_rect = boss_text.get_rect(center=(SCREEN_WIDTH//2, 30))
-                self.screen.blit(boss_text, text_rect)
+        self.boss_brick = None
+        if read_count():
+            (x, y, w, h, health, max_health, speed, direction, shoot_timer, destroyed,
+             r, g, b) = BOSS_STATE.unpack_from(data, offset)
+            offset += BOSS_STATE.size
+            self.boss_brick = BossBrick(x, y)
+            self.boss_brick.health = health
+            self.boss_brick.max_health = max_health
+            self.boss_brick.speed = speed
+            self.boss_brick.direction = direction
+            self.boss_brick.shoot_timer = shoot_timer
+            self.boss_brick.destroyed = bool(destroyed)
+            self.boss_brick.color = (r, g, b)
         
-        # Check win condition
-        if self.level > self.max_level:
-            win_text = self.font.render("YOU ARE THE ULTIMATE CHAMPION!", True, GOLD)
-            win_text2 = self.font.render("Press R to restart", True, GREEN)
-            text_rect1 = win_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 20))
-            text_rect2 = win_text2.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 20))
-            self.screen.blit(win_text, text_rect1)
-            self.screen.blit(win_text2, text_rect2)
-        elif self.is_boss_level() and self.boss_brick and self.boss_brick.destroyed and all(brick.destroyed for brick in self.bricks):
-            boss_defeat_text = self.font.render("BOSS DEFEATED! Next level starting...", True, GOLD)
-            text_rect = boss_defeat_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-            self.screen.blit(boss_defeat_text, text_rect)
-        elif not self.is_boss_level() and all(brick.destroyed for brick in self.bricks):
-            next_text = self.font.render(f"Level {self.level-1} Complete! Next level starting...", True, GREEN)
-            text_rect = next_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-            self.screen.blit(next_text, text_rect)
+        self.boss_projectiles = []
+        for _ in range(read_count()):
+            x, y, vx, vy = PROJECTILE_STATE.unpack_from(data, offset)
+            offset += PROJECTILE_STATE.size
+            projectile = Projectile(0, 0, 0, 0)
+            projectile.place(x, y)
+            projectile.vx = vx
+            projectile.vy = vy
+            self.boss_projectiles.append(projectile)
+        if flags & STATE_BULLET_HELL:
+            if self.projectile_store is None and not self.enable_bullet_hell():
+                raise ValueError("Game state uses bullet-hell bosses, which need NumPy")
+            self.boss_attacks.setstate(BOSS_ATTACK_STATE.unpack_from(data, offset))
+            offset += BOSS_ATTACK_STATE.size
+            count = read_count()
+            offset = self.projectile_store.load_from(data, offset, count)
+        else:
+            self.projectile_store = self.boss_attacks = None
         
-        # Check lose condition
-        if self.lives <= 0:
-            lose_text = self.font.render("GAME OVER! Press R to restart", True, RED)
-            text_rect = lose_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-            self.screen.blit(lose_text, text_rect)
+        self.powerups = []
+        for _ in range(read_count()):
+            x, y, vy, powerup_type, active = POWERUP_STATE.unpack_from(data, offset)
+            offset += POWERUP_STATE.size
+            powerup = PowerUp(0, 0, POWERUP_TYPES[powerup_type])
+            powerup.place(x, y)
+            powerup.vy = vy
+            powerup.active = bool(active)
+            self.powerups.append(powerup)
+        
+        # Old particles would belong to a different moment in the game
+        self.particle_system = ParticleSystem(self.scheduler, self.particle_mode)
+        self.layout_version += 1
+    
+    def take_checkpoint(self):
+        """Remember the current state so the level can be retried from here"""
+        self.snapshot_into(self.checkpoint)
+        self.checkpoint_level = self.level
+    
+    def restore_checkpoint(self):
+        if self.checkpoint_level is None:
+            return False
+        self.load_state(self.checkpoint)
+        return True
+    
+    def rewind(self, seconds=3.0):
+        """Jump back in time using the rewind ring buffer"""
+        if not self.rewind_buffer.restore(self, seconds):
+            return False
+        self.game_state = "paused"
+        return True
+    
+    def handle_rewind_key(self, key):
+        """Rewind and checkpoint keys work outside the recorded input stream.
         
+        They restore saved state rather than simulating, so when recording we
+        write a keyframe straight after the jump for playback to pick up.
+        """
+        if self.game_state not in ("playing", "paused"):
+            return False
+        if key == pygame.K_BACKSPACE:
+            restored = self.rewind()
+        elif key == pygame.K_c:
+            restored = self.restore_checkpoint()
+        else:
+            return False
+        if restored and self.recorder:
+            self.recorder.write_keyframe(self)
+        return True
+    
     def reset_game(self):
         """Reset entire game"""
         self.game_state = "playing"
         self.level = 1
         self.score = 0
         self.lives = 3
-        self.particle_system = ParticleSystem()
+        self.particle_system = ParticleSystem(self.scheduler, self.particle_mode)
+        self.rewind_buffer.clear()
+        self.checkpoint_level = None
         self.reset_level()
     
+    def poll_events(self):
+        """Drain the SDL event queue; returns (keep running, key presses)"""
+        running = True
+        key_events = []
+        events = pygame.event.get()
+        self.controls.process(events)
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F3:
+                    # Display-only toggle, kept out of the recorded input
+                    self.show_pacing = not self.show_pacing
+                elif event.key == pygame.K_F9:
+                    self.profiler.arm(self.frame_count)
+                elif event.key == pygame.K_F4:
+                    mode = PARTICLE_MODES[(PARTICLE_MODES.index(self.particle_mode) + 1) % len(PARTICLE_MODES)]
+                    if self.set_particle_mode(mode):
+                        print(f"Particles: {mode}")
+                elif event.key == pygame.K_F10 and self.capture:
+                    self.capture.enabled = not self.capture.enabled
+                    print(f"Capture {'resumed' if self.capture.enabled else 'paused'}")
+                elif event.key == pygame.K_h and self.game_state == "start_screen" and self.scores:
+                    self.show_leaderboard = not self.show_leaderboard
+                else:
+                    key_events.append(event.key)
+        return running, key_events
+    
+    def pacing_stats(self):
+        """Frame interval and jitter statistics for the display loop"""
+        return self.pacer.stats()
+    
+    def simulate_frame(self, frame_input, key_events):
+        """One simulation tick plus the recording, rewind and spectator hooks"""
+        key_events = [key for key in key_events if not self.handle_rewind_key(key)]
+        
+        if self.replay_frames is not None:
+            # Replay input replaces the live mouse and keyboard
+            recorded = next(self.replay_frames, None)
+            if recorded is None:
+                print("Replay finished")
+                self.replay_frames = None
+            else:
+                _, frame_input, key_events = recorded
+        elif self.autopilot is not None:
+            # Replaces the live input before recording, so replays of an
+            # autopilot run play back without it
+            frame_input = self.autopilot.control(self)
+            key_events = list(key_events) + self.autopilot.keys(self)
+        
+        if self.recorder:
+            self.recorder.record_frame(self, frame_input, key_events)
+        self.step(frame_input, key_events)
+        
+        if self.game_state == "playing" and self.lives > 0:
+            self.rewind_buffer.capture(self)
+            if self.is_boss_level() and self.checkpoint_level != self.level:
+                self.take_checkpoint()
+        
+        if self.spectator_server:
+            self.spectator_server.publish(self)
+    
     def run(self):
+        # The frame wait comes straight before polling, so each tick uses the
+        # newest input available
         running = True
+        frame_start = time.perf_counter()
         while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.KEYDOWN:
-                    if self.game_state == "start_screen":
-                        if event.key == pygame.K_SPACE:
-                            self.start_game()
-                    
-                    elif self.game_state == "playing":
-                        if event.key == pygame.K_ESCAPE:
-                            self.game_state = "paused"
-                        elif event.key == pygame.K_r:
-                            if (self.lives <= 0 or self.level > self.max_level or 
-                                (all(brick.destroyed for brick in self.bricks) and 
-                                 (not self.boss_brick or self.boss_brick.destroyed))):
-                                self.reset_game()
-                    
-                    elif self.game_state == "paused":
-                        if event.key == pygame.K_ESCAPE:
-                            self.game_state = "playing"
-                        elif event.key == pygame.K_r:
-                            self.reset_game()
-            
-            # Update game logic only when playing
-            if self.game_state == "playing" and self.lives > 0 and self.level <= self.max_level:
-                self.handle_input()
-                self.update()
-            
+            if self.allocations:
+                self.allocations.frame_start()
+            running, key_events = self.poll_events()
+            self.simulate_frame(self.sample_input(), key_events)
+            update_done = time.perf_counter()
             self.draw()
-            self.clock.tick(60)
-        
+            self.controls.presented()
+            if self.capture:
+                self.capture.capture(self.frame_count)
+            if self.dynamic_resolution:
+                self.dynamic_resolution.update((time.perf_counter() - frame_start) * 1000)
+            if self.telemetry:
+                now = time.perf_counter()
+                self.record_telemetry(self, self.frame_count, (now - frame_start) * 1000,
+                                      (update_done - frame_start) * 1000, (now - update_done) * 1000)
+            # Deferred work gets whatever is left of this frame's budget
+            self.scheduler.run(frame_start + self.pacer.period)
+            if self.allocations:
+                self.allocations.frame_end()
+            self.pacer.wait()
+            frame_start = time.perf_counter()
+        self.shutdown()
+    
+    def run_threaded(self, tick_rate=60):
+        """Run simulation on its own thread while this thread draws.
+        
+        SDL events and drawing stay on the main thread. The simulation thread
+        publishes an immutable RenderFrame after every tick and we draw the
+        newest one, so a slow frame no longer delays physics. The display is
+        paced by self.pacer independently of the tick rate.
+        """
+        # The simulation thread owns the game objects, so it drains the
+        # scheduler in the gap after each tick
+        simulation = SimulationThread(self, tick_rate)
+        simulation.start()
+        running = True
+        shown_tick = None
+        frame_start = time.perf_counter()
+        while running:
+            if self.allocations:
+                self.allocations.frame_start()
+            running, key_events = self.poll_events()
+            simulation.submit_input(self.sample_input(), key_events)
+            frame = simulation.latest_frame()
+            if frame is not None:
+                draw_start = time.perf_counter()
+                self.draw(frame)
+                if self.capture:
+                    self.capture.capture(frame.tick)
+                if self.dynamic_resolution:
+                    self.dynamic_resolution.update((time.perf_counter() - draw_start) * 1000)
+                # Input counts as displayed once a newer tick reaches the screen
+                if frame.tick != shown_tick:
+                    self.controls.presented()
+                    shown_tick = frame.tick
+                if self.telemetry:
+                    now = time.perf_counter()
+                    self.record_telemetry(frame, frame.tick, (now - frame_start) * 1000, simulation.tick_ms,
+                                          (now - draw_start) * 1000)
+            if self.allocations:
+                self.allocations.frame_end()
+            self.pacer.wait()
+            frame_start = time.perf_counter()
+        simulation.stop()
+        self.shutdown()
+    
+    def shutdown(self):
+        print(self.controls.report())
+        print(self.pacer.report())
+        print(self.scheduler.report())
+        if self.autopilot:
+            print(self.autopilot.report())
+        if self.spectator_server:
+            self.spectator_server.stop()
+        if self.recorder:
+            self.recorder.close()
+        if self.telemetry:
+            self.telemetry.stop()
+        self.profiler.close()
+        if self.allocations:
+            self.allocations.stop()
+        if self.scores:
+            self.scores.close(self.frame_count)
+        if self.capture:
+            self.capture.stop()
         pygame.quit()
         sys.exit()
 
+def draw_versus_overlay(canvas, session, player, font, small_font, show_stats):
+    """Who's who, garbage progress and the result, over both fields"""
+    canvas.line(SILVER, (SCREEN_WIDTH, 0), (SCREEN_WIDTH, SCREEN_HEIGHT), 2)
+    for side, who in enumerate((player, 1 - player)):
+        centre = side * SCREEN_WIDTH + SCREEN_WIDTH // 2
+        label = f"{'YOU' if who == player else 'OPPONENT'} (P{who + 1})"
+        canvas.text(small_font, label, CYAN, center=(centre, SCREEN_HEIGHT - 40))
+        canvas.text(small_font, f"Garbage {session.credit[who]}/{session.garbage_bricks}", GRAY,
+                    center=(centre, SCREEN_HEIGHT - 60))
+    
+    if session.winner is not None:
+        message, color = ("DRAW", YELLOW) if session.winner == DRAW else \
+            (("YOU WIN!", GOLD) if session.winner == player else ("YOU LOSE", RED))
+        canvas.text(font, message, color, center=(SCREEN_WIDTH, SCREEN_HEIGHT // 2 - 60))
+        canvas.text(small_font, "ESC to quit", WHITE, center=(SCREEN_WIDTH, SCREEN_HEIGHT // 2 - 30))
+    elif session.peer_left:
+        canvas.text(font, "Opponent left", YELLOW, center=(SCREEN_WIDTH, SCREEN_HEIGHT // 2 - 60))
+    elif session.frame - session.remote_frame - 1 >= session.max_rollback:
+        canvas.text(small_font, "Waiting for opponent...", YELLOW, center=(SCREEN_WIDTH, SCREEN_HEIGHT // 2))
+    
+    if show_stats:
+        y = SCREEN_HEIGHT - 160
+        for line in session.hud_lines():
+            canvas.text(small_font, line, GREEN, (SCREEN_WIDTH + 10, y))
+            y += 18
+
+def run_versus(args, window_size):
+    """Head to head with another cabinet (see versus.py): our field on the
+    left, the opponent's on the right, both simulated here"""
+    host, port = args.versus.rsplit(":", 1)
+    transport = UdpTransport(args.versus_port, (host, int(port)), loss=args.net_loss, delay_ms=args.net_delay)
+    transport.start()
+    player = args.player - 1
+    
+    # One window twice as wide; each game draws into its own half
+    size = (SCREEN_WIDTH * 2, SCREEN_HEIGHT)
+    display = create_canvas("surface", "Ultimate Brick Breaker - Versus", size, vsync=args.pacing == "vsync",
+                            window_size=window_size or size, fullscreen=args.fullscreen)
+    font = pygame.font.Font(None, 48)
+    small_font = pygame.font.Font(None, 24)
+    
+    # Player 1 picks the seed; both fields on both cabinets start from it
+    handshake = Handshake(transport, player, args.seed if args.seed is not None else random.randrange(1 << 32))
+    clock = pygame.time.Clock()
+    seed = None
+    while seed is None:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                transport.stop()
+                pygame.quit()
+                sys.exit()
+        seed = handshake.poll()
+        display.fill(BLACK)
+        display.text(font, f"Player {args.player}: waiting for {args.versus}...", WHITE,
+                     center=(SCREEN_WIDTH, SCREEN_HEIGHT // 2))
+        display.present()
+        clock.tick(60)
+    print(f"Versus: connected as player {args.player}, seed {seed}")
+    
+    games = [None, None]
+    assets = GameAssets()
+    for side, who in enumerate((player, 1 - player)):
+        viewport = ViewportCanvas(display.surface, (side * SCREEN_WIDTH, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+        games[who] = Game(seed=seed, input_mode=args.input_mode, smoothing=args.smoothing,
+                          pacing=args.pacing, fps=args.fps, level_set=args.levels, canvas=viewport,
+                          assets=assets)
+        games[who].start_game()
+        if args.particles != "rects":
+            games[who].set_particle_mode(args.particles)
+    local, opponent = games[player], games[1 - player]
+    opponent.sound_manager.sound_enabled = False
+    if args.autopilot:
+        local.enable_autopilot()
+    session = RollbackSession(games, player, transport, args.max_rollback, args.input_delay)
+    
+    # ESC leaves and TAB switches controls; everything else the fields need
+    # comes through the input stream
+    keyboard = False
+    running = True
+    frame_start = time.perf_counter()
+    while running:
+        running, key_events = local.poll_events()
+        for key in key_events:
+            if key == pygame.K_ESCAPE:
+                running = False
+            elif key == pygame.K_TAB:
+                keyboard = not keyboard
+        mouse_x, bits = local.autopilot.control(local) if local.autopilot else local.sample_input()
+        session.advance((mouse_x, bits | (INPUT_KEYBOARD if keyboard else 0)))
+        
+        local.draw()
+        opponent.draw()
+        draw_versus_overlay(display, session, player, font, small_font, local.show_pacing)
+        display.present()
+        local.controls.presented()
+        for game in games:
+            game.scheduler.run(frame_start + local.pacer.period)
+        local.pacer.wait()
+        frame_start = time.perf_counter()
+    
+    session.leave()
+    print(session.report())
+    print(local.controls.report())
+    print(local.pacer.report())
+    if local.autopilot:
+        print(local.autopilot.report())
+    transport.stop()
+    pygame.quit()
+    sys.exit()
+
+def draw_tournament_overlay(canvas, games, columns, font):
+    """Grid lines and a label with each game's seed and score"""
+    rows = math.ceil(len(games) / columns)
+    for column in range(1, columns):
+        canvas.line(SILVER, (column * SCREEN_WIDTH, 0), (column * SCREEN_WIDTH, rows * SCREEN_HEIGHT), 2)
+    for row in range(1, rows):
+        canvas.line(SILVER, (0, row * SCREEN_HEIGHT), (columns * SCREEN_WIDTH, row * SCREEN_HEIGHT), 2)
+    for i, game in enumerate(games):
+        x, y = (i % columns) * SCREEN_WIDTH, (i // columns) * SCREEN_HEIGHT
+        label = f"Game {i + 1}  seed {game.seed}  score {game.score}"
+        canvas.text(font, label, CYAN, center=(x + SCREEN_WIDTH // 2, y + SCREEN_HEIGHT - 40))
+
+def run_tournament(args, window_size):
+    """Several games at once, tiled on one window.
+    
+    Each game gets a viewport and keeps drawing in its own SCREEN_WIDTH x
+    SCREEN_HEIGHT coordinates. They share one GameAssets, so fonts, sounds,
+    sprite sheets and rendered text are made once. Games play the replays
+    from --tournament-replays in order and the autopilot plays the rest, on
+    consecutive seeds. All of them are stepped and drawn in one loop and the
+    window is presented once per frame.
+    """
+    count = args.tournament
+    columns = math.ceil(math.sqrt(count))
+    rows = math.ceil(count / columns)
+    size = (SCREEN_WIDTH * columns, SCREEN_HEIGHT * rows)
+    display = create_canvas("surface", "Ultimate Brick Breaker - Tournament", size, vsync=args.pacing == "vsync",
+                            window_size=window_size or size, fullscreen=args.fullscreen)
+    assets = GameAssets()
+    display.text_cache = assets.text_cache
+    
+    seed = args.seed if args.seed is not None else random.randrange(1 << 32)
+    replays = args.tournament_replays or []
+    games = []
+    start = time.perf_counter()
+    for i in range(count):
+        viewport = ViewportCanvas(display.surface, ((i % columns) * SCREEN_WIDTH, (i // columns) * SCREEN_HEIGHT,
+                                                    SCREEN_WIDTH, SCREEN_HEIGHT))
+        game = Game(seed=(seed + i) % (1 << 32), pacing=args.pacing, fps=args.fps, level_set=args.levels,
+                    canvas=viewport, assets=assets)
+        if args.particles != "rects":
+            game.set_particle_mode(args.particles)
+        if args.mega_balls:
+            game.enable_mega_balls(args.mega_balls)
+        if args.bullet_hell:
+            game.enable_bullet_hell()
+        if i < len(replays):
+            game.start_playback(replays[i])
+        else:
+            game.enable_autopilot()
+            game.start_game()
+        # One field's sounds are plenty
+        game.sound_manager.sound_enabled = i == 0
+        games.append(game)
+    print(f"Tournament: {count} games in {(time.perf_counter() - start) * 1000:.1f} ms")
+    
+    # The first game owns the event queue and the frame pacing (F3 shows it
+    # on that field); ESC leaves, and F4 switches every field's particles
+    leader = games[0]
+    running = True
+    frame_start = time.perf_counter()
+    while running:
+        running, key_events = leader.poll_events()
+        if pygame.K_ESCAPE in key_events:
+            running = False
+        for game in games:
+            game.particle_mode = leader.particle_mode
+            game.simulate_frame(game.sample_input(), [])
+        
+        for game in games:
+            game.draw()
+        draw_tournament_overlay(display, games, columns, leader.small_font)
+        display.present()
+        for game in games:
+            game.scheduler.run(frame_start + leader.pacer.period)
+        leader.pacer.wait()
+        frame_start = time.perf_counter()
+    
+    print(leader.pacer.report())
+    print(leader.scheduler.report())
+    for i, game in enumerate(games):
+        print(f"Game {i + 1}: seed {game.seed}, level {game.level}, score {game.score}")
+    pygame.quit()
+    sys.exit()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ultimate Brick Breaker")
+    parser.add_argument("--spectate-port", type=int, default=None,
+                        help="stream the game to spectators on this port")
+    parser.add_argument("--spectate-host", default="127.0.0.1",
+                        help="address the spectator server binds to")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for gameplay randomness")
+    parser.add_argument("--record", metavar="FILE", default=None,
+                        help="record a replay of this session")
+    parser.add_argument("--replay", metavar="FILE", default=None,
+                        help="play back a recorded replay")
+    parser.add_argument("--seek", type=int, default=0, metavar="FRAME",
+                        help="frame to start replay playback from")
+    parser.add_argument("--threaded", action="store_true",
+                        help="run simulation and rendering on separate threads")
+    parser.add_argument("--tick-rate", type=int, default=60,
+                        help="simulation ticks per second in threaded mode")
+    parser.add_argument("--backend", choices=["surface", "sdl2"], default="surface",
+                        help="drawing backend")
+    parser.add_argument("--bench-draw", type=int, metavar="FRAMES", default=None,
+                        help="time drawing a fixed scene and exit")
+    parser.add_argument("--input-mode", choices=INPUT_MODES, default="direct",
+                        help="mouse paddle control: direct, or smoothed by --smoothing")
+    parser.add_argument("--smoothing", type=float, default=0.3,
+                        help="fraction of the distance to the cursor covered per tick in smooth mode")
+    parser.add_argument("--pacing", choices=PACING_STRATEGIES, default="sleep",
+                        help="how the display loop waits for each frame (none = unthrottled)")
+    parser.add_argument("--fps", type=int, default=60,
+                        help="target display frame rate, e.g. 60, 120 or 144 "
+                             "(without --threaded this is also the game speed)")
+    parser.add_argument("--telemetry", metavar="PREFIX", default=None,
+                        help="write per-frame metrics to PREFIX.jsonl / PREFIX.bin")
+    parser.add_argument("--telemetry-format", choices=["jsonl", "binary"], default="jsonl",
+                        help="telemetry file format")
+    parser.add_argument("--telemetry-prom", metavar="FILE", default=None,
+                        help="keep a Prometheus text snapshot of the latest metrics in FILE")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default="cprofile",
+                        help="profiler used by F9 and --profile-range")
+    parser.add_argument("--profile-frames", type=int, default=300, metavar="N",
+                        help="frames captured when F9 is pressed")
+    parser.add_argument("--profile-range", metavar="START:END", default=None,
+                        help="profile simulation frames START to END (e.g. with --replay)")
+    parser.add_argument("--profile-out", metavar="PREFIX", default="profile",
+                        help="profile output file prefix")
+    parser.add_argument("--track-allocations", type=int, nargs="?", const=60, default=None,
+                        metavar="WINDOW", help="tracemalloc per-subsystem report every WINDOW frames")
+    parser.add_argument("--levels", choices=LEVEL_SETS, default="classic",
+                        help="the seven classic levels, or endless generated ones")
+    parser.add_argument("--mega-balls", type=int, metavar="COUNT", default=None,
+                        help="mega multi-ball mode: serve COUNT balls at once")
+    parser.add_argument("--bullet-hell", action="store_true",
+                        help="bosses fire dense spread, spiral and aimed-burst patterns")
+    parser.add_argument("--autopilot", action="store_true",
+                        help="the paddle plays itself (soak and benchmark runs)")
+    parser.add_argument("--scores", metavar="FILE", default=None,
+                        help="SQLite file for high scores and session stats "
+                             "(default: scores.db in the per-user data directory)")
+    parser.add_argument("--no-scores", action="store_true",
+                        help="don't keep high scores")
+    parser.add_argument("--capture", metavar="PREFIX", default=None,
+                        help="capture every presented frame (F10 pauses)")
+    parser.add_argument("--capture-format", choices=CAPTURE_FORMATS, default="png",
+                        help="PNG image sequence or zlib-compressed raw video")
+    parser.add_argument("--capture-slots", type=int, default=120, metavar="N",
+                        help="frames the capture ring holds before dropping")
+    parser.add_argument("--particles", choices=PARTICLE_MODES, default="rects",
+                        help="draw particles as individual rects, or keep them in NumPy arrays and "
+                             "blit them in one batch (alpha or additive blending); F4 cycles")
+    parser.add_argument("--bench-update", type=int, metavar="FRAMES", default=None,
+                        help="time game updates (use with --mega-balls) and exit")
+    parser.add_argument("--window", metavar="WxH", default=None,
+                        help="window size; the game is scaled to fit with its aspect ratio kept")
+    parser.add_argument("--fullscreen", action="store_true",
+                        help="fill the desktop, letterboxed")
+    parser.add_argument("--scaling", choices=["scaled", "transform"], default="scaled",
+                        help="surface backend scaling: pygame.SCALED or transform.scale")
+    parser.add_argument("--render-scale", default="1.0", metavar="SCALE",
+                        help="internal resolution as a fraction of 875x600 (0.25-1.0), or 'dynamic'")
+    parser.add_argument("--versus", metavar="HOST:PORT", default=None,
+                        help="two-player versus against the cabinet at HOST:PORT over UDP")
+    parser.add_argument("--versus-port", type=int, default=7000, metavar="PORT",
+                        help="local UDP port for --versus")
+    parser.add_argument("--player", type=int, choices=[1, 2], default=1,
+                        help="versus player number; player 1 picks the seed")
+    parser.add_argument("--input-delay", type=int, default=1, metavar="FRAMES",
+                        help="versus: frames local input is held back (fewer rollbacks)")
+    parser.add_argument("--max-rollback", type=int, default=8, metavar="FRAMES",
+                        help="versus: frames of prediction before waiting for the opponent")
+    parser.add_argument("--net-loss", type=float, default=0.0, metavar="FRACTION",
+                        help="versus: drop this fraction of outgoing packets (testing)")
+    parser.add_argument("--net-delay", type=int, default=0, metavar="MS",
+                        help="versus: hold outgoing packets back this long (testing)")
+    parser.add_argument("--tournament", type=int, metavar="COUNT", default=None,
+                        help="play COUNT games at once, tiled on one window")
+    parser.add_argument("--tournament-replays", nargs="+", metavar="FILE", default=None,
+                        help="tournament: replays for the first games (the autopilot plays the rest)")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    args = parse_args()
+    benchmark = args.bench_draw is not None or args.bench_update is not None
+    window_size = tuple(int(part) for part in args.window.split("x")) if args.window else None
+    render_scale = args.render_scale if args.render_scale == "dynamic" else float(args.render_scale)
+    if args.versus:
+        run_versus(args, window_size)
+    if args.tournament:
+        run_tournament(args, window_size)
+    game = Game(seed=0 if benchmark else args.seed, backend=args.backend,
+                input_mode=args.input_mode, smoothing=args.smoothing,
+                pacing=args.pacing, fps=args.fps, level_set=args.levels,
+                window_size=window_size, fullscreen=args.fullscreen, scaling=args.scaling,
+                render_scale=render_scale)
+    if args.particles != "rects":
+        game.set_particle_mode(args.particles)
+    if args.mega_balls:
+        game.enable_mega_balls(args.mega_balls)
+    if args.bullet_hell:
+        game.enable_bullet_hell()
+    if args.autopilot:
+        game.enable_autopilot()
+    if benchmark:
+        random.seed(0)
+        # No frame loop to drain deferred work: finish it and run the rest inline
+        game.scheduler.flush()
+        game.scheduler.active = False
+        if args.bench_draw is not None:
+            game.benchmark_draw(args.bench_draw)
+        if args.bench_update is not None:
+            game.benchmark_update(args.bench_update)
+        pygame.quit()
+        sys.exit()
+    game.profiler = FrameProfiler(args.profile, args.profile_frames, args.profile_out)
+    if args.profile_range:
+        start, end = (int(part) for part in args.profile_range.split(":"))
+        game.profiler.arm(start, end)
+    if args.track_allocations:
+        game.start_allocation_tracking(args.track_allocations)
+    if args.telemetry:
+        game.start_telemetry(args.telemetry, args.telemetry_format, args.telemetry_prom)
+    if args.capture:
+        game.start_capture(args.capture, args.capture_format, args.capture_slots)
+    # Replays and autopilot runs never reach the leaderboard
+    if not (args.no_scores or args.replay or args.autopilot):
+        game.start_score_store(args.scores or default_scores_path())
+    if args.spectate_port is not None:
+        game.start_spectator_server(args.spectate_host, args.spectate_port)
+    if args.replay:
+        game.start_playback(args.replay, args.seek)
+    if args.record:
+        game.start_recording(args.record)
+    if args.threaded:
+        game.run_threaded(args.tick_rate)
+    else:
+        game.run()
\ No newline at end of file
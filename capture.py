@@ -0,0 +1,156 @@
+"""Live frame capture through a memory-mapped ring file.
+
+Saving a PNG from the game loop costs tens of milliseconds a frame. Instead,
+FrameCapture preallocates a ring of frame-sized slots in a memory-mapped
+scratch file, and after every flip the game thread copies the display
+surface's pixel buffer (Surface.get_buffer, no conversion) into the next
+free slot: one bulk memcpy. A background thread encodes finished slots in
+order and frees them. If it falls a whole ring behind, new frames are
+dropped and counted instead of the game waiting.
+
+Encoders:
+
+    png  numbered image sequence, prefix_000123.png
+    raw  one prefix.bbv container: b"BBVC", version, width, height, pitch,
+         bytes per pixel and RGBA masks (see HEADER), then per frame its
+         number and length (FRAME) followed by zlib-compressed slot bytes
+         in the display's pixel format; read_raw() decodes it
+
+zlib and image saving do their heavy lifting with the GIL released, so the
+encoder thread runs alongside the game.
+"""
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+import pygame
+
+MAGIC = b"BBVC"
+VERSION = 1
+HEADER = struct.Struct("<4sBHHIB4I")  # magic, version, width, height, pitch, bytes per pixel, masks
+FRAME = struct.Struct("<II")          # frame number, compressed length
+CAPTURE_FORMATS = ["png", "raw"]
+
+
+def _write_pixels(surface, pixels, pitch):
+    """Copy raw rows of `pitch` bytes into a surface with the same format"""
+    target = surface.get_buffer()
+    target_pitch = surface.get_pitch()
+    if target_pitch == pitch:
+        target.write(pixels)
+    else:
+        width, height = surface.get_size()
+        row = width * surface.get_bytesize()
+        for y in range(height):
+            target.write(pixels[y * pitch:y * pitch + row], y * target_pitch)
+
+
+class FrameCapture:
+    """Ring of raw frames in a memory-mapped file, drained by an encoder thread"""
+    def __init__(self, surface, prefix, fmt="png", slots=120, compression=1):
+        if fmt not in CAPTURE_FORMATS:
+            raise ValueError(f"Unknown capture format {fmt!r}")
+        self.surface = surface
+        self.prefix = prefix
+        self.fmt = fmt
+        self.slots = slots
+        self.compression = compression
+        self.size = surface.get_size()
+        self.pitch = surface.get_pitch()
+        self.frame_bytes = self.pitch * self.size[1]
+
+        # Scratch ring file, sized up front
+        self.ring_path = prefix + ".ring"
+        self.ring_file = open(self.ring_path, "w+b")
+        self.ring_file.truncate(self.frame_bytes * slots)
+        self.ring = mmap.mmap(self.ring_file.fileno(), self.frame_bytes * slots)
+        self.frame_numbers = [0] * slots
+
+        self.head = 0      # Frames copied in (only the game thread writes this)
+        self.tail = 0      # Frames encoded (only the encoder writes this)
+        self.dropped = 0
+        self.enabled = True
+        self.running = True
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self.thread.start()
+        print(f"Capturing {self.size[0]}x{self.size[1]} frames as {fmt} to {prefix} "
+              f"({slots}-frame ring, {self.frame_bytes * slots // (1024 * 1024)} MiB)")
+
+    # Game thread
+
+    def capture(self, frame):
+        """Copy the presented frame into the ring; drops it if the ring is full"""
+        if not self.enabled:
+            return False
+        head = self.head
+        if head - self.tail >= self.slots:
+            self.dropped += 1
+            return False
+        slot = head % self.slots
+        offset = slot * self.frame_bytes
+        self.ring[offset:offset + self.frame_bytes] = self.surface.get_buffer()
+        self.frame_numbers[slot] = frame
+        self.head = head + 1
+        self.wake.set()
+        return True
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        self.thread.join(timeout=30.0)
+        self.ring.close()
+        self.ring_file.close()
+        os.remove(self.ring_path)
+        print(f"Capture: {self.tail} frames encoded, {self.dropped} dropped")
+
+    # Encoder thread
+
+    def _run(self):
+        if self.fmt == "raw":
+            out = open(self.prefix + ".bbv", "wb")
+            out.write(HEADER.pack(MAGIC, VERSION, self.size[0], self.size[1], self.pitch,
+                                  self.surface.get_bytesize(), *self.surface.get_masks()))
+        else:
+            out = None
+            # Same pixel format and pitch as the display, so a slot copies straight in
+            image = pygame.Surface(self.size, 0, self.surface)
+
+        while True:
+            self.wake.wait(0.1)
+            self.wake.clear()
+            while self.tail < self.head:
+                slot = self.tail % self.slots
+                offset = slot * self.frame_bytes
+                pixels = self.ring[offset:offset + self.frame_bytes]
+                frame = self.frame_numbers[slot]
+                self.tail += 1  # Slot copied out; the game may reuse it
+                if out is not None:
+                    data = zlib.compress(pixels, self.compression)
+                    out.write(FRAME.pack(frame, len(data)))
+                    out.write(data)
+                else:
+                    _write_pixels(image, pixels, self.pitch)
+                    pygame.image.save(image, f"{self.prefix}_{frame:06d}.png")
+            if not self.running:
+                break
+        if out is not None:
+            out.close()
+
+
+def read_raw(path):
+    """Yield (frame number, Surface) from a raw capture file"""
+    with open(path, "rb") as f:
+        magic, version, width, height, pitch, bytesize, *masks = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a capture file")
+        while True:
+            head = f.read(FRAME.size)
+            if len(head) < FRAME.size:
+                return
+            frame, length = FRAME.unpack(head)
+            surface = pygame.Surface((width, height), 0, bytesize * 8, masks)
+            _write_pixels(surface, zlib.decompress(f.read(length)), pitch)
+            yield frame, surface
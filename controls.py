@@ -0,0 +1,112 @@
+"""Event-driven input sampling with input-to-display latency measurement.
+
+The paddle used to follow a mouse position read once per frame and then eased
+only 30% of the way there inside the simulation. InputTracker instead follows
+MOUSEMOTION events as they are drained, stamping each one, and hands the
+newest position to the simulation right before the tick that uses it. In
+"direct" mode that position goes to the paddle unchanged; "smooth" mode runs
+it through an exponential filter first. Filtering happens here rather than
+in Game.handle_input, so replays record the filtered position and play back
+the same whatever mode the viewer uses. The sample is handed over in fixed
+point (see fixed.py), so the eased position keeps its fraction of a pixel.
+
+Mouse positions are mapped from window to logical game coordinates here too
+(see render.ScaledCanvas), so handle_input and replays never see the window
+size or the letterbox offset.
+
+Every input event stays pending until the frame it fed into is flipped to the
+screen; the time from event to flip is kept for percentile reporting. Where
+the event carries SDL's timestamp that's when SDL queued it. pygame 2.x
+events don't carry one, so there the clock starts when the queue is drained
+and the time an event sat in the queue isn't counted; report() says which.
+"""
+import time
+from collections import deque
+
+import pygame
+
+from fixed import to_fixed
+
+INPUT_MODES = ["direct", "smooth"]
+
+
+class InputTracker:
+    """Latest-sample mouse tracking plus event-to-flip latency statistics"""
+    def __init__(self, mode="direct", smoothing=0.3, dead_zone=2, history=2000):
+        self.mode = mode
+        self.smoothing = smoothing  # Fraction of the distance covered per tick
+        self.dead_zone = dead_zone  # Ignore smaller moves to prevent jittering
+        self.mouse_x = None
+        self.filtered_x = None
+        self.to_logical = None  # Window -> game coordinates when the canvas scales itself
+
+        # Perf-counter times of events not yet shown on screen
+        self.pending = []
+        self.latencies = deque(maxlen=history)
+        self.stamped = 0  # Events timed from SDL's own timestamp rather than the drain
+
+    def _event_time(self, event, now):
+        """When SDL queued the event, on the perf_counter clock.
+
+        SDL stamps events in milliseconds since init, but pygame 2.x doesn't
+        pass the stamp on; then this is the time the queue was drained, which
+        leaves out however long the event waited in it.
+        """
+        stamp = getattr(event, "timestamp", None)
+        if not stamp:
+            return now
+        self.stamped += 1
+        return min(now, now - (pygame.time.get_ticks() - stamp) / 1000.0)
+
+    def process(self, events):
+        """Take the input events out of one drained SDL event queue"""
+        now = time.perf_counter()
+        for event in events:
+            if event.type == pygame.MOUSEMOTION:
+                self.mouse_x = self._logical_x(event.pos)
+                self.pending.append(self._event_time(event, now))
+            elif event.type == pygame.KEYDOWN:
+                self.pending.append(self._event_time(event, now))
+
+    def _logical_x(self, pos):
+        if self.to_logical is None:
+            return pos[0]
+        return int(self.to_logical(*pos)[0])
+
+    def sample_x(self):
+        """Fixed-point mouse x for the coming tick, filtered in smooth mode"""
+        if self.mouse_x is None:
+            self.mouse_x = self._logical_x(pygame.mouse.get_pos())
+        if self.mode != "smooth" or self.filtered_x is None:
+            self.filtered_x = float(self.mouse_x)
+        else:
+            diff = self.mouse_x - self.filtered_x
+            if abs(diff) > self.dead_zone:
+                self.filtered_x += diff * self.smoothing
+        return to_fixed(self.filtered_x)
+
+    def presented(self):
+        """Call right after a flip that showed the latest input"""
+        if not self.pending:
+            return
+        now = time.perf_counter()
+        for event_time in self.pending:
+            self.latencies.append(now - event_time)
+        self.pending.clear()
+
+    def percentiles(self, points=(50, 95, 99)):
+        """Latency percentiles in milliseconds, or None before any samples"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        last = len(ordered) - 1
+        return {point: ordered[min(last, int(round(point / 100 * last)))] * 1000 for point in points}
+
+    def report(self):
+        stats = self.percentiles()
+        if stats is None:
+            return "Input latency: no samples"
+        start = "event" if self.stamped else "queue drain"
+        return (f"Input latency ({start} to flip, {self.mode}): "
+                + ", ".join(f"p{point} {value:.1f} ms" for point, value in stats.items())
+                + f" over {len(self.latencies)} events")
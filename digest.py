@@ -0,0 +1,264 @@
+"""Per-frame gameplay digests, and a harness that checks a candidate engine
+against the reference one.
+
+Game.state_digest() is a crc32 over the snapshot_into bytes: the header
+(game state, level, score, lives, RNG position, frame), paddle, balls,
+bricks, boss, projectiles and power-ups. Snapshots leave particles out, so
+cosmetic effects never show up in a digest. Packing the bricks is most of
+the work and they only change when one is hit or the layout is replaced, so
+their section is hashed once and its crc reused until then.
+
+StateDigest carries one running value, each frame's crc continuing from the
+last. Two runs with the same final digest agreed on every frame along the
+way, so a benchmark can print a single number to hold against another
+engine's run. Every `full_interval` frames the bricks are re-packed
+regardless, which catches an engine that changes them without going through
+Brick.hit.
+
+compare() steps a reference and a candidate game on the same seed and input
+(a replay file, or the autopilot playing the reference) and stops at the
+first frame whose digests differ. Both games are then snapshotted and the
+snapshots decoded field by field, so the report names exactly what differs:
+
+    python digest.py --candidate fastphysics:FastGame --frames 20000
+    python digest.py --candidate fastphysics:FastGame --replay run.bbr
+
+The candidate is any Game subclass or factory taking Game's keyword
+arguments; without one the reference is checked against itself.
+"""
+import argparse
+import importlib
+import os
+import struct
+import sys
+import time
+
+MAX_REPORTED_FIELDS = 20
+
+# Field names for the snapshot layouts in brick_breaker.py, in struct order
+HEADER_FIELDS = ("version", "state", "level", "score", "lives", "use_mouse", "flags", "rng", "frame")
+PADDLE_FIELDS = ("x", "y", "width", "height", "powerup_timer", "shield_timer", "powerup")
+BALL_FIELDS = ("x", "y", "vx", "vy", "type", "pierce", "life", "damage", "trail", "r", "g", "b")
+MEGA_BALL_FIELDS = ("x", "y", "vx", "vy", "type", "pierce", "life", "damage")
+BRICK_FIELDS = ("x", "y", "width", "height", "r", "g", "b", "original_r", "original_g", "original_b",
+                "destroyed", "hits_required", "hits_taken")
+BOSS_FIELDS = ("x", "y", "width", "height", "health", "max_health", "speed", "direction", "shoot_timer",
+               "destroyed", "r", "g", "b")
+PROJECTILE_FIELDS = ("x", "y", "vx", "vy")
+BOSS_ATTACK_FIELDS = ("intensity", "attack", "timer", "phase")
+POWERUP_FIELDS = ("x", "y", "vy", "type", "active")
+STORE_RECORD = struct.Struct("<qqqq")  # ProjectileStore.pack_into: x, y, vx, vy
+
+
+class StateDigest:
+    """Running digest of one game's state, updated once per frame"""
+    def __init__(self, game, full_interval=60):
+        self.game = game
+        self.full_interval = full_interval
+        self.value = 0
+        self.frames = 0
+        self.seconds = 0.0
+
+    def update(self):
+        """Fold in the state as it is now; returns the running digest"""
+        start = time.perf_counter()
+        full = bool(self.full_interval) and self.frames % self.full_interval == 0
+        self.value = self.game.state_digest(self.value, full)
+        self.frames += 1
+        self.seconds += time.perf_counter() - start
+        return self.value
+
+    def cost_ms(self):
+        """Average time per update so far"""
+        return self.seconds * 1000 / max(1, self.frames)
+
+
+def state_fields(data, layouts):
+    """{field name: value} for a snapshot, e.g. "score", "balls[2].vx",
+    "bricks[17].hits_taken". `layouts` is the module holding the STATE_*
+    structs (brick_breaker)."""
+    fields = {}
+    offset = 0
+
+    def read(layout, names, prefix):
+        nonlocal offset
+        for name, value in zip(names, layout.unpack_from(data, offset)):
+            fields[prefix + name] = value
+        offset += layout.size
+
+    def read_count():
+        nonlocal offset
+        count, = layouts.STATE_COUNT.unpack_from(data, offset)
+        offset += layouts.STATE_COUNT.size
+        return count
+
+    read(layouts.STATE_HEADER, HEADER_FIELDS, "")
+    flags = fields["flags"]
+    read(layouts.PADDLE_STATE, PADDLE_FIELDS, "paddle.")
+    if flags & layouts.STATE_MEGA_BALLS:
+        fields["mega_start_balls"] = read_count()
+        for i in range(read_count()):
+            read(layouts.MEGA_BALL_STATE, MEGA_BALL_FIELDS, f"balls[{i}].")
+    else:
+        for i in range(read_count()):
+            read(layouts.BALL_STATE, BALL_FIELDS, f"balls[{i}].")
+    for i in range(read_count()):
+        read(layouts.BRICK_STATE, BRICK_FIELDS, f"bricks[{i}].")
+    if read_count():
+        read(layouts.BOSS_STATE, BOSS_FIELDS, "boss.")
+    for i in range(read_count()):
+        read(layouts.PROJECTILE_STATE, PROJECTILE_FIELDS, f"projectiles[{i}].")
+    if flags & layouts.STATE_BULLET_HELL:
+        read(layouts.BOSS_ATTACK_STATE, BOSS_ATTACK_FIELDS, "boss_attacks.")
+        for i in range(read_count()):
+            read(STORE_RECORD, PROJECTILE_FIELDS, f"bullets[{i}].")
+    for i in range(read_count()):
+        read(layouts.POWERUP_STATE, POWERUP_FIELDS, f"powerups[{i}].")
+    return fields
+
+
+def field_diff(reference, candidate):
+    """[(field, reference value, candidate value)] for every field that
+    differs; None stands for a field only one side has"""
+    names = list(reference) + [name for name in candidate if name not in reference]
+    return [(name, reference.get(name), candidate.get(name)) for name in names
+            if reference.get(name) != candidate.get(name)]
+
+
+class Divergence:
+    """Where a candidate first stopped matching the reference"""
+    def __init__(self, frame, fields):
+        self.frame = frame
+        self.fields = fields  # field_diff output
+
+    def report(self):
+        lines = [f"Diverged at frame {self.frame}:"]
+        for name, expected, actual in self.fields[:MAX_REPORTED_FIELDS]:
+            lines.append(f"  {name:<28} reference {expected!s:>14}   candidate {actual!s:>14}")
+        if len(self.fields) > MAX_REPORTED_FIELDS:
+            lines.append(f"  ... {len(self.fields) - MAX_REPORTED_FIELDS} more fields")
+        return "\n".join(lines)
+
+
+class _Both:
+    """Passes replay keyframes on to both games"""
+    def __init__(self, *games):
+        self.games = games
+
+    def load_state(self, data, offset=0):
+        for game in self.games:
+            game.load_state(data, offset)
+
+
+def autopilot_inputs(game, frames):
+    """(frame_input, key_events) from the autopilot playing `game`"""
+    for _ in range(frames):
+        yield game.autopilot.control(game), game.autopilot.keys(game)
+
+
+def replay_inputs(reader, games, frames=None):
+    """(frame_input, key_events) from a replay, loading its keyframes
+    into every game as playback would"""
+    both = _Both(*games)
+    for game in games:
+        game.seed = reader.seed
+        game.set_level_set(reader.level_set)
+    reader.seek(both, 0)
+    for frame, frame_input, key_events in reader.play(both):
+        if frames is not None and frame >= frames:
+            return
+        yield frame_input, key_events
+
+
+def compare(reference, candidate, inputs, layouts):
+    """Step both games through `inputs` and digest them after every frame.
+
+    Returns (Divergence or None, stats). Bricks are re-packed every frame
+    here, so a divergence is caught on the frame it happens.
+    """
+    digests = (StateDigest(reference, 1), StateDigest(candidate, 1))
+    times = [0.0, 0.0]
+    frame = -1
+    for frame, (frame_input, key_events) in enumerate(inputs):
+        for i, game in enumerate((reference, candidate)):
+            start = time.perf_counter()
+            game.step(frame_input, key_events)
+            times[i] += time.perf_counter() - start
+        if digests[0].update() != digests[1].update():
+            fields = field_diff(state_fields(reference.save_state(), layouts),
+                                state_fields(candidate.save_state(), layouts))
+            return Divergence(frame, fields), None
+    frames = frame + 1
+    return None, {
+        "frames": frames,
+        "digest": digests[0].value,
+        "reference_ms": times[0] * 1000 / max(1, frames),
+        "candidate_ms": times[1] * 1000 / max(1, frames),
+        "digest_ms": digests[0].cost_ms(),
+    }
+
+
+def _headless():
+    """No window or sound device needed; set before pygame is imported"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+
+def _load(spec):
+    """MODULE:NAME -> the object it names"""
+    module, _, name = spec.partition(":")
+    if not name:
+        raise ValueError(f"Expected MODULE:NAME, got {spec!r}")
+    return getattr(importlib.import_module(module), name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check a candidate engine against the reference Game")
+    parser.add_argument("--candidate", metavar="MODULE:NAME", default=None,
+                        help="Game subclass or factory to check (default: the reference itself)")
+    parser.add_argument("--replay", metavar="FILE", default=None,
+                        help="drive both games from a replay instead of the autopilot")
+    parser.add_argument("--frames", type=int, default=3600, help="frames to run (default 3600)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for autopilot runs")
+    parser.add_argument("--levels", default="classic", help="level set for autopilot runs")
+    parser.add_argument("--mega-balls", type=int, metavar="COUNT", default=None,
+                        help="run both games in mega multi-ball mode")
+    parser.add_argument("--bullet-hell", action="store_true", help="run both games with bullet-hell bosses")
+    args = parser.parse_args()
+
+    _headless()
+    import brick_breaker
+    from replay import ReplayReader
+
+    reference = brick_breaker.Game(seed=args.seed, pacing="none", level_set=args.levels)
+    factory = _load(args.candidate) if args.candidate else brick_breaker.Game
+    # Headless, so the candidate can share the reference's (unused) window
+    candidate = factory(seed=args.seed, pacing="none", level_set=args.levels, canvas=reference.canvas)
+    games = (reference, candidate)
+    for game in games:
+        game.scheduler.active = False  # No frame loop here to drain it
+        if args.mega_balls:
+            game.enable_mega_balls(args.mega_balls)
+        if args.bullet_hell:
+            game.enable_bullet_hell()
+
+    if args.replay:
+        inputs = replay_inputs(ReplayReader(args.replay), games, args.frames)
+    else:
+        reference.enable_autopilot()
+        for game in games:
+            game.start_game()
+            game.lives = args.frames  # Keep the run going however many serves are lost
+        inputs = autopilot_inputs(reference, args.frames)
+
+    divergence, stats = compare(reference, candidate, inputs, brick_breaker)
+    if divergence is not None:
+        print(divergence.report())
+        sys.exit(1)
+    print(f"Identical over {stats['frames']} frames, final digest {stats['digest']:08x}")
+    print(f"  reference {stats['reference_ms']:.3f} ms per frame, candidate {stats['candidate_ms']:.3f} ms, "
+          f"digest {stats['digest_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
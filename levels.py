@@ -0,0 +1,127 @@
+"""Endless procedural levels and background level preparation.
+
+LevelGenerator turns (seed, level) into a brick layout in the style of the
+hand-made classic levels: full walls, diagonal gaps, diamonds, checkerboards,
+stripes and pyramids, with hit counts graded by row or by distance from the
+centre, and a boss every few levels. Each level draws from its own
+random.Random seeded with the game seed and level number, so layouts never
+touch the gameplay RNG and come out the same on any thread, in any order.
+
+LevelPrefetcher runs a builder function on a worker thread, so the next
+level's bricks (and its pre-rendered brick sprites) are ready before the
+current level is cleared.
+"""
+import queue
+import random
+import threading
+
+PATTERNS = ["full", "gaps", "diamond", "checker", "stripes", "pyramid"]
+
+
+class LevelGenerator:
+    """Seeded, unbounded brick layouts"""
+    def __init__(self, seed, brick_size, colors, columns=10, spacing=5, left=35, top=50,
+                 boss_every=3):
+        self.seed = seed
+        self.brick_width, self.brick_height = brick_size
+        self.colors = colors
+        self.columns = columns
+        self.spacing = spacing
+        self.left = left
+        self.top = top
+        self.boss_every = boss_every
+
+    def is_boss_level(self, level):
+        return level % self.boss_every == 0
+
+    def boss_health(self, level):
+        """Bosses get tougher each time they come round"""
+        return 50 + 15 * (level // self.boss_every - 1)
+
+    def layout(self, level):
+        """(x, y, color, hits) for every brick in `level`"""
+        rng = random.Random(f"{self.seed}:{level}")
+        if self.is_boss_level(level):
+            return self._boss_support(rng, level)
+
+        rows = min(8, 4 + level // 3 + rng.randint(0, 1))
+        max_hits = min(6, 1 + level // 2)
+        pattern = rng.choice(PATTERNS)
+        gap = rng.randint(2, 4)
+        center_row, center_col = rows // 2, self.columns // 2
+        grade_by_center = pattern in ("diamond", "pyramid") or rng.random() < 0.3
+
+        bricks = []
+        for row in range(rows):
+            for col in range(self.columns):
+                distance = abs(row - center_row) + abs(col - center_col)
+                if pattern == "gaps" and (row + col) % gap == 0:
+                    continue
+                if pattern == "diamond" and distance > rows // 2 + 2:
+                    continue
+                if pattern == "checker" and (row + col) % 2:
+                    continue
+                if pattern == "stripes" and col % gap == 0:
+                    continue
+                if pattern == "pyramid" and abs(col - center_col + 0.5) > row + 1:
+                    continue
+
+                # Harder towards the top, or towards the centre
+                if grade_by_center:
+                    hits = max_hits - distance * max_hits // (rows + center_col)
+                else:
+                    hits = max_hits - row * max_hits // rows
+                hits = max(1, min(max_hits, hits))
+
+                x = col * (self.brick_width + self.spacing) + self.left
+                y = row * (self.brick_height + self.spacing) + self.top
+                bricks.append((x, y, self.colors[row % len(self.colors)], hits))
+        return bricks
+
+    def _boss_support(self, rng, level):
+        """Flanking support bricks, leaving the middle free for the boss"""
+        bricks = []
+        rows = 2 + min(2, level // (self.boss_every * 3))
+        hits = min(5, 2 + level // (self.boss_every * 2))
+        for row in range(rows):
+            for col in range(8):
+                if 2 <= col <= 5 or rng.random() < 0.15:
+                    continue
+                x = col * (self.brick_width + 10) + 50
+                y = row * (self.brick_height + 10) + 250
+                bricks.append((x, y, self.colors[row % len(self.colors)], hits + (row == 0)))
+        return bricks
+
+
+class LevelPrefetcher:
+    """Builds requested levels on a worker thread for later pickup"""
+    def __init__(self, build, keep=4):
+        self.build = build  # build(key) -> prepared level
+        self.keep = keep
+        self.requests = queue.SimpleQueue()
+        self.ready = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def request(self, key):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="level-prefetch", daemon=True)
+            self.thread.start()
+        self.requests.put(key)
+
+    def take(self, key):
+        """The prepared level for `key`, or None if it isn't ready yet"""
+        with self.lock:
+            return self.ready.pop(key, None)
+
+    def _run(self):
+        while True:
+            key = self.requests.get()
+            with self.lock:
+                if key in self.ready:
+                    continue
+            prepared = self.build(key)
+            with self.lock:
+                self.ready[key] = prepared
+                while len(self.ready) > self.keep:
+                    self.ready.pop(next(iter(self.ready)))
@@ -0,0 +1,152 @@
+"""Frame pacing for the display loop.
+
+FramePacer replaces clock.tick(60). It keeps an absolute deadline per frame
+rather than sleeping "period minus this frame's work", so small oversleeps
+don't pile up, and it offers several ways to wait for that deadline:
+
+    sleep   time.sleep until the deadline (cheap, at the mercy of OS timer
+            granularity)
+    hybrid  sleep until shortly before the deadline, then spin on
+            perf_counter for the rest (smooth, burns a little CPU)
+    busy    pygame's Clock.tick_busy_loop
+    vsync   don't wait at all; the display flip blocks until vblank (the
+            canvas must be created with vsync on)
+    none    unthrottled, for headless and benchmark runs
+
+Whatever the strategy, the interval between successive frame starts is
+recorded so pacing quality can be compared: a fixed-bin histogram for the
+whole run, and a window of recent intervals for percentile jitter. A frame
+counts as missed when its interval overshoots the period by more than half a
+period, which is what a dropped refresh looks like on screen.
+"""
+import time
+from collections import deque
+
+import pygame
+
+PACING_STRATEGIES = ["sleep", "hybrid", "busy", "vsync", "none"]
+
+
+class FramePacer:
+    """Waits for each frame deadline and keeps frame interval statistics"""
+    def __init__(self, fps=60, strategy="sleep", spin_margin=0.002, window=600,
+                 bin_ms=0.5, bins=100):
+        if strategy not in PACING_STRATEGIES:
+            raise ValueError(f"Unknown pacing strategy {strategy!r}")
+        self.fps = fps
+        self.period = 1.0 / fps
+        self.strategy = strategy
+        self.spin_margin = spin_margin  # Hybrid: how long before the deadline to start spinning
+        self.clock = pygame.time.Clock()
+
+        self.deadline = None
+        self.last_frame = None
+        self.frames = 0
+        self.missed = 0
+        self.recent = deque(maxlen=window)  # Recent intervals in seconds
+        self.bin_ms = bin_ms
+        self.histogram = [0] * (bins + 1)   # Last bin collects everything longer
+
+    def wait(self):
+        """Block until the next frame should start, then record its interval"""
+        strategy = self.strategy
+        if strategy == "busy":
+            self.clock.tick_busy_loop(self.fps)
+        elif strategy in ("sleep", "hybrid"):
+            now = time.perf_counter()
+            if self.deadline is None:
+                self.deadline = now
+            self.deadline += self.period
+            remaining = self.deadline - now
+            if remaining > 0:
+                if strategy == "sleep":
+                    time.sleep(remaining)
+                else:
+                    if remaining > self.spin_margin:
+                        time.sleep(remaining - self.spin_margin)
+                    while time.perf_counter() < self.deadline:
+                        pass
+            elif remaining < -self.period:
+                # Too far behind; restart the schedule instead of rushing
+                # a burst of frames to catch up
+                self.deadline = now
+        self._record(time.perf_counter())
+
+    def _record(self, now):
+        if self.last_frame is not None:
+            interval = now - self.last_frame
+            self.frames += 1
+            self.recent.append(interval)
+            self.histogram[min(len(self.histogram) - 1, int(interval * 1000 / self.bin_ms))] += 1
+            if self.strategy != "none" and interval > self.period * 1.5:
+                self.missed += 1
+        self.last_frame = now
+
+    def stats(self):
+        """Summary of pacing so far; times in milliseconds.
+
+        Jitter is how far recent intervals were from the target period.
+        "histogram" counts every interval of the run: bin i holds intervals
+        from i * bin_ms up to (i + 1) * bin_ms, and the last bin everything
+        longer.
+        """
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        jitter = sorted(abs(interval - self.period) for interval in self.recent)
+        last = len(ordered) - 1
+
+        def pick(values, point):
+            return values[min(last, int(round(point / 100 * last)))] * 1000
+
+        mean = sum(ordered) / len(ordered)
+        return {
+            "strategy": self.strategy,
+            "target_fps": self.fps,
+            "fps": 1.0 / mean if mean > 0 else 0.0,
+            "frames": self.frames,
+            "missed": self.missed,
+            "interval_mean": mean * 1000,
+            "interval_p50": pick(ordered, 50),
+            "interval_p99": pick(ordered, 99),
+            "interval_max": ordered[-1] * 1000,
+            "jitter_p50": pick(jitter, 50),
+            "jitter_p95": pick(jitter, 95),
+            "jitter_p99": pick(jitter, 99),
+            "bin_ms": self.bin_ms,
+            "histogram": list(self.histogram),
+        }
+
+    def hud_lines(self):
+        stats = self.stats()
+        if stats is None:
+            return [f"Pacing: {self.strategy}"]
+        return [
+            f"{stats['fps']:.1f}/{self.fps} fps ({self.strategy})",
+            f"jitter p50 {stats['jitter_p50']:.2f} p99 {stats['jitter_p99']:.2f} ms",
+            f"max {stats['interval_max']:.1f} ms, missed {stats['missed']}",
+        ]
+
+    def histogram_lines(self, width=40):
+        """The non-empty histogram bins as text bars"""
+        peak = max(self.histogram)
+        if not peak:
+            return []
+        lines = []
+        last = len(self.histogram) - 1
+        for i, count in enumerate(self.histogram):
+            if not count:
+                continue
+            low = i * self.bin_ms
+            label = f">= {low:.1f} ms" if i == last else f"{low:.1f}-{low + self.bin_ms:.1f} ms"
+            lines.append(f"  {label:>14} {count:>7} {'#' * max(1, round(count * width / peak))}")
+        return lines
+
+    def report(self):
+        stats = self.stats()
+        if stats is None:
+            return "Frame pacing: no frames"
+        summary = (f"Frame pacing ({self.strategy} @ {self.fps} fps): {stats['frames']} frames, "
+                   f"{stats['missed']} missed, jitter p50 {stats['jitter_p50']:.2f} ms "
+                   f"p95 {stats['jitter_p95']:.2f} ms p99 {stats['jitter_p99']:.2f} ms")
+        return "\n".join([summary, "Frame intervals:"] + self.histogram_lines())
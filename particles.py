@@ -0,0 +1,202 @@
+"""NumPy particle store and rasterizer.
+
+ParticleSystem normally keeps one Particle object per spark and draws each
+with its own alpha_rect, so a big explosion costs thousands of Python-level
+calls to update and draw. In the "alpha" and "additive" particle modes it
+keeps them in a ParticleField instead: preallocated arrays of position,
+velocity, life, size and colour, updated with whole-array operations and
+drawn by splat() in one go. The rules are the ones Particle uses: gravity
+0.1 px per frame, and a square of half-size max(1, size * life / max_life)
+faded to alpha life / max_life.
+
+splat() builds one small layer surface per square size, the particles of
+that size side by side with their colour (and alpha), then draws them all
+with a single Surface.blits() call in particle order, which SDL clips to the
+target. The Python-level work is a few array operations per square size and
+one tuple per particle; the per-pixel blending happens inside SDL:
+
+    additive  BLEND_ADD of colour * alpha, saturating at 255
+    alpha     per-pixel-alpha blit, the same blend alpha_rect does (to within
+              rounding), in the same order
+
+Canvases without a pixel surface (the SDL2 renderer) get one alpha_rect per
+particle, as before.
+
+draw_particle() is the one-particle version Particle.draw uses. A RenderFrame
+in threaded mode keeps only the PARTICLE_STATE tuple of each Particle and
+draws those with it, so the simulation thread never copies the objects.
+"""
+import operator
+from itertools import repeat
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import pygame
+
+GRAVITY = 0.1
+
+# The Particle attributes draw_particle takes, in its order
+PARTICLE_STATE = operator.attrgetter("x", "y", "size", "life", "max_life", "color")
+
+
+def draw_particle(canvas, x, y, size, life, max_life, color):
+    """One fading particle square, as Particle draws it"""
+    if life > 0:
+        alpha = int(255 * (life / max_life))
+        current_size = max(1, int(size * (life / max_life)))
+        canvas.alpha_rect(color, (int(x - current_size), int(y - current_size),
+                                  current_size * 2, current_size * 2), alpha)
+
+
+class ParticleField:
+    """Fixed-capacity structure-of-arrays store for cosmetic particles"""
+    def __init__(self, capacity=65536, additive=False):
+        self.capacity = capacity
+        self.additive = additive
+        self.count = 0
+        self.dropped = 0
+        self.random = np.random.default_rng()  # Cosmetic only, like the random module here
+
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.vx = np.zeros(capacity, np.float32)
+        self.vy = np.zeros(capacity, np.float32)
+        self.life = np.zeros(capacity, np.int16)
+        self.max_life = np.ones(capacity, np.int16)
+        self.size = np.zeros(capacity, np.float32)
+        self.color = np.zeros((capacity, 3), np.uint8)
+        self.columns = (self.x, self.y, self.vx, self.vy, self.life, self.max_life, self.size, self.color)
+
+    def __len__(self):
+        return self.count
+
+    def _reserve(self, count):
+        """Slice of free slots for up to `count` new particles"""
+        start = self.count
+        end = min(self.capacity, start + count)
+        self.dropped += count - (end - start)
+        self.count = end
+        return slice(start, end)
+
+    def burst(self, x, y, color, count, speed, life_low, life_high):
+        """`count` particles at (x, y) with velocities up to `speed` each way
+        and a life of life_low..life_high frames"""
+        new = self._reserve(count)
+        n = new.stop - new.start
+        if not n:
+            return
+        self.x[new] = x
+        self.y[new] = y
+        self.vx[new] = self.random.uniform(-speed, speed, n)
+        self.vy[new] = self.random.uniform(-speed, speed, n)
+        life = self.random.integers(life_low, life_high, n, endpoint=True)
+        self.life[new] = life
+        self.max_life[new] = life
+        self.size[new] = self.random.uniform(2, 5, n)
+        self.color[new] = color
+
+    def extend(self, particles):
+        """Take over Particle objects (switching away from the rects mode)"""
+        new = self._reserve(len(particles))
+        for i, particle in zip(range(new.start, new.stop), particles):
+            self.x[i], self.y[i] = particle.x, particle.y
+            self.vx[i], self.vy[i] = particle.velocity_x, particle.velocity_y
+            self.life[i], self.max_life[i] = particle.life, particle.max_life
+            self.size[i] = particle.size
+            self.color[i] = particle.color
+
+    def to_particles(self, particle_class):
+        """Hand the particles back as objects (switching to the rects mode)"""
+        particles = []
+        n = self.count
+        for x, y, vx, vy, life, max_life, size, color in zip(
+                self.x[:n].tolist(), self.y[:n].tolist(), self.vx[:n].tolist(), self.vy[:n].tolist(),
+                self.life[:n].tolist(), self.max_life[:n].tolist(), self.size[:n].tolist(),
+                self.color[:n].tolist()):
+            particle = particle_class(x, y, tuple(color), vx, vy, life)
+            particle.max_life = max_life
+            particle.size = size
+            particles.append(particle)
+        return particles
+
+    def update(self):
+        n = self.count
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.vy[:n] += GRAVITY
+        self.life[:n] -= 1
+        alive = np.flatnonzero(self.life[:n] > 0)
+        if len(alive) < n:
+            for column in self.columns:
+                column[:len(alive)] = column[alive]
+            self.count = len(alive)
+
+    def copy(self):
+        """Frozen copy of the live particles, for a RenderFrame"""
+        field = ParticleField.__new__(ParticleField)
+        field.additive = self.additive
+        field.count = field.capacity = self.count
+        field.x, field.y, field.vx, field.vy, field.life, field.max_life, field.size, field.color = (
+            column[:self.count].copy() for column in self.columns)
+        return field
+
+    def draw(self, canvas):
+        n = self.count
+        if not n:
+            return
+        fade = self.life[:n] / self.max_life[:n].astype(np.float32)
+        half = np.maximum(1, (self.size[:n] * fade).astype(np.int32))
+        left = (self.x[:n] - half).astype(np.int32)  # Truncated like int()
+        top = (self.y[:n] - half).astype(np.int32)
+        alpha = (255 * fade).astype(np.int32)  # Same steps as Particle.draw
+
+        surface = getattr(canvas, "surface", None)
+        if surface is None or surface.get_bytesize() < 3:
+            for i in range(n):
+                canvas.alpha_rect(tuple(self.color[i].tolist()),
+                                  (int(left[i]), int(top[i]), int(half[i]) * 2, int(half[i]) * 2), int(alpha[i]))
+            return
+        scale = getattr(canvas, "scale", 1.0)
+        width = half * 2
+        if scale != 1.0:
+            # Same rounding as ScaledCanvas._rect
+            left = np.round(left * scale).astype(np.int32)
+            top = np.round(top * scale).astype(np.int32)
+            width = np.maximum(1, np.round(width * scale).astype(np.int32))
+        splat(surface, left, top, width, self.color[:n], alpha / np.float32(255), self.additive)
+
+
+def splat(surface, left, top, width, colors, alpha, additive=False):
+    """Blend squares of side `width` with top-left (left, top), colours
+    (n, 3) and alpha 0..1 into `surface`; blit clips them to its edges"""
+    chosen = np.flatnonzero(alpha > 0)
+    count = len(chosen)
+    if not count:
+        return
+    left, top, width, colors, alpha = (column[chosen] for column in (left, top, width, colors, alpha))
+
+    # One layer per square size with the particles side by side, each as
+    # its own square; then one blits() call draws them all in order
+    sides, group = np.unique(width, return_inverse=True)
+    offset = np.empty(count, np.int32)
+    layers = []
+    for index, side in enumerate(sides.tolist()):
+        members = np.flatnonzero(group == index)
+        offset[members] = np.arange(len(members)) * side
+        size = (len(members) * side, side)
+        if additive:
+            layer = pygame.Surface(size)
+            shade = colors[members] * alpha[members, None] + 0.5
+        else:
+            layer = pygame.Surface(size, pygame.SRCALPHA)
+            shade = colors[members]
+            pygame.surfarray.pixels_alpha(layer)[:] = np.repeat(alpha[members] * 255 + 0.5, side)[:, None]
+        pygame.surfarray.pixels3d(layer)[:] = np.repeat(shade, side, axis=0)[:, None, :]
+        layers.append(layer)
+    flags = pygame.BLEND_ADD if additive else 0
+    widths = width.tolist()
+    surface.blits(zip([layers[index] for index in group.tolist()], zip(left.tolist(), top.tolist()),
+                      zip(offset.tolist(), repeat(0), widths, widths), repeat(flags)), doreturn=False)
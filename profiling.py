@@ -0,0 +1,124 @@
+"""CPU profiling for a window of game frames.
+
+FrameProfiler captures frames [start, end) in one of two modes:
+
+    cprofile  deterministic cProfile, switched on only inside Game.update and
+              Game.draw so event handling and frame pacing stay out of the
+              numbers. Written as a .pstats file (load it with pstats, snakeviz
+              or flameprof) plus a top-functions summary on stdout.
+    sampling  a background thread records the stack of every other thread at
+              a fixed interval. Costs almost nothing in the game thread and
+              sees everything, waits included. Written as a .collapsed file,
+              one "thread;outer;...;inner count" line per stack, ready for
+              flamegraph.pl, inferno or speedscope.
+
+A window is armed either live (F9 profiles the next N frames) or up front with
+a frame range, which together with a replay reproduces a particular moment
+exactly.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+
+PROFILE_MODES = ["cprofile", "sampling"]
+
+
+class FrameProfiler:
+    """Profiles update/draw over a range of simulation frames"""
+    def __init__(self, mode="cprofile", frames=300, prefix="profile", interval=0.001):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}")
+        self.mode = mode
+        self.frames = frames      # Window length when armed without an end
+        self.prefix = prefix
+        self.interval = interval  # Sampling period in seconds
+
+        self.start_frame = None
+        self.end_frame = None
+        self.active = False
+        self.profile = None
+        self.thread_id = None     # cProfile only follows the thread that started it
+        self.sampler = None
+        self.stacks = {}
+
+    def arm(self, start_frame, end_frame=None):
+        """Profile frames [start_frame, end_frame); default length is self.frames"""
+        if self.active:
+            return False
+        self.start_frame = start_frame
+        self.end_frame = end_frame if end_frame is not None else start_frame + self.frames
+        print(f"Profiler armed ({self.mode}) for frames {self.start_frame}-{self.end_frame}")
+        return True
+
+    def frame(self, frame):
+        """Called once per simulation frame, before it runs"""
+        if self.active:
+            if frame >= self.end_frame:
+                self._finish()
+        elif self.start_frame is not None and self.start_frame <= frame < self.end_frame:
+            self._start()
+
+    def enter(self):
+        if self.active and self.profile is not None and threading.get_ident() == self.thread_id:
+            self.profile.enable()
+
+    def exit(self):
+        if self.active and self.profile is not None and threading.get_ident() == self.thread_id:
+            self.profile.disable()
+
+    def _start(self):
+        self.active = True
+        if self.mode == "cprofile":
+            self.profile = cProfile.Profile()
+            self.thread_id = threading.get_ident()
+        else:
+            self.stacks = {}
+            self.sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+            self.sampler.start()
+
+    def _sample(self):
+        own = threading.get_ident()
+        while self.active:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                key = ";".join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            time.sleep(self.interval)
+
+    def _finish(self):
+        self.active = False
+        base = f"{self.prefix}-{self.start_frame}-{self.end_frame}"
+        if self.mode == "cprofile":
+            path = base + ".pstats"
+            self.profile.dump_stats(path)
+            summary = io.StringIO()
+            pstats.Stats(self.profile, stream=summary).sort_stats("cumulative").print_stats(20)
+            print(summary.getvalue())
+            self.profile = None
+        else:
+            self.sampler.join(timeout=1.0)
+            path = base + ".collapsed"
+            with open(path, "w") as f:
+                for stack, count in sorted(self.stacks.items()):
+                    f.write(f"{stack} {count}\n")
+            print(f"{sum(self.stacks.values())} samples, {len(self.stacks)} distinct stacks")
+        print(f"Profile written to {path}")
+        self.start_frame = self.end_frame = None
+
+    def close(self):
+        """Write out a window still running when the game exits"""
+        if self.active:
+            self.end_frame = "partial"
+            self._finish()
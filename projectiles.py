@@ -0,0 +1,210 @@
+"""Array-backed boss projectiles and bullet-hell attack patterns.
+
+The classic boss fires one Projectile object every two seconds. In bullet-hell
+mode every projectile is instead a slot in four preallocated int64 NumPy
+arrays (fixed-point position and velocity, see fixed.py), so thousands can be in flight: motion, off-screen
+culling and the paddle test are a handful of whole-array operations, and dead
+projectiles are dropped with one boolean compaction instead of list.remove.
+
+BossAttacks is the boss's attack script. It cycles through spreads (a wide
+fan), spirals (rotating arms fired every frame) and aimed bursts (tight
+volleys at the paddle), picking the next attack with the gameplay RNG so
+replays and snapshots stay deterministic. Density scales with the boss
+level: the level 6 spiral keeps well over 2,000 projectiles on screen.
+"""
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from fixed import FIXED_BITS, FIXED_ONE
+
+ATTACKS = ["spread", "spiral", "burst"]
+
+
+class ProjectileStore:
+    """Fixed-capacity structure-of-arrays store for boss projectiles"""
+    RECORD_SIZE = 32  # Bytes per projectile in pack_into
+
+    def __init__(self, capacity, screen_size, size=8, colors=((255, 165, 0), (255, 0, 0))):
+        self.capacity = capacity
+        self.screen_width, self.screen_height = screen_size
+        self.size = size
+        self.colors = colors  # Fill and outline for drawing without an atlas
+        self.count = 0
+
+        self.x = np.zeros(capacity, np.int64)
+        self.y = np.zeros(capacity, np.int64)
+        self.vx = np.zeros(capacity, np.int64)
+        self.vy = np.zeros(capacity, np.int64)
+        # Running number of each projectile in firing order; nothing in the
+        # game reads it, it lets spectators tell which ones went (spectator.py)
+        self.serial = np.zeros(capacity, np.int64)
+        self.fired = 0
+        self.columns = (self.x, self.y, self.vx, self.vy, self.serial)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def add_many(self, x, y, vx, vy):
+        """Append fixed-point projectiles from scalars or arrays; extras beyond
+        capacity are dropped. Returns how many were added."""
+        x, y, vx, vy = np.broadcast_arrays(x, y, vx, vy)
+        n = self.count
+        added = min(len(x), self.capacity - n)
+        serial = np.arange(self.fired, self.fired + added)
+        for column, values in zip(self.columns, (x, y, vx, vy, serial)):
+            column[n:n + added] = values[:added]
+        self.count += added
+        self.fired += added
+        return added
+
+    def fire(self, x, y, angles, speed):
+        """Fire one projectile per angle (radians, pi/2 is straight down) from
+        pixel (x, y); velocities are rounded to fixed point once, here"""
+        angles = np.asarray(angles, dtype=float)
+        vx = np.rint(np.cos(angles) * (speed * FIXED_ONE)).astype(np.int64)
+        vy = np.rint(np.sin(angles) * (speed * FIXED_ONE)).astype(np.int64)
+        return self.add_many(int(x) << FIXED_BITS, int(y) << FIXED_BITS, vx, vy)
+
+    def update(self, paddle):
+        """Move, cull off-screen projectiles and take out those that hit the
+        paddle. Returns the centres of the paddle hits."""
+        n = self.count
+        if not n:
+            return []
+        size = self.size
+        x, y = self.x[:n], self.y[:n]
+        x += self.vx[:n]
+        y += self.vy[:n]
+        px, py = x >> FIXED_BITS, y >> FIXED_BITS
+
+        # Same bounds as Projectile.update
+        dead = (px < 0) | (px > self.screen_width) | (py < 0) | (py > self.screen_height)
+        hits = (~dead & (px < paddle.right) & (px + size > paddle.left)
+                & (py < paddle.bottom) & (py + size > paddle.top))
+        points = []
+        if hits.any():
+            points = list(zip((px[hits] + size // 2).tolist(), (py[hits] + size // 2).tolist()))
+            dead |= hits
+        if dead.any():
+            keep = ~dead
+            live = int(np.count_nonzero(keep))
+            for column in self.columns:
+                column[:live] = column[:n][keep]
+            self.count = live
+        return points
+
+    def pack_into(self, buffer, offset):
+        """Write (x, y, vx, vy) int64 records for every projectile in one
+        copy; returns the end offset"""
+        n = self.count
+        records = np.column_stack((self.x[:n], self.y[:n], self.vx[:n], self.vy[:n])).astype("<i8")
+        end = offset + records.nbytes
+        buffer[offset:end] = records.tobytes()
+        return end
+
+    def load_from(self, data, offset, count):
+        """Inverse of pack_into; returns the end offset"""
+        records = np.frombuffer(data, "<i8", count * 4, offset).reshape(count, 4)
+        self.count = 0
+        self.add_many(*records.T)
+        return offset + records.nbytes
+
+    def copy(self):
+        """Detached copy of the live projectiles for drawing on another thread"""
+        clone = ProjectileStore.__new__(ProjectileStore)
+        clone.__dict__.update(self.__dict__)
+        n = self.count
+        clone.capacity = n
+        clone.x, clone.y = self.x[:n].copy(), self.y[:n].copy()
+        clone.vx, clone.vy = self.vx[:n].copy(), self.vy[:n].copy()
+        clone.serial = self.serial[:n].copy()
+        clone.columns = (clone.x, clone.y, clone.vx, clone.vy, clone.serial)
+        return clone
+
+    def entries(self):
+        """(serials, records) for spectators: each live projectile's serial
+        number, and int16 rows of pixel x, y and fixed-point vx, vy"""
+        n = self.count
+        records = np.column_stack((self.x[:n] >> FIXED_BITS, self.y[:n] >> FIXED_BITS,
+                                   self.vx[:n], self.vy[:n])).astype(np.int16)
+        return self.serial[:n].copy(), records
+
+    def draw(self, canvas, atlas=None, key=("projectile",)):
+        n = self.count
+        positions = zip((self.x[:n] >> FIXED_BITS).tolist(), (self.y[:n] >> FIXED_BITS).tolist())
+        entry = atlas.entries.get(key) if atlas else None
+        if entry is not None:
+            # One sprite for all of them: look it up once, not per projectile
+            area, (dx, dy) = entry
+            image, blit_area = atlas.image, canvas.blit_area
+            for x, y in positions:
+                blit_area(image, (x + dx, y + dy), area)
+            return
+        fill, outline = self.colors
+        size = self.size
+        for x, y in positions:
+            canvas.rect(fill, (x, y, size, size))
+            canvas.rect(outline, (x, y, size, size), 2)
+
+
+class BossAttacks:
+    """Timed attack patterns fired into a ProjectileStore"""
+    def __init__(self, store, attack_frames=240):
+        self.store = store
+        self.attack_frames = attack_frames
+        self.reset()
+
+    def reset(self, intensity=1):
+        self.intensity = max(1, intensity)
+        self.attack = 0
+        self.timer = 0   # Frames into the current attack
+        self.phase = 0.0  # Spiral rotation, radians
+
+    def getstate(self):
+        return self.intensity, self.attack, self.timer, self.phase
+
+    def setstate(self, state):
+        self.intensity, self.attack, self.timer, self.phase = state
+
+    def update(self, boss, paddle, rng):
+        """Run one frame of the current attack; returns True when a volley
+        went out that deserves a firing sound"""
+        if self.timer >= self.attack_frames:
+            self.attack = rng.randrange(len(ATTACKS))
+            self.timer = 0
+        self.timer += 1
+        # A short pause between attacks to give the player a breather
+        if self.timer <= 30:
+            return False
+
+        x, y = boss.centerx, boss.bottom
+        level = self.intensity
+        name = ATTACKS[self.attack]
+        if name == "spiral":
+            arms = 8 + 4 * level
+            self.phase += 0.07
+            angles = self.phase + np.arange(arms) * (2 * math.pi / arms)
+            # Fires every frame; only sound it now and then
+            return self.store.fire(x, y, angles, 1.6) > 0 and self.timer % 30 == 0
+        if name == "spread":
+            if self.timer % 24:
+                return False
+            count = 15 + 10 * level
+            # Shift alternate fans slightly so the gaps don't line up
+            offset = 0.04 if self.timer // 24 % 2 else -0.04
+            angles = math.pi / 2 + offset + np.linspace(-math.pi / 3, math.pi / 3, count)
+            return self.store.fire(x, y, angles, 2.5) > 0
+        # Aimed burst: tight volleys every few frames, then a pause
+        if self.timer % 60 >= 30 or self.timer % 6:
+            return False
+        aim = math.atan2(paddle.centery - y, paddle.centerx - x)
+        count = 3 + level
+        angles = aim + (np.arange(count) - (count - 1) / 2) * 0.08
+        return self.store.fire(x, y, angles, 4.0) > 0
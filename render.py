@@ -0,0 +1,417 @@
+"""Drawing backends.
+
+Everything in the game draws through a canvas with the same small interface:
+fill, rect, circle, line, alpha_rect, text, blit, blit_area and present, plus
+upload_atlas to hand a sprite sheet to the backend once. SurfaceCanvas is
+the original software path on the display Surface. RendererCanvas draws with
+pygame._sdl2's Renderer: shapes are a 1x1 white texture and a white circle
+texture stretched into place, text is drawn from per-glyph textures, and
+colour and alpha come from texture modulation. Nothing is uploaded per frame
+except through blit(), which is only meant for odd one-off surfaces.
+
+The game always draws in logical SCREEN_WIDTH x SCREEN_HEIGHT coordinates.
+To fill a bigger window or a fullscreen 4K display, the surface backend either
+lets SDL scale the display surface (pygame.SCALED, letterboxed, mouse mapped
+by SDL) or draws through ScaledCanvas, which renders into an internal surface
+at a fraction of the logical size and scales that into a letterboxed viewport
+with transform.scale. Lowering the internal resolution cuts fill cost for
+every fill, rect and alpha blit; DynamicResolution does it automatically
+when frames run over budget. The SDL2 backend scales on the GPU through the
+renderer's logical size. ViewportCanvas puts a game on one region of a
+window it shares with others (versus and tournament modes).
+
+Surface canvases render text through a TextCache when they are given one.
+The HUD draws the same few strings every frame, and games sharing a window
+can share the cache (GameAssets in brick_breaker.py).
+"""
+import math
+from collections import OrderedDict
+
+import pygame
+
+WHITE = (255, 255, 255)
+BLENDMODE_BLEND = 1  # SDL_BLENDMODE_BLEND
+
+
+class TextCache:
+    """Rendered text surfaces by (font, string, colour), least recently
+    used dropped first. Only used from the drawing thread."""
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, string, color):
+        key = (font, string, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = font.render(string, True, color)
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+class SurfaceCanvas:
+    """Software drawing onto a pygame Surface"""
+    name = "surface"
+    text_cache = None  # TextCache, or None to render text every call
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.size = surface.get_size()
+
+    def fill(self, color):
+        self.surface.fill(color)
+
+    def rect(self, color, rect, width=0):
+        pygame.draw.rect(self.surface, color, rect, width)
+
+    def circle(self, color, center, radius):
+        pygame.draw.circle(self.surface, color, center, radius)
+
+    def line(self, color, start, end, width=1):
+        pygame.draw.line(self.surface, color, start, end, width)
+
+    def alpha_rect(self, color, rect, alpha):
+        """Filled rect blended over what's already drawn"""
+        x, y, w, h = rect
+        overlay = pygame.Surface((w, h))
+        overlay.set_alpha(alpha)
+        overlay.fill(color)
+        self.surface.blit(overlay, (x, y))
+
+    def render_text(self, font, string, color):
+        if self.text_cache is None:
+            return font.render(string, True, color)
+        return self.text_cache.render(font, string, color)
+
+    def text(self, font, string, color, pos=None, center=None):
+        """Draw text at a top-left position or centred on a point"""
+        rendered = self.render_text(font, string, color)
+        if center is not None:
+            pos = rendered.get_rect(center=center)
+        self.surface.blit(rendered, pos)
+
+    def blit(self, surface, pos):
+        self.surface.blit(surface, pos)
+
+    def upload_atlas(self, sheet):
+        """Convert a sprite sheet to the display pixel format for fast blits"""
+        if pygame.display.get_surface() is None:
+            return sheet
+        return sheet.convert()
+
+    def blit_area(self, image, pos, area):
+        self.surface.blit(image, pos, area)
+
+    def present(self):
+        pygame.display.flip()
+
+
+class ViewportCanvas(SurfaceCanvas):
+    """SurfaceCanvas on one region of a window several games share; whoever
+    owns the window presents it once every region is drawn"""
+    name = "viewport"
+
+    def __init__(self, display, rect):
+        self.viewport = pygame.Rect(rect)
+        SurfaceCanvas.__init__(self, display.subsurface(self.viewport))
+
+    def to_logical(self, x, y):
+        """Window position to this region's coordinates"""
+        return x - self.viewport.x, y - self.viewport.y
+
+    def present(self):
+        pass
+
+
+class RendererCanvas:
+    """GPU (or SDL software renderer) drawing through pygame._sdl2.video"""
+    name = "sdl2"
+
+    def __init__(self, title, size, accelerated=True, vsync=False, window_size=None, fullscreen=False):
+        # Imported here so a pygame without _sdl2 can still use SurfaceCanvas
+        from pygame._sdl2.video import Window, Renderer, Texture
+
+        self.Texture = Texture
+        self.size = size
+        self.window = Window(title, window_size or size, fullscreen_desktop=fullscreen)
+        self.renderer = Renderer(self.window, accelerated=1 if accelerated else 0, vsync=vsync)
+        # The GPU scales logical coordinates to the window (letterboxed) and
+        # SDL maps mouse events back
+        self.renderer.logical_size = size
+
+        white = pygame.Surface((1, 1))
+        white.fill(WHITE)
+        self.white = self._upload(white)
+
+        # Drawn large once so small circles stay round when scaled down
+        disc = pygame.Surface((64, 64), pygame.SRCALPHA)
+        pygame.draw.circle(disc, WHITE, (32, 32), 32)
+        self.disc = self._upload(disc)
+
+        self.glyphs = {}  # (font id, character) -> (texture, width, height)
+
+    def _upload(self, surface):
+        texture = self.Texture.from_surface(self.renderer, surface)
+        texture.blend_mode = BLENDMODE_BLEND
+        return texture
+
+    def _quad(self, texture, color, rect, alpha=255):
+        texture.color = color
+        texture.alpha = alpha
+        texture.draw(dstrect=rect)
+
+    def fill(self, color):
+        self.renderer.draw_color = pygame.Color(color)  # Needs RGBA
+        self.renderer.clear()
+
+    def rect(self, color, rect, width=0):
+        x, y, w, h = rect
+        if width == 0 or width * 2 >= min(w, h):
+            self._quad(self.white, color, (x, y, w, h))
+            return
+        # Outline as four thin quads, matching pygame.draw.rect's inside border
+        self._quad(self.white, color, (x, y, w, width))
+        self._quad(self.white, color, (x, y + h - width, w, width))
+        self._quad(self.white, color, (x, y + width, width, h - 2 * width))
+        self._quad(self.white, color, (x + w - width, y + width, width, h - 2 * width))
+
+    def circle(self, color, center, radius):
+        self._quad(self.disc, color, (center[0] - radius, center[1] - radius, radius * 2, radius * 2))
+
+    def line(self, color, start, end, width=1):
+        if width <= 1:
+            self.renderer.draw_color = pygame.Color(color)  # Needs RGBA
+            self.renderer.draw_line(start, end)
+            return
+        # A quad as long as the line (both end points included) and `width`
+        # thick, turned about its start to lie along it. pygame.draw.line
+        # thickens mostly-horizontal lines downwards and mostly-vertical ones
+        # to the right, so start from the end that makes the quad do the same
+        dx, dy = end[0] - start[0], end[1] - start[1]
+        if (dx < 0 if abs(dx) >= abs(dy) else dy > 0):
+            start, dx, dy = end, -dx, -dy
+        offset = (width - 1) // 2
+        self.white.color = color
+        self.white.alpha = 255
+        self.white.draw(dstrect=(start[0], start[1] - offset, math.hypot(dx, dy) + 1, width),
+                        angle=math.degrees(math.atan2(dy, dx)), origin=(0, offset))
+
+    def alpha_rect(self, color, rect, alpha):
+        self._quad(self.white, color, rect, alpha)
+
+    def _glyph(self, font, character):
+        key = (id(font), character)
+        glyph = self.glyphs.get(key)
+        if glyph is None:
+            surface = font.render(character, True, WHITE)
+            glyph = (self._upload(surface), surface.get_width(), surface.get_height())
+            self.glyphs[key] = glyph
+        return glyph
+
+    def text(self, font, string, color, pos=None, center=None):
+        glyphs = [self._glyph(font, character) for character in string]
+        if center is not None:
+            width = sum(glyph[1] for glyph in glyphs)
+            pos = (center[0] - width // 2, center[1] - font.get_height() // 2)
+        x, y = pos[0], pos[1]
+        for texture, width, height in glyphs:
+            texture.color = color
+            texture.draw(dstrect=(x, y, width, height))
+            x += width
+
+    def blit(self, surface, pos):
+        texture = self.Texture.from_surface(self.renderer, surface)
+        texture.draw(dstrect=(pos[0], pos[1], surface.get_width(), surface.get_height()))
+
+    def upload_atlas(self, sheet):
+        return self.Texture.from_surface(self.renderer, sheet)
+
+    def blit_area(self, image, pos, area):
+        image.draw(srcrect=area, dstrect=(pos[0], pos[1], area.width, area.height))
+
+    def present(self):
+        self.renderer.present()
+
+
+class _ScaledImage:
+    """Atlas sheet plus lazily made copies at each internal scale"""
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.scaled = {1.0: sheet}
+
+    def at(self, scale):
+        image = self.scaled.get(scale)
+        if image is None:
+            width, height = self.sheet.get_size()
+            image = pygame.transform.smoothscale(self.sheet, (max(1, round(width * scale)),
+                                                              max(1, round(height * scale))))
+            self.scaled[scale] = image
+        return image
+
+
+class ScaledCanvas(SurfaceCanvas):
+    """Logical-coordinate drawing into an internal surface scaled to the window"""
+    name = "scaled"
+    vsync = False  # Never opened with pygame.SCALED, so flips don't wait for vblank
+
+    def __init__(self, display, logical_size, scale=1.0):
+        self.display = display
+        self.logical_size = logical_size
+        self.scale = None
+
+        # Largest aspect-correct viewport inside the window; the rest stays black
+        display_width, display_height = display.get_size()
+        fit = min(display_width / logical_size[0], display_height / logical_size[1])
+        width, height = round(logical_size[0] * fit), round(logical_size[1] * fit)
+        self.viewport = pygame.Rect((display_width - width) // 2, (display_height - height) // 2,
+                                    width, height)
+        display.fill((0, 0, 0))
+        self.target = display.subsurface(self.viewport)
+        self.set_scale(scale)
+
+    def set_scale(self, scale):
+        """Change the internal resolution as a fraction of the logical size"""
+        scale = max(0.25, min(1.0, scale))
+        if scale == self.scale:
+            return
+        self.scale = scale
+        if scale == 1.0 and self.viewport.size == tuple(self.logical_size):
+            surface = self.target  # Nothing to scale; draw straight to the window
+        else:
+            surface = pygame.Surface((round(self.logical_size[0] * scale),
+                                      round(self.logical_size[1] * scale))).convert()
+        SurfaceCanvas.__init__(self, surface)
+        self.size = self.logical_size
+
+    def to_logical(self, x, y):
+        """Window position to logical game coordinates"""
+        return ((x - self.viewport.x) * self.logical_size[0] / self.viewport.width,
+                (y - self.viewport.y) * self.logical_size[1] / self.viewport.height)
+
+    def _rect(self, rect):
+        x, y, w, h = rect
+        k = self.scale
+        return (round(x * k), round(y * k), max(1, round(w * k)), max(1, round(h * k)))
+
+    def _width(self, width):
+        return max(1, round(width * self.scale)) if width else 0
+
+    def rect(self, color, rect, width=0):
+        pygame.draw.rect(self.surface, color, self._rect(rect), self._width(width))
+
+    def circle(self, color, center, radius):
+        k = self.scale
+        pygame.draw.circle(self.surface, color, (round(center[0] * k), round(center[1] * k)),
+                           max(1, round(radius * k)))
+
+    def line(self, color, start, end, width=1):
+        k = self.scale
+        pygame.draw.line(self.surface, color, (start[0] * k, start[1] * k), (end[0] * k, end[1] * k),
+                         self._width(width))
+
+    def alpha_rect(self, color, rect, alpha):
+        SurfaceCanvas.alpha_rect(self, color, self._rect(rect), alpha)
+
+    def _scaled(self, surface):
+        if self.scale == 1.0:
+            return surface
+        width, height = surface.get_size()
+        return pygame.transform.smoothscale(surface, (max(1, round(width * self.scale)),
+                                                      max(1, round(height * self.scale))))
+
+    def text(self, font, string, color, pos=None, center=None):
+        rendered = self.render_text(font, string, color)
+        if center is not None:
+            pos = rendered.get_rect(center=center).topleft
+        self.surface.blit(self._scaled(rendered), (round(pos[0] * self.scale), round(pos[1] * self.scale)))
+
+    def blit(self, surface, pos):
+        self.surface.blit(self._scaled(surface), (round(pos[0] * self.scale), round(pos[1] * self.scale)))
+
+    def upload_atlas(self, sheet):
+        return _ScaledImage(SurfaceCanvas.upload_atlas(self, sheet))
+
+    def blit_area(self, image, pos, area):
+        x, y, w, h = self._rect((pos[0], pos[1], area.width, area.height))
+        source = self._rect(area)
+        self.surface.blit(image.at(self.scale), (x, y), (source[0], source[1], w, h))
+
+    def present(self):
+        if self.surface is not self.target:
+            pygame.transform.scale(self.surface, self.viewport.size, self.target)
+        pygame.display.flip()
+
+
+class DynamicResolution:
+    """Drops a ScaledCanvas's internal resolution while frames run over budget
+    and raises it again once there is plenty of headroom"""
+    def __init__(self, canvas, budget_ms, low=0.5, high=1.0, step=0.125, drop_after=10, raise_after=120):
+        self.canvas = canvas
+        self.budget_ms = budget_ms
+        self.low = low
+        self.high = high
+        self.step = step
+        self.drop_after = drop_after    # Consecutive slow frames before dropping
+        self.raise_after = raise_after  # Consecutive fast frames before raising
+        self.slow = 0
+        self.fast = 0
+
+    def update(self, frame_ms):
+        if frame_ms > self.budget_ms:
+            self.slow += 1
+            self.fast = 0
+        elif frame_ms < self.budget_ms * 0.6:
+            self.fast += 1
+            self.slow = 0
+        else:
+            self.slow = self.fast = 0
+
+        scale = self.canvas.scale
+        if self.slow >= self.drop_after and scale > self.low:
+            self.canvas.set_scale(max(self.low, scale - self.step))
+            self.slow = 0
+        elif self.fast >= self.raise_after and scale < self.high:
+            self.canvas.set_scale(min(self.high, scale + self.step))
+            self.fast = 0
+
+
+def create_canvas(backend, title, size, accelerated=True, vsync=False, window_size=None,
+                  fullscreen=False, scaling="scaled", render_scale=1.0):
+    """Open the game window with the requested backend ("surface" or "sdl2").
+
+    `scaling` picks how the surface backend fills a window bigger than the
+    logical size: "scaled" (pygame.SCALED) or "transform" (ScaledCanvas).
+    A render scale below 1 always uses ScaledCanvas.
+    """
+    if backend == "sdl2":
+        try:
+            canvas = RendererCanvas(title, size, accelerated, vsync, window_size, fullscreen)
+            print(f"Using SDL2 renderer backend ({'accelerated' if accelerated else 'software'})")
+            return canvas
+        except (ImportError, pygame.error) as e:
+            print(f"SDL2 renderer unavailable ({e}), falling back to surface backend")
+
+    flags = pygame.FULLSCREEN if fullscreen else 0
+    if scaling == "transform" or render_scale != 1.0:
+        # Open the window at its real size and scale ourselves. Without
+        # SCALED pygame won't turn vsync on, so the canvas says it has none
+        screen = pygame.display.set_mode((0, 0) if fullscreen else (window_size or size), flags)
+        pygame.display.set_caption(title)
+        return ScaledCanvas(screen, size, render_scale)
+    if vsync or fullscreen or window_size:
+        # SCALED keeps the logical size, letterboxes to the window and maps
+        # the mouse; pygame only honours vsync for SCALED (or OpenGL) surfaces
+        if not fullscreen:
+            flags |= pygame.RESIZABLE
+        screen = pygame.display.set_mode(size, flags | pygame.SCALED, vsync=1 if vsync else 0)
+    else:
+        screen = pygame.display.set_mode(size)
+    pygame.display.set_caption(title)
+    return SurfaceCanvas(screen)
@@ -0,0 +1,330 @@
+"""Compact binary replay files.
+
+A replay stores the per-frame input the game loop fed into Game.step plus a
+periodic full-state keyframe from Game.save_state. Because gameplay randomness
+is seeded and separate from cosmetic effects, re-running the inputs from a
+keyframe reproduces the game exactly, so any frame can be reached by loading
+the nearest earlier keyframe and simulating at most one keyframe interval.
+
+Layout:
+
+    header      b"BBRP", version (B), seed (varint), level set (varint length + utf-8),
+                keyframe interval (varint)
+    blocks      type (B), payload length (varint), payload
+                  'K' keyframe: frame (varint), zlib(save_state bytes)
+                  'F' frames:   first frame (varint), frame count (varint), zlib(frame tokens)
+                  'I' index:    count (varint), then frame and file offset of every
+                                keyframe, each delta-encoded as varints
+    footer      index block offset (Q), b"BBIX"
+
+Frame tokens are varints. An even token 2n means "the next n frames repeat the
+previous input with no key presses". An odd token carries flags in its upper
+bits followed by the fields that changed: bit0 fixed-point mouse x (zigzag delta), bit1
+input bits, bit2 key presses (count then key codes). Mouse and input bits
+restart from zero at the start of every frames block so each block decodes on
+its own.
+
+Frames are buffered in memory and written one compressed block per keyframe
+interval; the file is never flushed or synced per frame. A file cut short by a
+crash is still readable as a stream up to its last complete block.
+"""
+import struct
+import zlib
+
+MAGIC = b"BBRP"
+INDEX_MAGIC = b"BBIX"
+VERSION = 2  # 2: fixed-point mouse x and physics
+FOOTER = struct.Struct("<Q4s")
+
+KEYFRAME_BLOCK = ord("K")
+FRAMES_BLOCK = ord("F")
+INDEX_BLOCK = ord("I")
+
+FLAG_MOUSE = 1
+FLAG_BITS = 2
+FLAG_KEYS = 4
+
+
+def write_varint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+class ReplayWriter:
+    """Appends frames to a replay file as the game runs"""
+    def __init__(self, path, seed, level_set="classic", keyframe_interval=1800):
+        self.file = open(path, "wb")
+        self.keyframe_interval = keyframe_interval
+        self.index = []  # (frame, file offset) of every keyframe
+        self.frame = 0
+
+        header = bytearray(MAGIC)
+        header.append(VERSION)
+        write_varint(header, seed & ((1 << 64) - 1))
+        name = level_set.encode("utf-8")
+        write_varint(header, len(name))
+        header += name
+        write_varint(header, keyframe_interval)
+        self.file.write(header)
+        self.offset = len(header)
+
+        self._start_block()
+
+    def _start_block(self):
+        self.tokens = bytearray()
+        self.block_start = self.frame
+        self.mouse_x = 0
+        self.bits = 0
+        self.repeat = 0
+
+    def _write_block(self, block_type, payload):
+        block = bytearray((block_type,))
+        write_varint(block, len(payload))
+        block += payload
+        self.file.write(block)
+        offset = self.offset
+        self.offset += len(block)
+        return offset
+
+    def _flush_frames(self):
+        if self.repeat:
+            write_varint(self.tokens, self.repeat << 1)
+            self.repeat = 0
+        count = self.frame - self.block_start
+        if count:
+            payload = bytearray()
+            write_varint(payload, self.block_start)
+            write_varint(payload, count)
+            payload += zlib.compress(bytes(self.tokens), 9)
+            self._write_block(FRAMES_BLOCK, payload)
+        self._start_block()
+
+    def write_keyframe(self, game):
+        self._flush_frames()
+        payload = bytearray()
+        write_varint(payload, self.frame)
+        payload += zlib.compress(game.save_state(), 9)
+        self.index.append((self.frame, self._write_block(KEYFRAME_BLOCK, payload)))
+
+    def record_frame(self, game, frame_input, key_events):
+        """Record the input for the frame about to be simulated"""
+        if self.frame % self.keyframe_interval == 0 and not (self.index and self.index[-1][0] == self.frame):
+            self.write_keyframe(game)
+
+        mouse_x, bits = frame_input
+        if mouse_x == self.mouse_x and bits == self.bits and not key_events:
+            self.repeat += 1
+        else:
+            if self.repeat:
+                write_varint(self.tokens, self.repeat << 1)
+                self.repeat = 0
+            flags = 0
+            fields = bytearray()
+            if mouse_x != self.mouse_x:
+                flags |= FLAG_MOUSE
+                write_varint(fields, zigzag(mouse_x - self.mouse_x))
+                self.mouse_x = mouse_x
+            if bits != self.bits:
+                flags |= FLAG_BITS
+                write_varint(fields, bits)
+                self.bits = bits
+            if key_events:
+                flags |= FLAG_KEYS
+                write_varint(fields, len(key_events))
+                for key in key_events:
+                    write_varint(fields, key)
+            write_varint(self.tokens, (flags << 1) | 1)
+            self.tokens += fields
+        self.frame += 1
+
+    def close(self):
+        if self.file is None:
+            return
+        self._flush_frames()
+        payload = bytearray()
+        write_varint(payload, len(self.index))
+        last_frame = last_offset = 0
+        for frame, offset in self.index:
+            write_varint(payload, frame - last_frame)
+            write_varint(payload, offset - last_offset)
+            last_frame, last_offset = frame, offset
+        index_offset = self._write_block(INDEX_BLOCK, payload)
+        self.file.write(FOOTER.pack(index_offset, INDEX_MAGIC))
+        self.file.close()
+        self.file = None
+        print(f"Replay saved: {self.frame} frames, {self.offset + FOOTER.size} bytes")
+
+
+def decode_frames(payload):
+    """Yield (frame, (mouse_x, bits), key_events) for one frames block"""
+    frame, offset = read_varint(payload, 0)
+    count, offset = read_varint(payload, offset)
+    tokens = zlib.decompress(payload[offset:])
+    end = frame + count
+    mouse_x = bits = 0
+    offset = 0
+    while frame < end:
+        token, offset = read_varint(tokens, offset)
+        if not token & 1:
+            for _ in range(token >> 1):
+                yield frame, (mouse_x, bits), ()
+                frame += 1
+            continue
+        flags = token >> 1
+        key_events = ()
+        if flags & FLAG_MOUSE:
+            delta, offset = read_varint(tokens, offset)
+            mouse_x += unzigzag(delta)
+        if flags & FLAG_BITS:
+            bits, offset = read_varint(tokens, offset)
+        if flags & FLAG_KEYS:
+            count, offset = read_varint(tokens, offset)
+            key_events = []
+            for _ in range(count):
+                key, offset = read_varint(tokens, offset)
+                key_events.append(key)
+        yield frame, (mouse_x, bits), key_events
+        frame += 1
+
+
+class ReplayReader:
+    """Streams and seeks through a replay file"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(64 * 1024)
+        if header[:4] != MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+        self.version = header[4]
+        if self.version != VERSION:
+            raise ValueError(f"Unsupported replay version {self.version}")
+        self.seed, offset = read_varint(header, 5)
+        length, offset = read_varint(header, offset)
+        self.level_set = header[offset:offset + length].decode("utf-8")
+        self.keyframe_interval, self.data_start = read_varint(header, offset + length)
+        self.index = self._read_index()
+
+    def blocks(self, offset=None):
+        """Yield (type, file offset, payload) in file order, stopping at the index"""
+        with open(self.path, "rb") as f:
+            f.seek(self.data_start if offset is None else offset)
+            while True:
+                block_offset = f.tell()
+                head = f.read(11)
+                if len(head) < 2:
+                    return
+                block_type = head[0]
+                try:
+                    length, used = read_varint(head, 1)
+                except IndexError:
+                    return
+                f.seek(block_offset + used)
+                payload = f.read(length)
+                if len(payload) < length or block_type == INDEX_BLOCK:
+                    return  # truncated tail or end of data
+                yield block_type, block_offset, payload
+
+    def _read_index(self):
+        with open(self.path, "rb") as f:
+            f.seek(0, 2)
+            size = f.tell()
+            if size >= self.data_start + FOOTER.size:
+                f.seek(size - FOOTER.size)
+                index_offset, magic = FOOTER.unpack(f.read(FOOTER.size))
+                if magic == INDEX_MAGIC:
+                    f.seek(index_offset)
+                    data = f.read(size - FOOTER.size - index_offset)
+                    _, offset = read_varint(data, 1)
+                    count, offset = read_varint(data, offset)
+                    index = []
+                    frame = block_offset = 0
+                    for _ in range(count):
+                        delta, offset = read_varint(data, offset)
+                        frame += delta
+                        delta, offset = read_varint(data, offset)
+                        block_offset += delta
+                        index.append((frame, block_offset))
+                    return index
+
+        # No index (the recording was interrupted): rebuild it by scanning
+        index = []
+        for block_type, block_offset, payload in self.blocks():
+            if block_type == KEYFRAME_BLOCK:
+                index.append((read_varint(payload, 0)[0], block_offset))
+        return index
+
+    def _keyframe_before(self, frame):
+        best = None
+        for entry in self.index:
+            if entry[0] > frame:
+                break
+            best = entry
+        if best is None:
+            raise ValueError(f"No keyframe at or before frame {frame}")
+        return best
+
+    def frames(self, start=0):
+        """Yield (frame, frame_input, key_events) from `start` to the end"""
+        _, offset = self._keyframe_before(start)
+        for block_type, _, payload in self.blocks(offset):
+            if block_type != FRAMES_BLOCK:
+                continue
+            for entry in decode_frames(payload):
+                if entry[0] >= start:
+                    yield entry
+
+    def play(self, game, start=0):
+        """Yield input frame by frame for a game already seeked to `start`.
+
+        Keyframes met along the way are loaded into the game, which is how
+        rewinds and checkpoint restores in the recording are reproduced.
+        """
+        _, offset = self._keyframe_before(start)
+        for block_type, _, payload in self.blocks(offset):
+            if block_type == KEYFRAME_BLOCK:
+                frame, used = read_varint(payload, 0)
+                if frame > start:
+                    game.load_state(zlib.decompress(payload[used:]))
+                continue
+            for entry in decode_frames(payload):
+                if entry[0] >= start:
+                    yield entry
+
+    def seek(self, game, frame):
+        """Put `game` in the state it had just before `frame` was simulated"""
+        keyframe, offset = self._keyframe_before(frame)
+        blocks = self.blocks(offset)
+        _, _, payload = next(blocks)
+        _, start = read_varint(payload, 0)
+        game.load_state(zlib.decompress(payload[start:]))
+        if keyframe < frame:
+            for block_type, _, payload in blocks:
+                if block_type == KEYFRAME_BLOCK:
+                    break
+                for recorded, frame_input, key_events in decode_frames(payload):
+                    if recorded >= frame:
+                        return game
+                    game.step(frame_input, key_events)
+        return game
@@ -0,0 +1,142 @@
+"""Frame-budgeted scheduler for deferred, non-critical work.
+
+Work that doesn't have to happen on the frame that asks for it (synthesizing
+sounds, the tail of a big particle burst) is submitted here instead of
+running inline. A task is either a plain callable, run in one go, or a
+generator, which is a job: each next() is one slice and a yield hands the
+rest of the frame back.
+
+Once per frame, after update and draw, the game loop calls run() with the
+time the frame has to finish by. Pending work runs in priority order (then
+by deadline, then first come first served) until that time is used up, so a
+burst of requests is spread over the following frames instead of landing in
+one. Two kinds of work run whatever the budget:
+
+    critical  submitted with priority CRITICAL, or promoted to it once its
+              deadline (in frames from submission) has passed
+    flushed   flush(name) finishes every pending task of that name now
+
+A slice that runs past the frame's end time counts as an overrun and the
+worst one is kept for the report, so a job that needs finer slicing shows up.
+
+Tools that step the game without a frame loop (benchmarks, replay
+analytics) clear `active`; submit() then runs the work inline, so nothing
+piles up waiting for a run() that never comes.
+"""
+import heapq
+import inspect
+import itertools
+import time
+
+CRITICAL = 0
+HIGH = 1
+NORMAL = 2
+LOW = 3
+
+
+class FrameScheduler:
+    """Priority queue of tasks and generator jobs, drained within a time budget"""
+    def __init__(self, margin_ms=1.0):
+        self.margin = margin_ms / 1000.0  # Left unused at the end of each frame for the pacer
+        self.active = True
+        self.queue = []  # [priority, deadline frame, sequence, name, task or job]
+        self.sequence = itertools.count()
+        self.frame = 0
+
+        self.slices = 0
+        self.completed = 0
+        self.forced = 0
+        self.overruns = 0
+        self.worst_overrun = (0.0, None)  # (ms, task name)
+        self.max_pending = 0
+
+    def __len__(self):
+        return len(self.queue)
+
+    def submit(self, work, priority=NORMAL, deadline=None, name=None):
+        """Queue a callable or a generator job. `deadline` is how many frames
+        it may wait before it is forced."""
+        if not self.active:
+            if inspect.isgenerator(work):
+                for _ in work:
+                    pass
+            else:
+                work()
+            return
+        name = name or getattr(work, "__name__", "task")
+        due = self.frame + deadline if deadline is not None else float("inf")
+        heapq.heappush(self.queue, [priority, due, next(self.sequence), name, work])
+        self.max_pending = max(self.max_pending, len(self.queue))
+
+    def run(self, end_time):
+        """Spend the frame's remaining time, up to perf_counter() == end_time,
+        on pending work; returns the number of slices run"""
+        self.frame += 1
+        queue = self.queue
+        if not queue:
+            return 0
+        # Anything past its deadline can't wait any longer
+        overdue = False
+        for entry in queue:
+            if entry[1] <= self.frame and entry[0] != CRITICAL:
+                entry[0] = CRITICAL
+                overdue = True
+        if overdue:
+            heapq.heapify(queue)
+
+        end_time -= self.margin
+        ran = 0
+        while queue:
+            start = time.perf_counter()
+            critical = queue[0][0] == CRITICAL
+            if start >= end_time:
+                if not critical:
+                    break
+                self.forced += 1
+            entry = heapq.heappop(queue)
+            finished = self._slice(entry[4])
+            ran += 1
+            over = time.perf_counter() - end_time
+            if over > 0 and start < end_time:
+                self.overruns += 1
+                if over * 1000 > self.worst_overrun[0]:
+                    self.worst_overrun = (over * 1000, entry[3])
+            if finished:
+                self.completed += 1
+            else:
+                heapq.heappush(queue, entry)
+        self.slices += ran
+        return ran
+
+    def flush(self, name=None):
+        """Finish every pending task called `name` (or everything) right now"""
+        chosen = [entry for entry in self.queue if name is None or entry[3] == name]
+        self.queue = [entry for entry in self.queue if not (name is None or entry[3] == name)]
+        heapq.heapify(self.queue)
+        # Anything these submit goes onto the new queue
+        for entry in sorted(chosen):
+            self.slices += 1
+            while not self._slice(entry[4]):
+                self.slices += 1
+            self.completed += 1
+
+    def _slice(self, work):
+        """Run one slice; True when the task is done"""
+        if inspect.isgenerator(work):
+            try:
+                next(work)
+            except StopIteration:
+                return True
+            return False
+        work()
+        return True
+
+    def hud_lines(self):
+        return [f"tasks {len(self.queue)} pending, {self.overruns} overruns"]
+
+    def report(self):
+        worst_ms, worst_name = self.worst_overrun
+        worst = f" (worst {worst_ms:.1f} ms in {worst_name})" if worst_name else ""
+        return (f"Scheduler: {self.completed} tasks done in {self.slices} slices, "
+                f"{self.forced} forced past the budget, {self.overruns} overruns{worst}, "
+                f"at most {self.max_pending} pending")
@@ -0,0 +1,166 @@
+"""Persistent high scores and session stats in a local SQLite database.
+
+The game thread never touches the database. add_score / add_level /
+end_session just drop a row on a queue; a writer thread owns the SQLite
+connection, waits for work, drains everything queued and commits it as one
+transaction with executemany. The database runs in WAL mode with
+synchronous=NORMAL, so a commit is an append to the write-ahead log rather
+than a full sync of the main file, and every statement is a fixed SQL
+string, so sqlite3's per-connection statement cache prepares each one once.
+
+Top-N queries walk the (level_set, score) index. The writer reruns them only
+after a batch that added scores and publishes the result as a new tuple, so
+the leaderboard screen reads a cached list and uses `version` to tell when
+to rebuild its lines.
+
+Unless told otherwise the database lives in the per-user data directory
+(see default_path), not wherever the game happens to be started.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+APP_DIR = "ultimate-brick-breaker"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    level_set TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    played_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_set ON scores (level_set, score DESC);
+CREATE TABLE IF NOT EXISTS levels (
+    id INTEGER PRIMARY KEY,
+    level INTEGER NOT NULL,
+    level_set TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    cleared_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    ended_at REAL NOT NULL,
+    games INTEGER NOT NULL,
+    levels_cleared INTEGER NOT NULL,
+    best_score INTEGER NOT NULL,
+    frames INTEGER NOT NULL
+);
+"""
+
+INSERT_SQL = {
+    "score": "INSERT INTO scores (score, level, level_set, seed, frames, played_at) VALUES (?, ?, ?, ?, ?, ?)",
+    "level": "INSERT INTO levels (level, level_set, score, frames, cleared_at) VALUES (?, ?, ?, ?, ?)",
+    "session": ("INSERT INTO sessions (started_at, ended_at, games, levels_cleared, best_score, frames) "
+                "VALUES (?, ?, ?, ?, ?, ?)"),
+}
+TOP_SQL = ("SELECT score, level, played_at FROM scores WHERE level_set = ? "
+           "ORDER BY score DESC LIMIT ?")
+
+
+def default_path():
+    """scores.db under $XDG_DATA_HOME (~/.local/share), or %APPDATA% on Windows"""
+    base = os.environ.get("XDG_DATA_HOME") or os.environ.get("APPDATA") or \
+        os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, APP_DIR, "scores.db")
+
+
+class ScoreStore:
+    """SQLite score table fed through a batching writer thread"""
+    def __init__(self, path, level_set="classic", top_n=10, batch_delay=0.05):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.level_set = level_set  # Leaderboard shown for this level set
+        self.top_n = top_n
+        self.batch_delay = batch_delay  # Linger after the first row so bursts share a commit
+
+        self.pending = queue.SimpleQueue()
+        self.top = ()      # Cached (score, level, played_at) rows, best first
+        self.version = 0   # Bumped whenever self.top is replaced
+        self.committed = 0
+        self.batches = 0
+
+        # Session totals, kept on the game thread
+        self.started_at = time.time()
+        self.games = 0
+        self.levels_cleared = 0
+        self.best_score = 0
+
+        self.thread = threading.Thread(target=self._run, name="scores", daemon=True)
+        self.thread.start()
+
+    # Game thread
+
+    def add_score(self, score, level, level_set, seed, frames):
+        self.games += 1
+        self.best_score = max(self.best_score, score)
+        self.pending.put(("score", (score, level, level_set, seed, frames, time.time())))
+
+    def add_level(self, level, level_set, score, frames):
+        self.levels_cleared += 1
+        self.pending.put(("level", (level, level_set, score, frames, time.time())))
+
+    def set_level_set(self, level_set):
+        """Show the leaderboard for another level set"""
+        if level_set != self.level_set:
+            self.level_set = level_set
+            self.pending.put(("refresh", None))
+
+    def close(self, frames=0):
+        """Record the session, flush everything queued and stop the writer"""
+        self.pending.put(("session", (self.started_at, time.time(), self.games, self.levels_cleared,
+                                      self.best_score, frames)))
+        self.pending.put(None)
+        self.thread.join(timeout=5.0)
+        print(f"Scores: {self.committed} rows committed in {self.batches} batches to {self.path}")
+
+    # Writer thread
+
+    def _run(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        self._refresh(connection)
+
+        running = True
+        while running:
+            batch = [self.pending.get()]
+            time.sleep(self.batch_delay)
+            while True:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = {}
+            refresh = False
+            for item in batch:
+                if item is None:
+                    running = False
+                    continue
+                kind, row = item
+                if kind == "refresh":
+                    refresh = True
+                else:
+                    rows.setdefault(kind, []).append(row)
+            if rows:
+                with connection:
+                    for kind, values in rows.items():
+                        connection.executemany(INSERT_SQL[kind], values)
+                self.committed += sum(len(values) for values in rows.values())
+                self.batches += 1
+            if refresh or "score" in rows:
+                self._refresh(connection)
+        connection.close()
+
+    def _refresh(self, connection):
+        self.top = tuple(connection.execute(TOP_SQL, (self.level_set, self.top_n)).fetchall())
+        self.version += 1
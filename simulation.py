@@ -0,0 +1,138 @@
+"""Fixed-rate simulation thread for Game.run_threaded.
+
+The simulation thread owns every game object. After each tick it publishes a
+RenderFrame, an immutable copy of the state draw_game reads, into one of two
+slots and flips the front index. The main thread only ever reads the front
+frame, so it never sees a half-updated tick and never takes a lock while
+drawing. pygame releases the GIL inside fills and blits, which lets the two
+threads genuinely overlap.
+"""
+import copy
+import queue
+import threading
+import time
+
+from particles import PARTICLE_STATE, draw_particle
+
+
+def _frozen(entity):
+    """Shallow copy with its own Rect, so later moves don't show through"""
+    clone = copy.copy(entity)
+    clone.rect = entity.rect.copy()
+    return clone
+
+
+class _ParticleView:
+    """Stands in for ParticleSystem when drawing a RenderFrame. `particles`
+    holds a PARTICLE_STATE tuple per Particle rather than the objects."""
+    __slots__ = ("particles", "field")
+
+    def __init__(self, particles, field):
+        self.particles = particles
+        self.field = field
+
+    def __len__(self):
+        return len(self.particles) + (len(self.field) if self.field is not None else 0)
+
+    def draw(self, canvas):
+        if self.field is not None:
+            self.field.draw(canvas)
+        for state in self.particles:
+            draw_particle(canvas, *state)
+
+
+class RenderFrame:
+    """Everything draw_game needs for one tick, copied off the live objects.
+
+    Attribute names match Game so draw_game can take either one.
+    """
+    def __init__(self, game, tick):
+        self.tick = tick
+        self.game_state = game.game_state
+        self.level = game.level
+        self.max_level = game.max_level
+        self.score = game.score
+        self.lives = game.lives
+        self.use_mouse = game.use_mouse
+        self.boss_level = game.is_boss_level()
+        self.layout_version = game.layout_version
+
+        self.paddle = _frozen(game.paddle)
+        self.balls = []
+        for ball in game.balls:
+            clone = _frozen(ball)
+            clone.trail = list(ball.trail)
+            self.balls.append(clone)
+        self.ball_system = game.ball_system.copy() if game.ball_system is not None else None
+        # Destroyed bricks draw nothing, and "all destroyed" still holds for
+        # an empty list, so they can be left out entirely
+        self.bricks = [_frozen(brick) for brick in game.bricks if not brick.destroyed]
+        self.boss_brick = _frozen(game.boss_brick) if game.boss_brick else None
+        self.boss_projectiles = [_frozen(projectile) for projectile in game.boss_projectiles]
+        self.projectile_store = game.projectile_store.copy() if game.projectile_store is not None else None
+        self.powerups = [_frozen(powerup) for powerup in game.powerups]
+        particles = game.particle_system
+        self.particle_system = _ParticleView(list(map(PARTICLE_STATE, particles.particles)),
+                                             particles.field.copy() if particles.field is not None else None)
+
+    def is_boss_level(self):
+        return self.boss_level
+
+
+class SimulationThread(threading.Thread):
+    """Steps the game at a fixed tick rate and publishes RenderFrames"""
+    def __init__(self, game, tick_rate=60):
+        super().__init__(name="simulation", daemon=True)
+        self.game = game
+        self.period = 1.0 / tick_rate
+        self.running = True
+
+        # Input from the main thread: the newest sample wins, key presses queue
+        self.frame_input = (0, 0)
+        self.key_events = queue.SimpleQueue()
+
+        # Double-buffered output
+        self.frames = [None, None]
+        self.front = 0
+        self.tick = 0
+        self.late_ticks = 0
+        self.tick_ms = 0.0  # Duration of the latest simulate_frame
+
+    def submit_input(self, frame_input, key_events):
+        self.frame_input = frame_input
+        for key in key_events:
+            self.key_events.put(key)
+
+    def latest_frame(self):
+        return self.frames[self.front]
+
+    def stop(self):
+        self.running = False
+        self.join(timeout=1.0)
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while self.running:
+            key_events = []
+            while not self.key_events.empty():
+                key_events.append(self.key_events.get_nowait())
+
+            start = time.perf_counter()
+            self.game.simulate_frame(self.frame_input, key_events)
+            self.tick_ms = (time.perf_counter() - start) * 1000
+            self.tick += 1
+
+            back = 1 - self.front
+            self.frames[back] = RenderFrame(self.game, self.tick)
+            self.front = back
+
+            next_tick += self.period
+            self.game.scheduler.run(next_tick)
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -5 * self.period:
+                # Too far behind to catch up; drop the backlog instead of
+                # running a burst of ticks
+                self.late_ticks += 1
+                next_tick = time.perf_counter()
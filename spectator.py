@@ -0,0 +1,592 @@
+"""Spectator server that streams live game state to remote viewers.
+
+The game thread calls SpectatorServer.publish(game) once per update. That
+builds a small state tuple, diffs it against the previous tick and hands the
+encoded bytes to an asyncio loop running on its own thread. The game thread
+never touches a socket, so a slow network can't stall the game loop.
+
+Wire format (all little-endian). Every message is a 9 byte header followed by
+its payload:
+
+    header:     type (B, 'K' or 'D'), tick (I), payload length (I)
+
+    keyframe:   globals, paddle, boss,
+                bricks      H count, then x y (h h) r g b (B B B) hits_required hits_taken (B B)
+                balls       H count, then x y (h h) vx vy (h h, 1/256 px) ball type (B)
+                power-ups   H count, then id (H) x y (h h) vy*16 (h) type (B)
+                projectiles H count, then id (H) x y (h h) vx*16 vy*16 (h h)
+                bullets     H count, then x y (h h) vx vy (h h, 1/256 px)
+
+    delta:      flags (B, bit0 globals / bit1 paddle / bit2 boss changed),
+                the changed blocks in that order,
+                brick hits  H count, then index (H) hits_taken (B)
+                balls       ball count (H), then H count of updates, each
+                            index (H) and a keyframe ball record
+                spawned power-ups and projectiles, same layout as keyframe
+                removed power-ups and projectiles, H count then ids (H)
+                bullets     H count of removed ones, then their indices (H)
+                            in the previous list, and H count of new ones
+                            with keyframe records; new ones go at the end
+
+    globals:    game state (B) level (B) lives (B) score (i)
+    paddle:     x (h) width (H) flags (B, bit0 shield)
+    boss:       present (B) x y (h h) health (H)
+
+Power-ups and projectiles only move in straight lines, so deltas just announce
+spawns and removals and viewers integrate the velocity they were spawned with.
+Balls are dead-reckoned the same way: the viewer moves each one by its
+velocity every tick, and a delta only carries the balls whose velocity or
+type changed, whose predicted position is more than a pixel out, or that
+are new; the ball count trims the rest. The server keeps the viewer's
+prediction alongside each state to decide that, so a bounce costs 11 bytes
+and a ball flying straight costs nothing, however many are in play. A viewer
+that joins between keyframes starts from that prediction rounded to whole
+pixels, so its balls can be one pixel further out until the next keyframe.
+Bullet-hell projectiles (projectiles.ProjectileStore) can number thousands,
+so they get no ids. The store keeps them in firing order and fires new ones
+at the end, and viewers move them like the rest, so a delta only names the
+indices that went and appends what was fired. Positions go out in whole
+pixels and velocities exactly, so a viewer stays within a pixel of each
+shot for its whole flight.
+
+Any client whose socket buffer backs up skips deltas until it has drained and
+is then resynchronised with a fresh keyframe.
+"""
+import asyncio
+import struct
+import sys
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HEADER = struct.Struct("<BII")
+GLOBALS = struct.Struct("<BBBi")
+PADDLE = struct.Struct("<hHB")
+BOSS = struct.Struct("<BhhH")
+COUNT = struct.Struct("<H")
+BRICK = struct.Struct("<hhBBBBB")
+BRICK_HIT = struct.Struct("<HB")
+BALL = struct.Struct("<hhhhB")
+BALL_UPDATE = struct.Struct("<HhhhhB")
+POWERUP = struct.Struct("<HhhhB")
+PROJECTILE = struct.Struct("<Hhhhh")
+BULLET = struct.Struct("<hhhh")
+FLAGS = struct.Struct("<B")
+
+KEYFRAME = ord("K")
+DELTA = ord("D")
+
+GAME_STATES = ["start_screen", "playing", "paused", "game_over"]
+BALL_TYPES = ["normal", "fire", "steel", "lightning"]
+POWERUP_TYPES = ["wide_paddle", "narrow_paddle", "multi_ball", "extra_life",
+                 "fire_ball", "steel_ball", "lightning_ball", "shield"]
+
+# Velocities are sent as 1/16th pixel fixed point; the game keeps them in
+# 1/256ths (fixed.FIXED_ONE, not imported so this module needs no pygame).
+# Ball velocities go out in the game's own 1/256ths so viewers can follow
+# them without drifting
+VELOCITY_SCALE = 16
+GAME_FIXED_BITS = 8
+GAME_FIXED_ONE = 1 << GAME_FIXED_BITS
+
+
+def _code(table, value):
+    try:
+        return table.index(value)
+    except ValueError:
+        return 255
+
+
+def _pack_list(block, entries):
+    return COUNT.pack(len(entries)) + b"".join(block.pack(*entry) for entry in entries)
+
+
+class GameState:
+    """Immutable per-tick view of everything a spectator needs to draw"""
+    __slots__ = ("globals", "paddle", "boss", "bricks", "brick_hits", "balls", "ball_model",
+                 "powerups", "projectiles", "bullets", "fired")
+
+    def __init__(self, globals_, paddle, boss, bricks, brick_hits, balls, powerups, projectiles,
+                 bullets=None, fired=0):
+        self.globals = globals_
+        self.paddle = paddle
+        self.boss = boss
+        self.bricks = bricks
+        self.brick_hits = brick_hits
+        self.balls = balls
+        # Balls as the viewer will have them after this state, (x, y) in
+        # 1/256 px; exact until encode_delta replaces it with the prediction
+        self.ball_model = [(x << GAME_FIXED_BITS, y << GAME_FIXED_BITS, vx, vy, kind)
+                           for x, y, vx, vy, kind in balls]
+        self.powerups = powerups
+        self.projectiles = projectiles
+        self.bullets = bullets  # (serials, int16 records) from ProjectileStore.entries, or None
+        self.fired = fired      # The store's serial for the next projectile
+
+    def encode_keyframe(self):
+        return b"".join((
+            GLOBALS.pack(*self.globals),
+            PADDLE.pack(*self.paddle),
+            BOSS.pack(*self.boss),
+            _pack_list(BRICK, self.bricks),
+            _pack_list(BALL, [(x >> GAME_FIXED_BITS, y >> GAME_FIXED_BITS, vx, vy, kind)
+                              for x, y, vx, vy, kind in self.ball_model]),
+            _pack_list(POWERUP, list(self.powerups.values())),
+            _pack_list(PROJECTILE, list(self.projectiles.values())),
+            self._pack_bullets(self.bullets[1] if self.bullets is not None else None),
+        ))
+
+    def _pack_bullets(self, records):
+        if records is None:
+            return COUNT.pack(0)
+        return COUNT.pack(len(records)) + records.astype("<i2").tobytes()
+
+    def encode_delta(self, previous):
+        flags = 0
+        parts = []
+        if self.globals != previous.globals:
+            flags |= 1
+            parts.append(GLOBALS.pack(*self.globals))
+        if self.paddle != previous.paddle:
+            flags |= 2
+            parts.append(PADDLE.pack(*self.paddle))
+        if self.boss != previous.boss:
+            flags |= 4
+            parts.append(BOSS.pack(*self.boss))
+
+        changed = [(i, hits) for i, (hits, old) in enumerate(zip(self.brick_hits, previous.brick_hits))
+                   if hits != old]
+        parts.append(_pack_list(BRICK_HIT, changed))
+        parts.append(self._encode_balls(previous.ball_model))
+
+        spawned = [entry for key, entry in self.powerups.items() if key not in previous.powerups]
+        parts.append(_pack_list(POWERUP, spawned))
+        spawned = [entry for key, entry in self.projectiles.items() if key not in previous.projectiles]
+        parts.append(_pack_list(PROJECTILE, spawned))
+
+        removed = [(key,) for key in previous.powerups if key not in self.powerups]
+        parts.append(_pack_list(COUNT, removed))
+        removed = [(key,) for key in previous.projectiles if key not in self.projectiles]
+        parts.append(_pack_list(COUNT, removed))
+        parts.append(self._encode_bullets(previous))
+
+        return FLAGS.pack(flags) + b"".join(parts)
+
+    def _encode_bullets(self, previous):
+        """Indices of the bullets gone since `previous`, then the new ones"""
+        if previous.bullets is None:
+            removed = b""
+            count = 0
+        elif self.bullets is None:
+            count = len(previous.bullets[0])
+            removed = np.arange(count, dtype="<u2").tobytes()
+        else:
+            gone = np.flatnonzero(~np.isin(previous.bullets[0], self.bullets[0]))
+            count = len(gone)
+            removed = gone.astype("<u2").tobytes()
+        fired = None
+        if self.bullets is not None:
+            serials, records = self.bullets
+            fired = records[serials >= previous.fired]
+        return COUNT.pack(count) + removed + self._pack_bullets(fired)
+
+    def _encode_balls(self, previous_model):
+        """Ball count and the balls the viewer's prediction gets wrong; sets
+        ball_model to what the viewer will hold afterwards"""
+        model = []
+        updates = []
+        for i, (x, y, vx, vy, kind) in enumerate(self.balls):
+            if i < len(previous_model):
+                mx, my, mvx, mvy, mkind = previous_model[i]
+                mx, my = mx + mvx, my + mvy
+                if ((mvx, mvy, mkind) == (vx, vy, kind) and abs((mx >> GAME_FIXED_BITS) - x) <= 1
+                        and abs((my >> GAME_FIXED_BITS) - y) <= 1):
+                    model.append((mx, my, vx, vy, kind))
+                    continue
+            updates.append((i, x, y, vx, vy, kind))
+            model.append((x << GAME_FIXED_BITS, y << GAME_FIXED_BITS, vx, vy, kind))
+        self.ball_model = model
+        return COUNT.pack(len(self.balls)) + _pack_list(BALL_UPDATE, updates)
+
+
+class _EntityIds:
+    """Hands out small network ids for power-ups and projectiles.
+
+    Holds a reference to every live object so a removed object's id() can't be
+    reused by a new one before we notice it's gone.
+    """
+    def __init__(self):
+        self.next_id = 0
+        self.live = {}  # id(obj) -> (obj, net id)
+
+    def assign(self, objects):
+        live = {}
+        for obj in objects:
+            entry = self.live.get(id(obj))
+            if entry is None or entry[0] is not obj:
+                entry = (obj, self.next_id)
+                self.next_id = (self.next_id + 1) & 0xFFFF
+            live[id(obj)] = entry
+        self.live = live
+        return [(obj, net_id) for obj, net_id in live.values()]
+
+
+def _clamp16(value):
+    return max(-32768, min(32767, int(value)))
+
+
+def capture_state(game, powerup_ids, projectile_ids):
+    """Build a GameState from the live Game objects"""
+    globals_ = (_code(GAME_STATES, game.game_state), min(255, game.level),
+                max(0, min(255, game.lives)), game.score)
+
+    paddle = game.paddle
+    paddle_state = (paddle.rect.x, paddle.rect.width, 1 if paddle.shield_timer > 0 else 0)
+
+    boss = game.boss_brick
+    if boss and not boss.destroyed:
+        boss_state = (1, boss.rect.x, boss.rect.y, max(0, boss.health))
+    else:
+        boss_state = (0, 0, 0, 0)
+
+    bricks = []
+    brick_hits = []
+    for brick in game.bricks:
+        hits_taken = min(brick.hits_taken, brick.hits_required) if not brick.destroyed else brick.hits_required
+        r, g, b = brick.original_color
+        bricks.append((brick.rect.x, brick.rect.y, r, g, b, brick.hits_required, hits_taken))
+        brick_hits.append(hits_taken)
+
+    balls = [(ball.rect.x, ball.rect.y, _clamp16(ball.vx), _clamp16(ball.vy), _code(BALL_TYPES, ball.ball_type))
+             for ball in game.balls]
+    if getattr(game, "ball_system", None) is not None:
+        balls += game.ball_system.entries()
+
+    powerups = {}
+    for powerup, net_id in powerup_ids.assign(game.powerups):
+        powerups[net_id] = (net_id, powerup.rect.x, powerup.rect.y,
+                            _clamp16(powerup.vy * VELOCITY_SCALE / GAME_FIXED_ONE), _code(POWERUP_TYPES, powerup.type))
+
+    store = getattr(game, "projectile_store", None)
+    bullets, fired = (store.entries(), store.fired) if store is not None else (None, 0)
+
+    projectiles = {}
+    for projectile, net_id in projectile_ids.assign(game.boss_projectiles):
+        projectiles[net_id] = (net_id, projectile.rect.x, projectile.rect.y,
+                               _clamp16(projectile.vx * VELOCITY_SCALE / GAME_FIXED_ONE),
+                               _clamp16(projectile.vy * VELOCITY_SCALE / GAME_FIXED_ONE))
+
+    return GameState(globals_, paddle_state, boss_state, bricks, brick_hits, balls, powerups, projectiles,
+                     bullets, fired)
+
+
+class _Client:
+    def __init__(self, writer):
+        self.writer = writer
+        self.needs_keyframe = True
+        self.dropped = 0
+
+
+class SpectatorServer:
+    """Broadcasts game state to any number of TCP spectators"""
+    def __init__(self, host="127.0.0.1", port=8765, keyframe_interval=120, max_buffered=64 * 1024):
+        self.host = host
+        self.port = port
+        self.keyframe_interval = keyframe_interval
+        self.max_buffered = max_buffered
+
+        self.tick = 0
+        self.previous = None
+        self.bricks_ref = None
+        self.powerup_ids = _EntityIds()
+        self.projectile_ids = _EntityIds()
+
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.error = None  # Why the server couldn't start, raised by start()
+        self.clients = set()
+        self.latest = None  # (tick, GameState) seen by the network thread
+        self.keyframe_cache = (None, b"")
+        self.bytes_sent = 0
+
+    def start(self):
+        """Start the network thread and wait until the socket is listening;
+        raises whatever stopped it opening (port in use, bad host or port)"""
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._serve, args=(ready,), daemon=True,
+                                       name="spectator-server")
+        self.thread.start()
+        ready.wait()
+        if self.error is not None:
+            raise self.error
+        print(f"Spectator server listening on {self.host}:{self.port}")
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=1.0)
+            self.loop = None
+
+    def publish(self, game):
+        """Called from the game thread after every update; never blocks"""
+        if self.loop is None:
+            return
+        state = capture_state(game, self.powerup_ids, self.projectile_ids)
+
+        # A new level replaces the brick list, so deltas can't describe it
+        force_keyframe = (self.previous is None or game.bricks is not self.bricks_ref
+                          or len(state.brick_hits) != len(self.previous.brick_hits))
+        if force_keyframe or self.tick % self.keyframe_interval == 0:
+            message = (KEYFRAME, state.encode_keyframe())
+        else:
+            message = (DELTA, state.encode_delta(self.previous))
+
+        self.previous = state
+        self.bricks_ref = game.bricks
+        self.loop.call_soon_threadsafe(self._broadcast, self.tick, state, message)
+        self.tick += 1
+
+    def _serve(self, ready):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port))
+            if self.port == 0:
+                self.port = self.server.sockets[0].getsockname()[1]
+        except Exception as e:
+            self.error = e
+            self.loop.close()
+            self.loop = None
+            return
+        finally:
+            # start() is waiting either way
+            ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            for client in self.clients:
+                client.writer.close()
+            self.loop.close()
+
+    async def _handle_client(self, reader, writer):
+        client = _Client(writer)
+        self.clients.add(client)
+        if self.latest is not None:
+            self._send_keyframe(client, *self.latest)
+        try:
+            # Spectators never send anything; this just waits for disconnect
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+    def _keyframe_bytes(self, tick, state):
+        if self.keyframe_cache[0] != tick:
+            payload = state.encode_keyframe()
+            self.keyframe_cache = (tick, HEADER.pack(KEYFRAME, tick, len(payload)) + payload)
+        return self.keyframe_cache[1]
+
+    def _send_keyframe(self, client, tick, state):
+        data = self._keyframe_bytes(tick, state)
+        client.writer.write(data)
+        client.needs_keyframe = False
+        self.bytes_sent += len(data)
+
+    def _broadcast(self, tick, state, message):
+        self.latest = (tick, state)
+        kind, payload = message
+        data = HEADER.pack(kind, tick, len(payload)) + payload
+        if kind == KEYFRAME:
+            self.keyframe_cache = (tick, data)
+
+        for client in list(self.clients):
+            if client.writer.is_closing():
+                self.clients.discard(client)
+                continue
+            if client.writer.transport.get_write_buffer_size() > self.max_buffered:
+                # Slow viewer: drop this tick and resync once it catches up
+                client.needs_keyframe = True
+                client.dropped += 1
+                continue
+            if client.needs_keyframe:
+                self._send_keyframe(client, tick, state)
+            else:
+                client.writer.write(data)
+                self.bytes_sent += len(data)
+
+
+class SpectatorView:
+    """Client-side decoder that rebuilds game state from the stream"""
+    def __init__(self):
+        self.buffer = bytearray()
+        self.tick = None
+        self.synced = False
+        self.globals = None
+        self.paddle = None
+        self.boss = None
+        self.bricks = []
+        self.ball_model = []  # [x, y, vx, vy, type], position in 1/256 px
+        self.powerups = {}
+        self.projectiles = {}
+        self.bullet_model = []  # [x, y, vx, vy], position in 1/256 px
+
+    @property
+    def balls(self):
+        """(x, y, ball type) per ball, in pixels"""
+        return [(x >> GAME_FIXED_BITS, y >> GAME_FIXED_BITS, kind) for x, y, _, _, kind in self.ball_model]
+
+    @property
+    def bullets(self):
+        """(x, y) per bullet-hell projectile, in pixels"""
+        return [(x >> GAME_FIXED_BITS, y >> GAME_FIXED_BITS) for x, y, _, _ in self.bullet_model]
+
+    def _read_bullets(self, payload, offset):
+        bullets, offset = self._read_list(BULLET, payload, offset)
+        return [[x << GAME_FIXED_BITS, y << GAME_FIXED_BITS, vx, vy] for x, y, vx, vy in bullets], offset
+
+    def feed(self, data):
+        """Consume bytes from the socket; returns the number of messages applied"""
+        self.buffer.extend(data)
+        applied = 0
+        while len(self.buffer) >= HEADER.size:
+            kind, tick, length = HEADER.unpack_from(self.buffer)
+            end = HEADER.size + length
+            if len(self.buffer) < end:
+                break
+            payload = bytes(self.buffer[HEADER.size:end])
+            del self.buffer[:end]
+            if kind == KEYFRAME:
+                self._apply_keyframe(payload)
+                self.synced = True
+            elif self.synced:
+                self._apply_delta(payload)
+            self.tick = tick
+            applied += 1
+        return applied
+
+    def _read_list(self, block, payload, offset):
+        count, = COUNT.unpack_from(payload, offset)
+        offset += COUNT.size
+        entries = []
+        for _ in range(count):
+            entries.append(block.unpack_from(payload, offset))
+            offset += block.size
+        return entries, offset
+
+    def _apply_keyframe(self, payload):
+        self.globals = GLOBALS.unpack_from(payload, 0)
+        offset = GLOBALS.size
+        self.paddle = PADDLE.unpack_from(payload, offset)
+        offset += PADDLE.size
+        self.boss = BOSS.unpack_from(payload, offset)
+        offset += BOSS.size
+        bricks, offset = self._read_list(BRICK, payload, offset)
+        self.bricks = [list(brick) for brick in bricks]
+        balls, offset = self._read_list(BALL, payload, offset)
+        self.ball_model = [[x << GAME_FIXED_BITS, y << GAME_FIXED_BITS, vx, vy, kind]
+                           for x, y, vx, vy, kind in balls]
+        powerups, offset = self._read_list(POWERUP, payload, offset)
+        self.powerups = {entry[0]: list(entry) for entry in powerups}
+        projectiles, offset = self._read_list(PROJECTILE, payload, offset)
+        self.projectiles = {entry[0]: list(entry) for entry in projectiles}
+        self.bullet_model, offset = self._read_bullets(payload, offset)
+
+    def _apply_delta(self, payload):
+        # Advance moving entities by the velocity they were spawned with
+        for powerup in self.powerups.values():
+            powerup[2] += powerup[3] / VELOCITY_SCALE
+        for projectile in self.projectiles.values():
+            projectile[1] += projectile[3] / VELOCITY_SCALE
+            projectile[2] += projectile[4] / VELOCITY_SCALE
+        for ball in self.ball_model:
+            ball[0] += ball[2]
+            ball[1] += ball[3]
+        for bullet in self.bullet_model:
+            bullet[0] += bullet[2]
+            bullet[1] += bullet[3]
+
+        flags, = FLAGS.unpack_from(payload, 0)
+        offset = FLAGS.size
+        if flags & 1:
+            self.globals = GLOBALS.unpack_from(payload, offset)
+            offset += GLOBALS.size
+        if flags & 2:
+            self.paddle = PADDLE.unpack_from(payload, offset)
+            offset += PADDLE.size
+        if flags & 4:
+            self.boss = BOSS.unpack_from(payload, offset)
+            offset += BOSS.size
+
+        hits, offset = self._read_list(BRICK_HIT, payload, offset)
+        for index, hits_taken in hits:
+            self.bricks[index][6] = hits_taken
+        count, = COUNT.unpack_from(payload, offset)
+        del self.ball_model[count:]
+        updates, offset = self._read_list(BALL_UPDATE, payload, offset + COUNT.size)
+        for index, x, y, vx, vy, kind in updates:
+            ball = [x << GAME_FIXED_BITS, y << GAME_FIXED_BITS, vx, vy, kind]
+            if index < len(self.ball_model):
+                self.ball_model[index] = ball
+            else:
+                self.ball_model.append(ball)
+
+        spawned, offset = self._read_list(POWERUP, payload, offset)
+        for entry in spawned:
+            self.powerups[entry[0]] = list(entry)
+        spawned, offset = self._read_list(PROJECTILE, payload, offset)
+        for entry in spawned:
+            self.projectiles[entry[0]] = list(entry)
+
+        removed, offset = self._read_list(COUNT, payload, offset)
+        for net_id, in removed:
+            self.powerups.pop(net_id, None)
+        removed, offset = self._read_list(COUNT, payload, offset)
+        for net_id, in removed:
+            self.projectiles.pop(net_id, None)
+
+        removed, offset = self._read_list(COUNT, payload, offset)
+        if removed:
+            gone = {index for index, in removed}
+            self.bullet_model = [bullet for i, bullet in enumerate(self.bullet_model) if i not in gone]
+        fired, offset = self._read_bullets(payload, offset)
+        self.bullet_model += fired
+
+
+async def watch(host, port):
+    """Minimal text spectator, handy for checking a server over localhost"""
+    reader, writer = await asyncio.open_connection(host, port)
+    view = SpectatorView()
+    received = 0
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            received += len(data)
+            if view.feed(data) and view.synced and view.tick % 60 == 0:
+                state, level, lives, score = view.globals
+                live_bricks = sum(1 for brick in view.bricks if brick[6] < brick[5])
+                print(f"tick {view.tick}: level {level} lives {lives} score {score} "
+                      f"bricks {live_bricks} balls {len(view.balls)} "
+                      f"projectiles {len(view.projectiles) + len(view.bullet_model)} "
+                      f"({received / max(1, view.tick):.1f} bytes/tick)")
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    watch_host = sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1"
+    watch_port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+    try:
+        asyncio.run(watch(watch_host, watch_port))
+    except KeyboardInterrupt:
+        pass
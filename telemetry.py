@@ -0,0 +1,185 @@
+"""Per-frame telemetry written to local files.
+
+The game thread packs one fixed-size record per frame into a preallocated
+ring buffer and bumps a counter; that is all it ever does, so recording costs
+a struct.pack_into and never touches the disk. A background thread wakes up a
+few times a second, copies out everything new and writes it in one batch to a
+rotating JSONL or binary file. If the writer falls a whole ring behind, the
+overwritten records are skipped and counted as dropped rather than stalling
+the game.
+
+The writer also keeps a Prometheus text-format snapshot file up to date
+(replaced atomically) so a local scraper or a person with `cat` can see the
+latest frame and running totals.
+
+Binary files start with b"BBTM", a version byte, the record struct format
+(length byte + ascii) and then raw records; read_binary() decodes them.
+"""
+import json
+import os
+import struct
+import threading
+import time
+
+MAGIC = b"BBTM"
+VERSION = 1
+# frame, wall time, frame/update/draw ms, particles, live bricks, balls,
+# projectiles, power-ups, level, game state
+RECORD = struct.Struct("<IdfffIHHHHHB")
+FIELDS = ("frame", "time", "frame_ms", "update_ms", "draw_ms", "particles", "bricks",
+          "balls", "projectiles", "powerups", "level", "state")
+
+
+class TelemetryRecorder:
+    """Lock-free ring buffer of frame records drained by a writer thread"""
+    def __init__(self, prefix, fmt="jsonl", states=(), capacity=4096, flush_interval=0.25,
+                 max_bytes=8 * 1024 * 1024, max_files=5, prom_path=None):
+        if fmt not in ("jsonl", "binary"):
+            raise ValueError(f"Unknown telemetry format {fmt!r}")
+        self.path = f"{prefix}.{'jsonl' if fmt == 'jsonl' else 'bin'}"
+        self.fmt = fmt
+        self.states = states  # state code -> name for JSONL output
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.prom_path = prom_path
+
+        self.ring = bytearray(capacity * RECORD.size)
+        self.head = 0      # Records written by the game thread (only it writes this)
+        self.tail = 0      # Records consumed by the writer thread
+        self.dropped = 0
+        self.written = 0
+        self.frame_ms_total = 0.0
+        self.frame_ms_max = 0.0
+
+        self.file = None
+        self.running = False
+        self.thread = None
+
+    # Game thread
+
+    def record(self, frame, frame_ms, update_ms, draw_ms, particles, bricks, balls,
+               projectiles, powerups, level, state):
+        head = self.head
+        RECORD.pack_into(self.ring, (head % self.capacity) * RECORD.size, frame & 0xFFFFFFFF,
+                         time.time(), frame_ms, update_ms, draw_ms, particles, min(bricks, 0xFFFF),
+                         min(balls, 0xFFFF), min(projectiles, 0xFFFF), min(powerups, 0xFFFF),
+                         min(level, 0xFFFF), state)
+        self.head = head + 1
+
+    # Writer thread
+
+    def start(self):
+        self._open()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self.thread.start()
+        print(f"Telemetry: writing {self.fmt} to {self.path}")
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.thread.join(timeout=2.0)
+        self._flush()
+        self.file.close()
+        self.file = None
+        print(f"Telemetry: {self.written} frames written, {self.dropped} dropped")
+
+    def _run(self):
+        while self.running:
+            time.sleep(self.flush_interval)
+            self._flush()
+
+    def _take(self):
+        """Copy out unread records; returns a list of unpacked tuples"""
+        head = self.head
+        start = max(self.tail, head - self.capacity)
+        if head == start:
+            return []
+        size = RECORD.size
+        first = (start % self.capacity) * size
+        last = (head % self.capacity) * size
+        if head - start == self.capacity or last <= first:
+            data = bytes(self.ring[first:]) + bytes(self.ring[:last])
+        else:
+            data = bytes(self.ring[first:last])
+        # Anything the game thread lapped while we were copying, including
+        # the slot it may be writing right now, could be torn
+        lapped = max(0, self.head + 1 - self.capacity - start)
+        self.dropped += start - self.tail + lapped
+        self.tail = head
+        return list(RECORD.iter_unpack(data))[lapped:]
+
+    def _flush(self):
+        records = self._take()
+        if records:
+            if self.fmt == "jsonl":
+                lines = []
+                for values in records:
+                    entry = dict(zip(FIELDS, values))
+                    state = entry["state"]
+                    entry["state"] = self.states[state] if state < len(self.states) else state
+                    lines.append(json.dumps(entry, separators=(",", ":")))
+                self.file.write(("\n".join(lines) + "\n").encode("utf-8"))
+            else:
+                self.file.write(b"".join(RECORD.pack(*values) for values in records))
+            self.file.flush()
+            self.written += len(records)
+            for values in records:
+                self.frame_ms_total += values[2]
+                self.frame_ms_max = max(self.frame_ms_max, values[2])
+            if self.file.tell() >= self.max_bytes:
+                self._rotate()
+        if self.prom_path and records:
+            self._write_prometheus(records[-1])
+
+    def _open(self):
+        self.file = open(self.path, "wb")
+        if self.fmt == "binary":
+            layout = RECORD.format.encode("ascii")
+            self.file.write(MAGIC + bytes((VERSION, len(layout))) + layout)
+
+    def _rotate(self):
+        """prefix.ext -> prefix.ext.1 -> ... -> prefix.ext.<max_files>"""
+        self.file.close()
+        for index in range(self.max_files - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        self._open()
+
+    def _write_prometheus(self, latest):
+        entry = dict(zip(FIELDS, latest))
+        lines = [
+            "# TYPE brick_breaker_frames_total counter",
+            f"brick_breaker_frames_total {self.written}",
+            "# TYPE brick_breaker_telemetry_dropped_total counter",
+            f"brick_breaker_telemetry_dropped_total {self.dropped}",
+            "# TYPE brick_breaker_frame_ms_mean gauge",
+            f"brick_breaker_frame_ms_mean {self.frame_ms_total / max(1, self.written):.3f}",
+            "# TYPE brick_breaker_frame_ms_max gauge",
+            f"brick_breaker_frame_ms_max {self.frame_ms_max:.3f}",
+        ]
+        for field in FIELDS[2:]:
+            lines.append(f"# TYPE brick_breaker_{field} gauge")
+            value = entry[field]
+            lines.append(f"brick_breaker_{field} {value:.3f}" if isinstance(value, float)
+                         else f"brick_breaker_{field} {value}")
+        temp = self.prom_path + ".tmp"
+        with open(temp, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp, self.prom_path)
+
+
+def read_binary(path):
+    """Yield a dict per record from a binary telemetry file"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != MAGIC:
+        raise ValueError(f"{path} is not a telemetry file")
+    layout = struct.Struct(data[6:6 + data[5]].decode("ascii"))
+    for values in layout.iter_unpack(data[6 + data[5]:]):
+        yield dict(zip(FIELDS, values))
@@ -0,0 +1,39 @@
+"""Headless setup shared by the tests: dummy SDL drivers and the game
+modules importable from the repository root"""
+import os
+import sys
+
+import pytest
+
+# Set before pygame is imported anywhere
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def new_game():
+    """Factory for Games drawing to an offscreen surface, with no frame
+    pacing and the scheduler off (nothing drains it between steps)"""
+    pygame = pytest.importorskip("pygame")
+    pytest.importorskip("numpy")
+    import brick_breaker
+    from render import SurfaceCanvas
+
+    def make(seed=1, **kwargs):
+        canvas = SurfaceCanvas(pygame.Surface((brick_breaker.SCREEN_WIDTH, brick_breaker.SCREEN_HEIGHT)))
+        game = brick_breaker.Game(seed=seed, pacing="none", canvas=canvas, **kwargs)
+        game.scheduler.active = False
+        return game
+    return make
+
+
+def play(game, frames):
+    """Step `game` with its autopilot's input; returns the (frame_input,
+    key_events) it was given, frame by frame"""
+    inputs = []
+    for _ in range(frames):
+        frame_input, key_events = game.autopilot.control(game), game.autopilot.keys(game)
+        game.step(frame_input, key_events)
+        inputs.append((frame_input, key_events))
+    return inputs
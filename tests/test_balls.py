@@ -0,0 +1,47 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from balls import BallSystem
+
+
+def system(count, capacity=16):
+    balls = BallSystem(capacity, (800, 600), 10, 5, ("normal", "fire"), ((255, 255, 255), (255, 0, 0)))
+    for i in range(count):
+        balls.add(i * 256, 1000 + i, 10 * i, -i, kind=i % 2, life=100 + i)
+    return balls
+
+
+def rows(balls):
+    n = balls.count
+    return list(zip(balls.x[:n].tolist(), balls.y[:n].tolist(), balls.vx[:n].tolist(),
+                    balls.vy[:n].tolist(), balls.kind[:n].tolist(), balls.life[:n].tolist()))
+
+
+def test_remove_swaps_tail_balls_into_holes():
+    balls = system(6)
+    before = rows(balls)
+    dead = np.zeros(6, bool)
+    dead[[1, 4, 5]] = True
+    balls.remove(dead)
+    # Slot 1 is refilled from slot 3, the only live ball past the new count,
+    # with every column moving together
+    assert rows(balls) == [before[0], before[3], before[2]]
+
+
+@pytest.mark.parametrize("dead_slots", [[], [0], [5], [0, 1, 2], [3, 4, 5], [0, 2, 4], list(range(6))])
+def test_remove_keeps_exactly_the_live_balls(dead_slots):
+    balls = system(6)
+    before = rows(balls)
+    dead = np.zeros(6, bool)
+    dead[dead_slots] = True
+    balls.remove(dead)
+    assert balls.count == 6 - len(dead_slots)
+    assert sorted(rows(balls)) == [row for i, row in enumerate(before) if i not in dead_slots]
+
+
+def test_capacity_and_duplicate():
+    balls = system(3, capacity=4)
+    assert balls.duplicate() == 1
+    assert balls.add(0, 0, 0, 0) is None
+    assert rows(balls)[3][:4] == (0, 1000, 0, 0)  # Ball 0 mirrored
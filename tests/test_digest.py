@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("pygame")
+pytest.importorskip("numpy")
+
+import brick_breaker
+import digest
+
+
+def pair(new_game, candidate_factory=None, **modes):
+    reference = new_game(seed=9)
+    candidate = new_game(seed=9) if candidate_factory is None else candidate_factory(reference)
+    for game in (reference, candidate):
+        if modes.get("mega_balls"):
+            game.enable_mega_balls(modes["mega_balls"])
+        game.start_game()
+        game.lives = 1000
+    reference.enable_autopilot()
+    return reference, candidate
+
+
+def test_reference_matches_itself(new_game):
+    digests = []
+    for _ in range(2):
+        reference, candidate = pair(new_game)
+        divergence, stats = digest.compare(reference, candidate, digest.autopilot_inputs(reference, 600),
+                                           brick_breaker)
+        assert divergence is None
+        assert stats["frames"] == 600
+        digests.append(stats["digest"])
+    # A whole run comes down to one number that another run can be held to
+    assert digests[0] == digests[1]
+
+
+def test_reference_matches_itself_with_mega_balls(new_game):
+    reference, candidate = pair(new_game, mega_balls=50)
+    divergence, _ = digest.compare(reference, candidate, digest.autopilot_inputs(reference, 300), brick_breaker)
+    assert divergence is None
+
+
+def test_divergence_names_the_field(new_game):
+    class Drifting(brick_breaker.Game):
+        def step(self, frame_input, key_events=()):
+            super().step(frame_input, key_events)
+            if self.frame_count == 100:
+                self.score += 1
+
+    def drifting(reference):
+        game = Drifting(seed=9, pacing="none", canvas=reference.canvas)
+        game.scheduler.active = False
+        return game
+
+    reference, candidate = pair(new_game, drifting)
+    divergence, _ = digest.compare(reference, candidate, digest.autopilot_inputs(reference, 300), brick_breaker)
+    assert divergence is not None
+    assert divergence.frame == 99
+    assert divergence.fields == [("score", reference.score, candidate.score)]
@@ -0,0 +1,44 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pygame = pytest.importorskip("pygame")
+
+from projectiles import ProjectileStore
+
+
+def columns(store):
+    n = store.count
+    return [column[:n].tolist() for column in (store.x, store.y, store.vx, store.vy)]
+
+
+def test_pack_and_load_round_trip():
+    store = ProjectileStore(64, (800, 600))
+    store.fire(400, 100, np.linspace(0, math.pi, 24), 3.5)
+    paddle = pygame.Rect(350, 150, 100, 20)
+    for _ in range(20):
+        store.update(paddle)
+    assert 0 < len(store) < 24
+
+    buffer = bytearray(8)
+    end = store.pack_into(buffer, 8)
+    assert end - 8 == len(store) * ProjectileStore.RECORD_SIZE
+
+    restored = ProjectileStore(64, (800, 600))
+    restored.fire(0, 0, [0.0], 1)
+    assert restored.load_from(bytes(buffer), 8, len(store)) == end
+    assert columns(restored) == columns(store)
+
+
+def test_entries_stay_in_firing_order():
+    store = ProjectileStore(64, (800, 600))
+    store.fire(400, 300, np.linspace(0, 2 * math.pi, 16, endpoint=False), 4)
+    store.fire(400, 300, [math.pi / 2], 1)
+    for _ in range(90):
+        store.update(pygame.Rect(0, 0, 0, 0))
+    serials, records = store.entries()
+    assert store.fired == 17
+    assert 0 < len(store) < 17  # Some left the screen
+    assert serials.tolist() == sorted(serials.tolist())
+    assert records[:, :2].tolist() == (np.column_stack((store.x, store.y))[:store.count] >> 8).tolist()
@@ -0,0 +1,54 @@
+from replay import ReplayWriter, ReplayReader, FOOTER
+
+
+def record(game, path, frames, keyframe_interval):
+    """Autopilot run recorded through simulate_frame; returns the state
+    before each frame"""
+    game.recorder = ReplayWriter(path, game.seed, game.level_set, keyframe_interval)
+    game.enable_autopilot()
+    states = []
+    for _ in range(frames):
+        states.append(game.save_state())
+        game.simulate_frame((0, 0), [])
+    states.append(game.save_state())
+    game.recorder.close()
+    return states
+
+
+def test_replay_round_trip_and_seek(new_game, tmp_path):
+    path = str(tmp_path / "run.bbr")
+    states = record(new_game(seed=21), path, 400, keyframe_interval=100)
+
+    reader = ReplayReader(path)
+    assert reader.seed == 21
+    assert [frame for frame, _ in reader.index] == [0, 100, 200, 300]
+    assert [frame for frame, _, _ in reader.frames()] == list(range(400))
+
+    # Seeking to a frame past a keyframe loads it and steps the rest
+    game = new_game(seed=reader.seed)
+    reader.seek(game, 250)
+    assert game.save_state() == states[250]
+
+    # Playing on from there reproduces the recording to the end
+    for frame, frame_input, key_events in reader.play(game, 250):
+        game.step(frame_input, key_events)
+    assert game.save_state() == states[400]
+
+
+def test_reader_rebuilds_a_missing_index(new_game, tmp_path):
+    path = str(tmp_path / "run.bbr")
+    states = record(new_game(seed=21), path, 250, keyframe_interval=100)
+    index = ReplayReader(path).index
+
+    # Cut off the index block and footer, as an interrupted recording would
+    with open(path, "rb") as f:
+        data = f.read()
+    index_offset, _ = FOOTER.unpack(data[-FOOTER.size:])
+    with open(path, "wb") as f:
+        f.write(data[:index_offset])
+
+    reader = ReplayReader(path)
+    assert reader.index == index
+    game = new_game(seed=reader.seed)
+    reader.seek(game, 150)
+    assert game.save_state() == states[150]
@@ -0,0 +1,56 @@
+import pytest
+
+from conftest import play
+
+
+def start(game, mode):
+    if mode == "mega":
+        game.enable_mega_balls(40)
+    elif mode == "bullet_hell":
+        game.enable_bullet_hell()
+    game.enable_autopilot()
+    game.start_game()
+    game.lives = 1000
+    if mode == "bullet_hell":
+        game.level = 3  # The first boss
+        game.reset_level()
+
+
+@pytest.mark.parametrize("mode", ["classic", "mega", "bullet_hell"])
+def test_snapshot_round_trip(new_game, mode):
+    game = new_game(seed=11)
+    start(game, mode)
+    play(game, 300)
+    if mode == "bullet_hell":
+        assert len(game.projectile_store) > 0
+
+    buffer = bytearray(16)  # Too small on purpose: snapshot_into grows it
+    end = game.snapshot_into(buffer)
+    data = bytes(buffer[:end])
+    assert data == game.save_state()
+
+    # A fresh game in the default mode picks the mode up from the flags
+    restored = new_game(seed=11)
+    restored.load_state(data)
+    assert restored.save_state() == data
+    assert (restored.ball_system is not None) == (mode == "mega")
+    assert (restored.projectile_store is not None) == (mode == "bullet_hell")
+
+    # And carries on exactly as the original does
+    for frame_input, key_events in play(game, 120):
+        restored.step(frame_input, key_events)
+    assert restored.save_state() == game.save_state()
+
+
+def test_load_state_leaves_special_modes(new_game):
+    classic = new_game(seed=11)
+    start(classic, "classic")
+    data = classic.save_state()
+
+    game = new_game(seed=11)
+    start(game, "mega")
+    game.enable_bullet_hell()
+    game.load_state(data)
+    assert game.ball_system is None
+    assert game.projectile_store is None
+    assert game.save_state() == data
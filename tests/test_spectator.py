@@ -0,0 +1,92 @@
+import pytest
+
+import spectator
+from spectator import SpectatorServer, SpectatorView, HEADER, KEYFRAME, DELTA
+
+
+class RecordingLoop:
+    """Stands in for the server's event loop and keeps what publish sends"""
+    def __init__(self):
+        self.messages = []
+
+    def call_soon_threadsafe(self, callback, tick, state, message):
+        self.messages.append((tick, message))
+
+
+def framed(tick, message):
+    kind, payload = message
+    return HEADER.pack(kind, tick, len(payload)) + payload
+
+
+def game_balls(game):
+    balls = [(ball.rect.x, ball.rect.y) for ball in game.balls]
+    if game.ball_system is not None:
+        balls += [(x, y) for x, y, _, _, _ in game.ball_system.entries()]
+    return balls
+
+
+def worst_error(view_points, game_points):
+    assert len(view_points) == len(game_points)
+    return max((max(abs(a - c), abs(b - d)) for (a, b), (c, d) in zip(view_points, game_points)), default=0)
+
+
+@pytest.mark.parametrize("mode", ["classic", "mega", "bullet_hell"])
+def test_viewers_follow_keyframes_and_deltas(new_game, mode):
+    game = new_game(seed=4)
+    if mode == "mega":
+        game.enable_mega_balls(60)
+    elif mode == "bullet_hell":
+        game.enable_bullet_hell()
+    game.enable_autopilot()
+    game.start_game()
+    game.lives = 1000
+    if mode == "bullet_hell":
+        game.level = 3
+        game.reset_level()
+
+    server = SpectatorServer(keyframe_interval=120)
+    server.loop = RecordingLoop()
+    viewer, late_joiner = SpectatorView(), SpectatorView()
+    kinds = set()
+    for frame in range(600):
+        game.simulate_frame((0, 0), [])
+        server.publish(game)
+        tick, message = server.loop.messages.pop()
+        kinds.add(message[0])
+        viewer.feed(framed(tick, message))
+        if frame >= 250:
+            if not late_joiner.synced:
+                # Joins mid-stream: what the server sends a new client first
+                late_joiner.feed(server._keyframe_bytes(tick, server.previous))
+            else:
+                late_joiner.feed(framed(tick, message))
+
+        for view in (viewer, late_joiner) if late_joiner.synced else (viewer,):
+            assert view.tick == tick
+            assert [brick[6] for brick in view.bricks] == [brick.hits_taken for brick in game.bricks]
+            assert worst_error([(x, y) for x, y, _ in view.balls], game_balls(game)) <= 2
+            if game.projectile_store is not None:
+                _, records = game.projectile_store.entries()
+                assert worst_error(view.bullets, [tuple(row) for row in records[:, :2].tolist()]) <= 1
+            else:
+                assert view.bullets == []
+
+    assert kinds == {KEYFRAME, DELTA}
+    if mode == "bullet_hell":
+        assert len(game.projectile_store) > 0
+
+
+def test_keyframe_is_exact(new_game):
+    game = new_game(seed=4)
+    game.enable_mega_balls(30)
+    game.enable_autopilot()
+    game.start_game()
+    for _ in range(100):
+        game.simulate_frame((0, 0), [])
+
+    state = spectator.capture_state(game, spectator._EntityIds(), spectator._EntityIds())
+    view = SpectatorView()
+    assert view.feed(framed(7, (KEYFRAME, state.encode_keyframe()))) == 1
+    assert view.synced and view.tick == 7
+    assert [(x, y) for x, y, _ in view.balls] == game_balls(game)
+    assert view.paddle[0] == game.paddle.rect.x
@@ -0,0 +1,56 @@
+import socket
+import time
+
+from versus import UdpTransport, RollbackSession
+
+
+def free_udp_ports(count):
+    sockets = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(count)]
+    for sock in sockets:
+        sock.bind(("127.0.0.1", 0))
+    ports = [sock.getsockname()[1] for sock in sockets]
+    for sock in sockets:
+        sock.close()
+    return ports
+
+
+def test_rollback_over_lossy_delayed_loopback_ends_in_sync(new_game):
+    ports = free_udp_ports(2)
+    transports = [UdpTransport(ports[i], ("127.0.0.1", ports[1 - i]), host="127.0.0.1", loss=0.2,
+                               delay_ms=20)
+                  for i in range(2)]
+    for i, transport in enumerate(transports):
+        transport.chaos.seed(i)
+        transport.start()
+
+    # Each cabinet steps both fields from the same seed, as run_versus does
+    sessions = []
+    for player, transport in enumerate(transports):
+        games = [new_game(seed=5), new_game(seed=5)]
+        for game in games:
+            game.start_game()
+            game.lives = 1000
+            game.sound_manager.sound_enabled = False
+        games[player].enable_autopilot()
+        sessions.append(RollbackSession(games, player, transport, check_interval=30))
+
+    try:
+        # Run past frame 600 so the checksums up to it have crossed over
+        deadline = time.monotonic() + 60
+        while min(session.frame for session in sessions) < 700 and time.monotonic() < deadline:
+            for session in sessions:
+                local = session.games[session.player]
+                session.advance(local.autopilot.control(local))
+            time.sleep(0.001)
+    finally:
+        for transport in transports:
+            transport.stop()
+
+    assert sum(transport.dropped for transport in transports) > 0
+    for session in sessions:
+        assert session.frame >= 700
+        assert session.desync_frame is None, session.report()
+        assert sum(session.rollback_counts) > 0  # The loss really forced rollbacks
+        # A checksum leaves local_checks once the peer's for that frame matched it
+        assert not [frame for frame in session.local_checks if frame <= 600]
+        assert session.next_check > 600
@@ -0,0 +1,501 @@
+"""Two-player versus over UDP with rollback netcode.
+
+Each cabinet runs both fields: two Game instances started from the same
+seed and stepped together, frame by frame, by RollbackSession. Only inputs
+cross the network, one (fixed-point mouse x, input bits) pair per player per
+frame. Clearing bricks earns garbage: every `garbage_bricks` cleared pushes
+a row of bricks onto the top of the opponent's field (Game.add_garbage_rows),
+and a field buried down to the paddle zone loses.
+
+Rollback: the local input for a frame is known at once (after an optional
+input delay); the remote one usually isn't, so it is predicted as a repeat
+of the last one received and the frame is simulated anyway. Both fields are
+snapshotted (Game.snapshot_into, a preallocated ring of
+max_rollback + 2 slots) before every frame. When the real remote input for
+a simulated frame arrives and differs from the prediction, both games are
+loaded back to that frame and re-simulated up to the present, all inside the
+current display frame, with sound muted and particles thrown away. A
+cabinet more than max_rollback frames ahead of the remote inputs it has
+stalls instead, and one running ahead of its peer skips a frame now and then
+to let it catch up.
+
+Every packet carries all local inputs the peer hasn't acknowledged yet (up
+to MAX_PACKET_INPUTS), so a lost packet is covered by the next one. Every
+`check_interval` frames, once all inputs up to it are confirmed, the
+snapshot of both fields is CRC32'd; the last few checksums ride along in each
+packet and a mismatch with the peer's is reported as a desync.
+
+Packets (little endian):
+
+    HELLO  magic, type, player, seed (HELLO); the host's seed is the match's
+    INPUT  magic, type, sender frame, frame advantage, ack (first of the
+           receiver's frames not yet received), first input frame, count
+           (PACKET), count x (mouse x, bits) (INPUT), check count (CHECKS),
+           check count x (frame, crc32) (CHECK)
+    BYE    magic, type
+
+UdpTransport keeps the socket on an asyncio event loop in a background
+thread, like the spectator server; the game thread only queues datagrams to
+send and drains the ones received.
+"""
+import asyncio
+import collections
+import random
+import struct
+import threading
+import time
+import zlib
+
+MAGIC = b"BBVS"
+HELLO_PACKET = ord("H")
+INPUT_PACKET = ord("I")
+BYE_PACKET = ord("Q")
+
+HEADER = struct.Struct("<4sB")
+HELLO = struct.Struct("<4sBBI")          # magic, type, player, seed
+PACKET = struct.Struct("<4sBIbIIB")      # magic, type, frame, advantage, ack, first input frame, count
+INPUT = struct.Struct("<iB")             # mouse x (fixed point), input bits
+CHECKS = struct.Struct("<B")
+CHECK = struct.Struct("<II")             # frame, crc32 of both fields at its start
+SESSION_STATE = struct.Struct("<HH")     # garbage credit per player
+
+INPUT_KEYBOARD = 4       # Input bit beside the game's left/right: this player uses the keyboard
+MAX_PACKET_INPUTS = 64
+SENT_CHECKS = 4
+DRAW = -1
+
+
+class UdpTransport:
+    """One UDP socket to a fixed peer, served from an asyncio thread.
+
+    `loss` (0..1) and `delay_ms` drop and hold back outgoing datagrams, to
+    try rollback out over loopback.
+    """
+    def __init__(self, port, peer, host="0.0.0.0", loss=0.0, delay_ms=0):
+        self.host = host
+        self.port = port
+        self.peer = peer
+        self.loss = loss
+        self.delay = delay_ms / 1000.0
+        self.chaos = random.Random()  # Not gameplay randomness
+
+        self.loop = None
+        self.thread = None
+        self.transport = None
+        self.error = None  # Why the socket couldn't be bound, raised by start()
+        self.received = collections.deque()
+        self.sent = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+
+    def start(self):
+        """Start the network thread and wait until the socket is bound;
+        raises whatever stopped it binding (port in use, bad address or port)"""
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._serve, args=(ready,), daemon=True, name="versus-net")
+        self.thread.start()
+        ready.wait()
+        if self.error is not None:
+            raise self.error
+        print(f"Versus: UDP port {self.port}, peer {self.peer[0]}:{self.peer[1]}")
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=1.0)
+            self.loop = None
+
+    def send(self, data):
+        """Queue a datagram for the peer; never blocks"""
+        if self.loop is None:
+            return
+        if self.loss and self.chaos.random() < self.loss:
+            self.dropped += 1
+            return
+        if self.delay:
+            self.loop.call_soon_threadsafe(self.loop.call_later, self.delay, self._send, data)
+        else:
+            self.loop.call_soon_threadsafe(self._send, data)
+
+    def receive(self):
+        """Every datagram that arrived since the last call"""
+        packets = []
+        while self.received:
+            packets.append(self.received.popleft())
+        return packets
+
+    def _send(self, data):
+        self.transport.sendto(data, self.peer)
+        self.sent += 1
+        self.bytes_sent += len(data)
+
+    def _serve(self, ready):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.transport, _ = self.loop.run_until_complete(self.loop.create_datagram_endpoint(
+                lambda: _Receiver(self.received), local_addr=(self.host, self.port)))
+        except Exception as e:
+            self.error = e
+            self.loop.close()
+            self.loop = None
+            return
+        finally:
+            # start() is waiting either way
+            ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.transport.close()
+            self.loop.close()
+
+
+class _Receiver(asyncio.DatagramProtocol):
+    def __init__(self, received):
+        self.received = received
+
+    def datagram_received(self, data, addr):
+        self.received.append(data)
+
+
+class Handshake:
+    """Exchanges HELLOs until both cabinets know each other; poll() once a
+    frame until it returns the match seed (player 0's)"""
+    def __init__(self, transport, player, seed, resend_every=6):
+        self.transport = transport
+        self.player = player
+        self.seed = seed if player == 0 else None
+        self.resend_every = resend_every
+        self.polls = 0
+        self.peer_seen = False
+
+    def poll(self):
+        if self.polls % self.resend_every == 0:
+            self.transport.send(HELLO.pack(MAGIC, HELLO_PACKET, self.player, self.seed or 0))
+        self.polls += 1
+        for data in self.transport.receive():
+            if len(data) < HEADER.size or data[:4] != MAGIC:
+                continue
+            kind = data[4]
+            if kind == HELLO_PACKET and len(data) >= HELLO.size:
+                _, _, player, seed = HELLO.unpack_from(data)
+                if player == self.player:
+                    continue
+                if player == 0:
+                    self.seed = seed
+                self.peer_seen = True
+            elif kind == INPUT_PACKET:
+                # The peer only sends inputs once it has our HELLO; its
+                # inputs are sent again, so dropping this one costs nothing
+                self.peer_seen = True
+        if self.peer_seen and self.seed is not None:
+            # One more so a peer still waiting hears from us straight away
+            self.transport.send(HELLO.pack(MAGIC, HELLO_PACKET, self.player, self.seed))
+            return self.seed
+        return None
+
+
+class RollbackSession:
+    """Steps both fields with predicted remote input and rolls back when the
+    prediction turns out wrong"""
+    def __init__(self, games, player, transport, max_rollback=8, input_delay=1,
+                 check_interval=30, garbage_bricks=8, max_advantage=1):
+        self.games = games
+        self.player = player
+        self.remote = 1 - player
+        self.transport = transport
+        self.max_rollback = max_rollback
+        self.input_delay = input_delay
+        self.check_interval = check_interval
+        self.garbage_bricks = garbage_bricks
+        self.max_advantage = max_advantage
+
+        self.frame = 0                 # Next frame to simulate
+        self.inputs = [{}, {}]         # Real inputs per player, by frame
+        self.predicted = {}            # Frame -> remote input it was simulated with
+        self.remote_frame = -1         # Every remote input up to here has arrived
+        self.peer_ack = 0              # First local frame the peer hasn't received
+        self.peer_frame = 0
+        self.peer_advantage = 0
+        self.credit = [0, 0]           # Bricks cleared towards the next garbage row
+        self.outcome = None            # (first frame showing a result, winner), maybe predicted
+        self.winner = None             # Player index, or DRAW, once confirmed
+        self.peer_left = False
+
+        # Both fields start identical, so the paddle's centre is the same
+        # neutral input on both cabinets
+        self.initial = (games[0].paddle.centre_x(), 0)
+        for frame in range(input_delay):
+            self.inputs[player][frame] = self.initial
+
+        # Ring of [field 0, end, field 1, end, session state], by frame
+        self.states = [[bytearray(4096), 0, bytearray(4096), 0, b""] for _ in range(max_rollback + 2)]
+
+        self.next_check = check_interval
+        self.local_checks = {}
+        self.remote_checks = {}
+        self.sent_checks = collections.deque(maxlen=SENT_CHECKS)
+        self.desync_frame = None
+
+        self.rollback_counts = [0] * (max_rollback + 1)  # By depth in frames
+        self.rollback_ms = [0.0] * (max_rollback + 1)
+        self.worst_rollback_ms = 0.0
+        self.resimulated = 0
+        self.stalls = 0
+        self.skips = 0
+
+    # Per display frame
+
+    def advance(self, local_input):
+        """Take one local input and run at most one new frame (plus any
+        rollback); returns True if a frame was simulated"""
+        rollback_to = self._receive()
+        if rollback_to is not None:
+            self._rollback(rollback_to)
+        self._run_checks()
+
+        simulated = False
+        if self.outcome is not None:
+            self._settle()
+        elif not self.peer_left:
+            if self.frame - (self.remote_frame + 1) >= self.max_rollback:
+                self.stalls += 1  # Too far ahead of what the peer has sent
+            elif (self.frame - self.peer_frame - self.peer_advantage) // 2 > self.max_advantage \
+                    and self.frame % 4 == 0:
+                self.skips += 1   # Running ahead of the peer: let it catch up
+            else:
+                self.inputs[self.player][self.frame + self.input_delay] = local_input
+                self._save(self.frame)
+                self._simulate(self.frame)
+                self.frame += 1
+                simulated = True
+        self._send()
+        self._prune()
+        return simulated
+
+    def leave(self):
+        for _ in range(3):
+            self.transport.send(HEADER.pack(MAGIC, BYE_PACKET))
+
+    # Simulation
+
+    def _input(self, player, frame):
+        inputs = self.inputs[player]
+        if frame in inputs:
+            return inputs[frame]
+        # Remote input not in yet: assume the player held still
+        guess = self.inputs[player].get(self.remote_frame, self.initial)
+        self.predicted[frame] = guess
+        return guess
+
+    def _simulate(self, frame):
+        cleared = [0, 0]
+        for player, game in enumerate(self.games):
+            mouse_x, bits = self._input(player, frame)
+            game.use_mouse = not bits & INPUT_KEYBOARD
+            bricks = game.bricks
+            standing = sum(1 for brick in bricks if not brick.destroyed)
+            game.step((mouse_x, bits & ~INPUT_KEYBOARD))
+            cleared[player] = standing - sum(1 for brick in bricks if not brick.destroyed)
+        # Garbage moves only after both fields have stepped, so neither
+        # player's order in the list matters
+        for player, count in enumerate(cleared):
+            self.credit[player] += count
+            rows, self.credit[player] = divmod(self.credit[player], self.garbage_bricks)
+            if rows:
+                self.games[1 - player].add_garbage_rows(rows)
+        if self.outcome is None:
+            winner = self._winner()
+            if winner is not None:
+                self.outcome = (frame + 1, winner)
+
+    def _save(self, frame):
+        slot = self.states[frame % len(self.states)]
+        slot[1] = self.games[0].snapshot_into(slot[0])
+        slot[3] = self.games[1].snapshot_into(slot[2])
+        slot[4] = SESSION_STATE.pack(*self.credit)
+
+    def _load(self, frame):
+        slot = self.states[frame % len(self.states)]
+        for game, buffer in zip(self.games, (slot[0], slot[2])):
+            particles = game.particle_system
+            game.load_state(buffer)
+            game.particle_system = particles  # Effects already on screen carry on
+        self.credit = list(SESSION_STATE.unpack(slot[4]))
+        if self.outcome is not None and self.outcome[0] > frame:
+            self.outcome = None
+
+    def _rollback(self, frame):
+        """Back to `frame` and forward to the present with the inputs known now"""
+        start = time.perf_counter()
+        depth = self.frame - frame
+        self._load(frame)
+        muted = []
+        for game in self.games:
+            particles = game.particle_system
+            muted.append((particles, game.sound_manager.sound_enabled))
+            game.particle_system = type(particles)(None, particles.mode)  # Scratch; the effects were shown already
+            game.sound_manager.sound_enabled = False
+        for replayed in range(frame, self.frame):
+            self._save(replayed)
+            self._simulate(replayed)
+        for game, (particles, sound) in zip(self.games, muted):
+            game.particle_system = particles
+            game.sound_manager.sound_enabled = sound
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.rollback_counts[depth] += 1
+        self.rollback_ms[depth] += elapsed
+        self.worst_rollback_ms = max(self.worst_rollback_ms, elapsed)
+        self.resimulated += depth
+
+    def _winner(self):
+        lost = [game.lives <= 0 for game in self.games]
+        cleared = [game.level > game.max_level for game in self.games]
+        if any(cleared):
+            return cleared.index(True) if cleared.count(True) == 1 else DRAW
+        if any(lost):
+            return lost.index(False) if lost.count(True) == 1 else DRAW
+        return None
+
+    def _settle(self):
+        """The match is over once every input before the deciding frame is
+        in; until then a rollback could still change it"""
+        frame, winner = self.outcome
+        if self.winner is not None or self.remote_frame + 1 < frame:
+            return
+        self.winner = winner
+        print(f"Versus: {'draw' if winner == DRAW else f'player {winner + 1} wins'} at frame {frame}")
+
+    # Desync detection
+
+    def _run_checks(self):
+        confirmed = min(self.frame, self.remote_frame + 1)
+        while self.next_check <= confirmed:
+            frame = self.next_check
+            if frame == self.frame:
+                self._save(frame)  # The live state is that frame's start
+            slot = self.states[frame % len(self.states)]
+            crc = zlib.crc32(memoryview(slot[0])[:slot[1]])
+            crc = zlib.crc32(memoryview(slot[2])[:slot[3]], crc)
+            crc = zlib.crc32(slot[4], crc)
+            self.local_checks[frame] = crc
+            self.sent_checks.append((frame, crc))
+            self._compare(frame)
+            self.next_check += self.check_interval
+
+    def _compare(self, frame):
+        if frame not in self.local_checks or frame not in self.remote_checks:
+            return
+        local, remote = self.local_checks.pop(frame), self.remote_checks.pop(frame)
+        if local != remote and self.desync_frame is None:
+            self.desync_frame = frame
+            print(f"Versus: DESYNC at frame {frame} (local {local:08x}, peer {remote:08x})")
+
+    # Network
+
+    def _send(self):
+        local = self.inputs[self.player]
+        newest = self.frame + self.input_delay - 1
+        while newest + 1 in local:
+            newest += 1
+        first = self.peer_ack
+        count = max(0, min(newest - first + 1, MAX_PACKET_INPUTS))
+        advantage = max(-128, min(127, self.frame - self.peer_frame))
+        parts = [PACKET.pack(MAGIC, INPUT_PACKET, self.frame, advantage, self.remote_frame + 1, first, count)]
+        for frame in range(first, first + count):
+            parts.append(INPUT.pack(*local[frame]))
+        parts.append(CHECKS.pack(len(self.sent_checks)))
+        for check in self.sent_checks:
+            parts.append(CHECK.pack(*check))
+        self.transport.send(b"".join(parts))
+
+    def _receive(self):
+        """Take in the peer's packets; returns the earliest frame simulated
+        with a wrong prediction, or None"""
+        rollback_to = None
+        remote = self.inputs[self.remote]
+        for data in self.transport.receive():
+            if len(data) < HEADER.size or data[:4] != MAGIC:
+                continue
+            kind = data[4]
+            if kind == BYE_PACKET:
+                if not self.peer_left:
+                    print("Versus: opponent left")
+                self.peer_left = True
+                continue
+            if kind == HELLO_PACKET:
+                # The peer missed our last handshake packet
+                self.transport.send(HELLO.pack(MAGIC, HELLO_PACKET, self.player, self.games[0].seed))
+                continue
+            if kind != INPUT_PACKET or len(data) < PACKET.size:
+                continue
+            _, _, frame, advantage, ack, first, count = PACKET.unpack_from(data)
+            if frame >= self.peer_frame:
+                self.peer_frame, self.peer_advantage = frame, advantage
+            self.peer_ack = max(self.peer_ack, ack)
+            offset = PACKET.size
+            for input_frame in range(first, first + count):
+                if input_frame > self.remote_frame and input_frame not in remote:
+                    value = INPUT.unpack_from(data, offset)
+                    remote[input_frame] = value
+                    guess = self.predicted.pop(input_frame, None)
+                    if guess is not None and guess != value:
+                        if rollback_to is None or input_frame < rollback_to:
+                            rollback_to = input_frame
+                offset += INPUT.size
+            checks, = CHECKS.unpack_from(data, offset)
+            offset += CHECKS.size
+            for _ in range(checks):
+                check_frame, crc = CHECK.unpack_from(data, offset)
+                offset += CHECK.size
+                # Resent checks we've already compared are neither pending nor ahead
+                if check_frame >= self.next_check or check_frame in self.local_checks:
+                    self.remote_checks[check_frame] = crc
+                    self._compare(check_frame)
+        while self.remote_frame + 1 in remote:
+            self.remote_frame += 1
+        return rollback_to
+
+    def _prune(self):
+        """Forget inputs no rollback or resend can need again"""
+        oldest = self.frame - len(self.states)
+        remote = self.inputs[self.remote]
+        for frame in [frame for frame in remote if frame < oldest and frame != self.remote_frame]:
+            del remote[frame]
+        local = self.inputs[self.player]
+        for frame in [frame for frame in local if frame < min(oldest, self.peer_ack)]:
+            del local[frame]
+        for frame in [frame for frame in self.predicted if frame < oldest]:
+            del self.predicted[frame]
+        # Checks the peer never answered (its packets carry the last few)
+        stale = self.next_check - self.check_interval * SENT_CHECKS * 4
+        for frame in [frame for frame in self.local_checks if frame < stale]:
+            del self.local_checks[frame]
+
+    # Reporting
+
+    def hud_lines(self):
+        rollbacks = sum(self.rollback_counts)
+        lines = [f"frame {self.frame}, {self.frame - self.peer_frame:+d} vs peer, "
+                 f"{self.frame - self.remote_frame - 1} unconfirmed",
+                 f"rollbacks {rollbacks}, {self.resimulated} frames redone, "
+                 f"worst {self.worst_rollback_ms:.1f} ms",
+                 f"stalls {self.stalls}, skips {self.skips}, sent {self.transport.sent}"]
+        if self.desync_frame is not None:
+            lines.append(f"DESYNC at frame {self.desync_frame}")
+        return lines
+
+    def report(self):
+        lines = [f"Versus: {self.frame} frames, {sum(self.rollback_counts)} rollbacks re-simulating "
+                 f"{self.resimulated} frames, {self.stalls} stalls, {self.skips} time-sync skips, "
+                 f"{self.transport.sent} packets sent ({self.transport.bytes_sent} bytes, "
+                 f"{self.transport.dropped} dropped on purpose)"]
+        for depth, count in enumerate(self.rollback_counts):
+            if count:
+                lines.append(f"  rollback depth {depth}: {count} times, "
+                             f"mean {self.rollback_ms[depth] / count:.2f} ms")
+        if any(self.rollback_counts):
+            lines.append(f"  worst rollback {self.worst_rollback_ms:.2f} ms")
+        lines.append("  no desyncs" if self.desync_frame is None else f"  DESYNC at frame {self.desync_frame}")
+        return "\n".join(lines)